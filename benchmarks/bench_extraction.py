@@ -0,0 +1,133 @@
+"""
+Micro-benchmark for extract_solution_code.
+
+Checks extraction accuracy on the response corpus (benchmarks/extraction_corpus.jsonl, one
+{"id", "language", "response", "expected"} object per line) against the previous regex cascade, then
+times both on responses of growing size to show how the cost scales.
+
+    python benchmarks/bench_extraction.py
+    python benchmarks/bench_extraction.py --corpus my_responses.jsonl --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import warnings
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from src.utils import extract_solution_code  # noqa: E402
+
+
+def legacy_extract_solution_code(response_content, language="python"):
+    """The regex cascade extract_solution_code used before the single-pass scanner, for comparison."""
+    try:
+        parsed = json.loads(response_content)
+        if isinstance(parsed, dict) and "solution" in parsed:
+            return {"solution": parsed["solution"]}
+    except Exception:
+        pass
+
+    match = re.search(r'"solution"\s*:\s*"([\s\S]*?)"\s*[\}\n]', response_content)
+    if match:
+        sol = match.group(1)
+        sol = sol.encode('utf-8').decode('unicode_escape')
+        return {"solution": sol}
+
+    match = re.search(r"def solution\(.*?\):[\s\S]+?(?=\n\S|\Z)", response_content)
+    if match:
+        return {"solution": match.group(0)}
+
+    match = re.search(rf"```{language}\n(.*?)\n```", response_content, re.DOTALL)
+    if match:
+        return {"solution": match.group(1).strip()}
+    return None
+
+
+# The legacy unicode_escape decode warns about escapes like \d found in solutions.
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+EXTRACTORS = {"legacy": legacy_extract_solution_code, "scanner": extract_solution_code}
+
+
+def load_corpus(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def solution_of(extractor, case):
+    try:
+        found = extractor(case["response"], case["language"])
+    except Exception as e:
+        return f"<{type(e).__name__}>"
+    return found.get("solution") if found else None
+
+
+def check_accuracy(corpus):
+    """Prints the cases each extractor gets right; returns the ids the scanner regressed on."""
+    correct = {name: 0 for name in EXTRACTORS}
+    regressions = []
+    for case in corpus:
+        outcome = {name: solution_of(extractor, case) == case["expected"] for name, extractor in EXTRACTORS.items()}
+        for name, ok in outcome.items():
+            correct[name] += ok
+        if outcome["legacy"] and not outcome["scanner"]:
+            regressions.append(case["id"])
+        marks = "  ".join(f"{name}={'ok' if ok else 'FAIL'}" for name, ok in outcome.items())
+        print(f"  {case['id']:32} {marks}")
+    for name, count in correct.items():
+        print(f"{name}: {count}/{len(corpus)} correct")
+    return regressions
+
+
+def scaling_inputs(size):
+    """Responses of about `size` characters: a long reasoning answer, and one that defeats lazy regexes."""
+    reasoning = "Let me think about the edge cases of this exercise step by step.\n"
+    answer = json.dumps({"exercise": "Double", "solution": "def solution(n):\n    return n * 2"})
+    # An unterminated "solution" string full of quotes: every quote has to be checked as a possible end.
+    unterminated = '"solution": "' + ('x" y ' * size)[:size]
+    return {
+        "reasoning+json": reasoning * (size // len(reasoning)) + answer,
+        "unterminated-string": unterminated,
+        "def-without-end": "def solution(n):" + ("\n    x = 1" * (size // 10)),
+        # Many unfinished headers on one line: each one makes a lazy `.*?\):` rescan the rest of the line.
+        "unfinished-headers": "def solution(" * (size // 13),
+    }
+
+
+def time_call(extractor, text, language="python", budget=0.2):
+    """Best-of-several timing in seconds, bounded by `budget` seconds per measurement."""
+    best = None
+    deadline = time.perf_counter() + budget
+    while True:
+        start = time.perf_counter()
+        extractor(text, language)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        if time.perf_counter() > deadline:
+            return best
+
+
+def check_scaling(sizes):
+    print(f"\n{'input':22} {'chars':>9} " + " ".join(f"{name + ' ms':>12}" for name in EXTRACTORS))
+    for size in sizes:
+        for label, text in scaling_inputs(size).items():
+            timings = [time_call(extractor, text) * 1000 for extractor in EXTRACTORS.values()]
+            print(f"{label:22} {len(text):9d} " + " ".join(f"{timing:12.3f}" for timing in timings))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Accuracy and scaling micro-benchmark of extract_solution_code.")
+    parser.add_argument("--corpus", default=os.path.join(BENCHMARK_DIR, "extraction_corpus.jsonl"))
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print("Accuracy:")
+    regressions = check_accuracy(load_corpus(args.corpus))
+    check_scaling(args.sizes)
+    if regressions:
+        print(f"\nRegressions against the legacy extractor: {', '.join(regressions)}")
+        sys.exit(1)
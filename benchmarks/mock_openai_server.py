@@ -0,0 +1,205 @@
+"""
+Local stand-in for an OpenAI-compatible /v1/chat/completions endpoint.
+
+Latency, error rate and the response text are configurable, so the pipeline can be benchmarked
+without paid endpoints or network noise.
+
+    python benchmarks/mock_openai_server.py --port 8000 --latency lognormal:-2.3,0.5 --error-rate 0.02
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_latency(spec, rng=random):
+    """
+    Returns a function drawing a latency in seconds from a spec:
+    fixed:S, uniform:MIN,MAX, exponential:MEAN or lognormal:MU,SIGMA.
+    Draws come from rng, so a seeded random.Random makes them reproducible.
+    """
+    kind, _, values = spec.partition(":")
+    params = [float(value) for value in values.split(",") if value]
+    if kind == "fixed":
+        return lambda: params[0]
+    if kind == "uniform":
+        return lambda: rng.uniform(params[0], params[1])
+    if kind == "exponential":
+        return lambda: rng.expovariate(1 / params[0]) if params[0] > 0 else 0.0
+    if kind == "lognormal":
+        return lambda: rng.lognormvariate(params[0], params[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def echo_responder(body):
+    """Default responder: a valid executor answer with a trivial Python solution."""
+    return json.dumps({"exercise": "echo", "solution": "def solution(x):\n    return x"})
+
+
+class MockOpenAIServer:
+    """
+    Threaded HTTP server answering chat completion requests.
+
+    responder(body) returns the assistant message text for a request body. error_rate is the
+    probability of answering with a 429 or 500 instead, which exercises the retry paths.
+    """
+    def __init__(self, host="127.0.0.1", port=0, latency="fixed:0", error_rate=0.0, responder=echo_responder,
+                 seed=None, chunk_chars=16, chunk_delay=0.0):
+        self.random = random.Random(seed)
+        self.latency = parse_latency(latency, self.random)
+        self.chunk_chars = chunk_chars  # streamed answers are sent chunk_chars characters at a time,
+        self.chunk_delay = chunk_delay  # chunk_delay seconds apart
+        self.error_rate = error_rate
+        self.responder = responder
+        self.requests = 0
+        self.streamed_chunks = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self.make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+
+                with server.lock:
+                    server.requests += 1
+                    delay = server.latency()
+                    failure = server.random.random() < server.error_rate
+                    status = server.random.choice([429, 500])
+                time.sleep(max(0.0, delay))
+                if failure:
+                    self.send_json(status, {"error": {"message": "mock failure", "code": status}},
+                                   headers={"Retry-After": "0"} if status == 429 else None)
+                    return
+
+                if body.get("stream"):
+                    self.send_stream(body)
+                else:
+                    self.send_json(200, server.completion(body))
+
+            def send_stream(self, body):
+                """Server-sent events in the chat.completion.chunk format; stops if the client hangs up."""
+                content = server.responder(body)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                pieces = [content[i:i + server.chunk_chars] for i in range(0, len(content), server.chunk_chars)]
+                sent = 0
+                try:
+                    for index, piece in enumerate(pieces):
+                        if index and server.chunk_delay:
+                            time.sleep(server.chunk_delay)
+                        self.wfile.write(b"data: " + json.dumps(server.chunk(body, {"content": piece})).encode()
+                                         + b"\n\n")
+                        self.wfile.flush()
+                        sent += 1
+                    self.wfile.write(b"data: " + json.dumps(server.chunk(body, {}, "stop")).encode() + b"\n\n")
+                    if (body.get("stream_options") or {}).get("include_usage"):
+                        # Like the API: one last chunk without choices, carrying the usage of the request.
+                        final = dict(server.chunk(body, {}), choices=[], usage=server.usage(body, [content]))
+                        self.wfile.write(b"data: " + json.dumps(final).encode() + b"\n\n")
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                with server.lock:
+                    server.streamed_chunks += sent
+
+        return Handler
+
+    def chunk(self, body, delta, finish_reason=None):
+        return {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+
+    def completion(self, body):
+        """One choice per requested sample (n); the responder is called once for each."""
+        contents = [self.responder(body) for _ in range(max(1, int(body.get("n") or 1)))]
+        return {
+            "id": f"chatcmpl-mock-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": index,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content}
+            } for index, content in enumerate(contents)],
+            "usage": self.usage(body, contents)
+        }
+
+    @staticmethod
+    def usage(body, contents):
+        """Token counts approximated by whitespace-separated words."""
+        prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in body.get("messages", []))
+        completion_tokens = sum(len(content.split()) for content in contents)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible chat completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:S, uniform:MIN,MAX, exponential:MEAN, "
+                                                            "lognormal:MU,SIGMA (default: fixed:0)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--chunk-delay", type=float, default=0.0,
+                        help="Seconds between the chunks of streamed answers (default: 0)")
+    parser.add_argument("--seed", type=int, help="Seed for latencies and failures (default: random)")
+    args = parser.parse_args()
+    mock = MockOpenAIServer(args.host, args.port, args.latency, args.error_rate, seed=args.seed,
+                             chunk_delay=args.chunk_delay).start()
+    print(f"Mock OpenAI server listening on {mock.url}")
+    try:
+        mock.thread.join()
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,292 @@
+"""
+End-to-end benchmark suite running against the local mock OpenAI server.
+
+For every available language it measures LLMExecutor.query_model, each CodeExecutor subclass and a
+full Main.run, and reports exercises/sec, p50/p95/p99 per-exercise latency and peak RSS. Every
+scenario runs in its own process so peak RSS is per scenario.
+
+    python benchmarks/run_benchmarks.py --exercises 200 --latency lognormal:-2.3,0.5 --save baselines/local.json
+    python benchmarks/run_benchmarks.py --compare baselines/local.json
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from mock_openai_server import MockOpenAIServer  # noqa: E402
+
+# Canned exercises with a known-good solution per language; the mock answers with these.
+SOLUTIONS = {
+    "Double Number": {
+        "input": [1, 2, 21, -4], "output": [2, 4, 42, -8],
+        "python": "def solution(n):\n    return n * 2",
+        "javascript": "function solution(n) {\n    return n * 2;\n}",
+        "java": "public class Solution {\n    public static void main(String[] args) {\n"
+                "        System.out.println(Integer.parseInt(args[0]) * 2);\n    }\n}",
+        "c": "#include <stdio.h>\n\nint main() {\n    int n;\n    scanf(\"%d\", &n);\n    printf(\"%d\\n\", n * 2);\n"
+             "    return 0;\n}",
+        "cpp": "#include <iostream>\n\nint main() {\n    int n;\n    std::cin >> n;\n    std::cout << n * 2 << std::endl;\n"
+               "    return 0;\n}"
+    },
+    "Reverse String": {
+        "input": ["abc", "hello", "racecar"], "output": ["cba", "olleh", "racecar"],
+        "python": "def solution(s):\n    return s[::-1]",
+        "javascript": "function solution(s) {\n    return s.split('').reverse().join('');\n}",
+        "java": "public class Solution {\n    public static void main(String[] args) {\n"
+                "        System.out.println(new StringBuilder(args[0]).reverse());\n    }\n}",
+        "c": "#include <stdio.h>\n\nint main() {\n    char s[1024];\n    int n;\n    scanf(\"%d\", &n);\n    getchar();\n"
+             "    n = (int) fread(s, 1, n, stdin);\n    for (int i = n - 1; i >= 0; i--) putchar(s[i]);\n"
+             "    putchar('\\n');\n    return 0;\n}",
+        "cpp": "#include <algorithm>\n#include <iostream>\n#include <string>\n\nint main() {\n    int n;\n    std::cin >> n;\n"
+               "    std::cin.get();\n    std::string s(n, ' ');\n    std::cin.read(&s[0], n);\n"
+               "    std::reverse(s.begin(), s.end());\n    std::cout << s << std::endl;\n    return 0;\n}"
+    },
+    "Is Even": {
+        "input": [1, 2, 10, 7], "output": [False, True, True, False],
+        "python": "def solution(n):\n    return n % 2 == 0",
+        "javascript": "function solution(n) {\n    return n % 2 === 0;\n}",
+        "java": "public class Solution {\n    public static void main(String[] args) {\n"
+                "        System.out.println(Integer.parseInt(args[0]) % 2 == 0);\n    }\n}",
+        "c": "#include <stdio.h>\n\nint main() {\n    int n;\n    scanf(\"%d\", &n);\n"
+             "    printf(\"%s\\n\", n % 2 == 0 ? \"true\" : \"false\");\n    return 0;\n}",
+        "cpp": "#include <iostream>\n\nint main() {\n    int n;\n    std::cin >> n;\n"
+               "    std::cout << std::boolalpha << (n % 2 == 0) << std::endl;\n    return 0;\n}"
+    },
+    "Factorial": {
+        "input": [0, 1, 5, 10], "output": [1, 1, 120, 3628800],
+        "python": "def solution(n):\n    result = 1\n    for i in range(2, n + 1):\n        result *= i\n"
+                  "    return result",
+        "javascript": "function solution(n) {\n    let result = 1;\n    for (let i = 2; i <= n; i++) result *= i;\n"
+                      "    return result;\n}",
+        "java": "public class Solution {\n    public static void main(String[] args) {\n"
+                "        long result = 1;\n        for (int i = 2; i <= Integer.parseInt(args[0]); i++) result *= i;\n"
+                "        System.out.println(result);\n    }\n}",
+        "c": "#include <stdio.h>\n\nint main() {\n    int n;\n    long long result = 1;\n    scanf(\"%d\", &n);\n"
+             "    for (int i = 2; i <= n; i++) result *= i;\n    printf(\"%lld\\n\", result);\n    return 0;\n}",
+        "cpp": "#include <iostream>\n\nint main() {\n    int n;\n    long long result = 1;\n    std::cin >> n;\n"
+               "    for (int i = 2; i <= n; i++) result *= i;\n    std::cout << result << std::endl;\n    return 0;\n}"
+    }
+}
+
+
+def make_exercises(count):
+    exercises = []
+    names = list(SOLUTIONS)
+    for i in range(count):
+        base = names[i % len(names)]
+        exercises.append({
+            "name": f"{base} #{i}",
+            "description": f"Benchmark exercise {i}: {base.lower()}.",
+            "input": SOLUTIONS[base]["input"],
+            "output": SOLUTIONS[base]["output"]
+        })
+    return exercises
+
+
+def canned_responder(body):
+    """Answers executor prompts with the canned solution of the exercise in the requested language."""
+    prompt = body["messages"][-1]["content"]
+    name = re.search(r"Exercise: (.+?) #\d+", prompt)
+    language = re.search(r"valid (\w+) code", prompt)
+    base = name.group(1) if name else "Double Number"
+    language = language.group(1) if language else "python"
+    return json.dumps({"exercise": base, "solution": SOLUTIONS.get(base, SOLUTIONS["Double Number"])[language]})
+
+
+def available_languages():
+    languages = ["python"]
+    try:
+        import pythonmonkey  # noqa: F401
+        languages.append("javascript")
+    except ImportError:
+        pass
+    if shutil.which("javac") and shutil.which("java"):
+        languages.append("java")
+    if shutil.which("gcc"):
+        languages.append("c")
+    if shutil.which("g++"):
+        languages.append("cpp")
+    return languages
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(latencies, wall_time):
+    return {
+        "exercises": len(latencies),
+        "exercises_per_sec": len(latencies) / wall_time if wall_time > 0 else None,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "wall_time": wall_time
+    }
+
+
+# Scenarios run inside a child process; each returns summarize(...) for its per-exercise latencies.
+
+def scenario_query_model(language, exercises, url):
+    from src.llm_executor import LLMExecutor
+    executor = LLMExecutor(url, "mock-key", "mock-model", language=language)
+    latencies = []
+    start = time.perf_counter()
+    for exercise in exercises:
+        begin = time.perf_counter()
+        executor.query_model(executor.create_prompt(exercise))
+        latencies.append(time.perf_counter() - begin)
+    executor.response_log.close()
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def scenario_executor(language, exercises, url):
+    from src.code_evaluator import CodeExecutionFactory
+    latencies = []
+    start = time.perf_counter()
+    for exercise in exercises:
+        code = SOLUTIONS[exercise["name"].split(" #")[0]][language]
+        begin = time.perf_counter()
+        results = CodeExecutionFactory.get_executor(language, code, exercise["input"], exercise["output"])
+        latencies.append(time.perf_counter() - begin)
+        if not all(result.get("success") for result in results):
+            raise RuntimeError(f"Canned {language} solution failed: {results}")
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def scenario_main_run(language, exercises, url, extra_args=()):
+    import contextlib
+    import io
+    os.makedirs("results", exist_ok=True)
+    with open(os.path.join("results", "generated_exercises.json"), "w", encoding="utf-8") as f:
+        json.dump(exercises, f)
+    for role in ("GENERATOR", "EXECUTOR"):
+        os.environ[f"{role}_API_URL"] = url
+        os.environ[f"{role}_API_KEY"] = "mock-key"
+        os.environ[f"{role}_MODEL"] = "mock-model"
+
+    from main import Main
+    sys.argv = ["main.py", "--language", language] + list(extra_args)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        Main.run()
+    wall_time = time.perf_counter() - start
+    with open(os.path.join("results", "output_llm_results.jsonl"), "r", encoding="utf-8") as f:
+        latencies = [json.loads(line)["elapsed_time"] for line in f]
+    return summarize(latencies, wall_time)
+
+
+SCENARIOS = {
+    "query_model": scenario_query_model,
+    "executor": scenario_executor,
+    "main_run": scenario_main_run,
+    "main_run_concurrent": lambda language, exercises, url: scenario_main_run(
+        language, exercises, url, ["--concurrency", "16"])
+}
+
+
+def run_child(args):
+    """Runs one scenario against its own mock server and prints the metrics as JSON."""
+    server = MockOpenAIServer(latency=args.latency, error_rate=args.error_rate, responder=canned_responder,
+                              seed=args.seed).start()
+    try:
+        metrics = SCENARIOS[args.child](args.language, make_exercises(args.exercises), server.url)
+    finally:
+        server.stop()
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    metrics["peak_rss_mb"] = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    print(json.dumps(metrics))
+
+
+def run_suite(args):
+    report = {
+        "config": {"exercises": args.exercises, "latency": args.latency, "error_rate": args.error_rate,
+                   "seed": args.seed},
+        "results": {}
+    }
+    for language in args.languages or available_languages():
+        for scenario in args.scenarios or SCENARIOS:
+            with tempfile.TemporaryDirectory() as work_dir:
+                cmd = [sys.executable, os.path.abspath(__file__), "--child", scenario, "--language", language,
+                       "--exercises", str(args.exercises), "--latency", args.latency,
+                       "--error-rate", str(args.error_rate), "--seed", str(args.seed)]
+                completed = subprocess.run(cmd, cwd=work_dir, capture_output=True, text=True)
+            key = f"{scenario}/{language}"
+            if completed.returncode != 0:
+                report["results"][key] = {"error": completed.stderr.strip().splitlines()[-1:]}
+            else:
+                report["results"][key] = json.loads(completed.stdout.strip().splitlines()[-1])
+            print_row(key, report["results"][key])
+    return report
+
+
+def metric(value, scale=1, width=9, digits=2):
+    """A metric formatted for print_row, or n/a when the run did not produce it."""
+    return f"{'n/a':>{width}}" if value is None else f"{value * scale:{width}.{digits}f}"
+
+
+def print_row(key, metrics, baseline=None):
+    if "error" in metrics:
+        print(f"{key:32} ERROR {metrics['error']}")
+        return
+    line = (f"{key:32} {metric(metrics.get('exercises_per_sec'), width=10, digits=1)} ex/s  "
+            f"p50 {metric(metrics.get('p50'), 1000)} ms  p95 {metric(metrics.get('p95'), 1000)} ms  "
+            f"p99 {metric(metrics.get('p99'), 1000)} ms  rss {metric(metrics.get('peak_rss_mb'), width=7, digits=1)} MB")
+    if baseline and "error" not in baseline:
+        current, previous = metrics.get("exercises_per_sec"), baseline.get("exercises_per_sec")
+        if current is not None and previous:
+            line += f"  ({(current / previous - 1) * 100:+.1f}% ex/s vs baseline)"
+        else:
+            line += "  (no ex/s to compare with baseline)"
+    print(line)
+
+
+def compare(report, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path}:")
+    for key, metrics in report["results"].items():
+        print_row(key, metrics, baseline.get("results", {}).get(key))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation pipeline against a mock LLM server.")
+    parser.add_argument("--exercises", type=int, default=100)
+    parser.add_argument("--latency", default="fixed:0.05",
+                        help="Mock latency distribution, see mock_openai_server.parse_latency (default: fixed:0.05)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--languages", nargs="*", help="Languages to benchmark (default: all available)")
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS))
+    parser.add_argument("--save", metavar="FILE", help="Write the report as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Compare with a saved JSON baseline")
+    parser.add_argument("--child", choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    parser.add_argument("--language", default="python", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+    else:
+        report = run_suite(args)
+        if args.compare:
+            compare(report, args.compare)
+        if args.save:
+            os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+            with open(args.save, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write("\n")
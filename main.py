@@ -1,61 +1,499 @@
 from src.config import Config
+from src.exercise_store import ExerciseStore
+from src.http_transport import RequestTimeout, transport
 from src.llm_generator import LLMGenerator
 from src.llm_executor import LLMExecutor
+from src.llm_cache import ResponseCache
 from src.code_evaluator import CodeExecutionFactory
+from src.compile_cache import CompileCache
 from src.output_manager import OutputManager
-from src.utils import extract_solution_code
+from src.matrix import MatrixRunner
+from src.pipeline import AsyncPipeline
+from src.profiler import SolutionProfiler
+from src.solver import BatchSolver, SolveBudget, Solver
+from src.tracing import tracer
+from src.worker_pool import WORKER_CLASSES
+from src.utils import exercise_hash, extract_solution_code, parse_shard, shard_of
 
 import argparse
+import asyncio
+import json
+import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 class Main:
     @staticmethod
     def parse_arguments():
         parser = argparse.ArgumentParser(description="Run LLM exercise generator and evaluator.")
-        parser.add_argument("--language", type=str, choices=["python", "javascript", "java"], default="python",
+        parser.add_argument("--language", type=str, choices=["python", "javascript", "java", "c", "cpp"], default="python",
                             help="Programming language for exercises (default: python)")
-        return parser.parse_args()
+        parser.add_argument("--concurrency", type=int, default=1,
+                            help="Number of exercises evaluated concurrently; values above 1 enable the "
+                                 "async pipeline (default: 1)")
+        parser.add_argument("--stream", action="store_true",
+                            help="Stream LLM answers and stop reading as soon as the solution is complete")
+        parser.add_argument("--samples", type=int, default=1, metavar="K",
+                            help="pass@k: request K candidate solutions in one call (n=K), run them in parallel "
+                                 "and keep the first that passes (default: 1)")
+        parser.add_argument("--repair-rounds", type=int, default=0, metavar="R",
+                            help="Send the failing tests back to the model for up to R repair rounds (default: 0)")
+        parser.add_argument("--repair-max-tokens", type=int, default=None,
+                            help="Stop starting repair rounds once the run has used this many tokens")
+        parser.add_argument("--repair-max-seconds", type=float, default=None,
+                            help="Stop starting repair rounds once the run has lasted this many seconds")
+        parser.add_argument("--batch-size", type=int, default=1, metavar="B",
+                            help="Solve B exercises per LLM request, with a shared instruction header; "
+                                 "missing solutions are requested again one by one (default: 1)")
+        parser.add_argument("--java-batch", action="store_true",
+                            help="Run all Java test inputs in a single JVM through a generated harness")
+        parser.add_argument("--js-batch", action="store_true",
+                            help="Run each JavaScript solution in an isolated scope with all test inputs in one call")
+        parser.add_argument("--compile-cache", type=str, default=None, metavar="DIR",
+                            help="Cache compiled Java classes, C/C++ binaries and known compile failures in DIR "
+                                 "(C/C++ binaries are cached in results/compile_cache by default)")
+        parser.add_argument("--compile-cache-size", type=int, default=256,
+                            help="Maximum size of the compile cache in MB (default: 256)")
+        parser.add_argument("--test-timeout", type=float, default=10,
+                            help="Per-test timeout in seconds for batched and pooled executors (default: 10)")
+        parser.add_argument("--workers", type=int, default=0,
+                            help="Number of warm worker processes for Python, JavaScript and Java execution "
+                                 "(default: 0, run in-process)")
+        parser.add_argument("--worker-max-jobs", type=int, default=100,
+                            help="Jobs a worker runs before it is recycled (default: 100)")
+        parser.add_argument("--sandbox", action="store_true",
+                            help="Run Python solutions on isolated worker processes with time and memory limits")
+        parser.add_argument("--memory-limit", type=int, default=512,
+                            help="Address-space limit in MB for sandboxed Python workers (default: 512)")
+        parser.add_argument("--profile", action="store_true",
+                            help="Run every correct Python solution on inputs of growing size and store its "
+                                 "empirical time and memory complexity in the results")
+        parser.add_argument("--profile-budget", type=float, default=10,
+                            help="Seconds of profiling per solution (default: 10)")
+        parser.add_argument("--profile-max-size", type=int, default=1 << 16,
+                            help="Largest input size tried when profiling (default: 65536)")
+        parser.add_argument("--corpus", type=int, default=0, metavar="N",
+                            help="Generate a corpus of N exercises with parallel seeded requests and evaluate "
+                                 "them while they are generated")
+        parser.add_argument("--corpus-concurrency", type=int, default=8,
+                            help="Generation requests in flight in corpus mode (default: 8)")
+        parser.add_argument("--force", action="store_true",
+                            help="Let --corpus overwrite an existing results/generated_exercises.json")
+        parser.add_argument("--store", type=str, default=None, metavar="DB",
+                            help="SQLite exercise store to read exercises from and save generated ones to")
+        parser.add_argument("--import-json", type=str, action="append", default=[], metavar="FILE",
+                            help="Import a generated exercises JSON file into --store and exit (repeatable)")
+        parser.add_argument("--filter", type=str, action="append", default=[], metavar="KEY=VALUE",
+                            help="Only evaluate exercises matching KEY=VALUE, e.g. topic=recursion (repeatable)")
+        parser.add_argument("--limit", type=int, default=None,
+                            help="Evaluate at most this many of the selected exercises")
+        parser.add_argument("--matrix", type=str, default=None, metavar="FILE",
+                            help="JSON file listing providers, models and languages to evaluate together")
+        parser.add_argument("--trace", type=str, nargs="?", const="results/trace.json", default=None, metavar="FILE",
+                            help="Record per-stage timings and token usage, write them as a Chrome trace to FILE "
+                                 "(default: results/trace.json) and print a per-stage summary at the end")
+        parser.add_argument("--shard", type=str, default=None, metavar="i/N",
+                            help="Evaluate only shard i (0-based) of N, split by exercise content hash, and write "
+                                 "the results to a file of that shard; combine the shards with `main.py merge`")
+        parser.add_argument("--deadline", type=float, default=Config.RUN_DEADLINE, metavar="SECONDS",
+                            help="Deadline for the whole run: after it no LLM request is sent, requests in flight "
+                                 "are cancelled and their exercises are reported as timed out (default: "
+                                 "RUN_DEADLINE, or none)")
+        parser.add_argument("--resume", action="store_true",
+                            help="Continue an interrupted run, skipping exercises already in the results sink")
+        parser.add_argument("--warehouse", type=str, default="results/warehouse", metavar="DIR",
+                            help="Append the per-test results of the run to the columnar warehouse in DIR; "
+                                 "query it with `main.py warehouse` (default: results/warehouse)")
+        parser.add_argument("--no-warehouse", action="store_true",
+                            help="Do not append the results of the run to the warehouse")
+        cache_mode = parser.add_mutually_exclusive_group()
+        cache_mode.add_argument("--record", action="store_true",
+                                help="Serve LLM requests from the response cache and store every new response")
+        cache_mode.add_argument("--replay", action="store_true",
+                                help="Answer LLM requests only from the response cache, never the network")
+        parser.add_argument("--cache-dir", type=str, default="results/llm_cache",
+                            help="Directory of the LLM response cache (default: results/llm_cache)")
+        parser.add_argument("--cache-size", type=int, default=512,
+                            help="Maximum size of the LLM response cache in MB (default: 512)")
+        args = parser.parse_args()
+        try:
+            args.filter = dict(item.split("=", 1) for item in args.filter)
+        except ValueError:
+            parser.error("--filter expects KEY=VALUE")
+        unknown = set(args.filter) - set(ExerciseStore.FILTER_COLUMNS)
+        if unknown:
+            parser.error(f"unknown --filter keys: {', '.join(sorted(unknown))} "
+                         f"(use {', '.join(ExerciseStore.FILTER_COLUMNS)})")
+        if args.batch_size > 1 and (args.samples > 1 or args.repair_rounds > 0):
+            parser.error("--batch-size cannot be combined with --samples or --repair-rounds")
+        if args.shard:
+            if args.corpus:
+                parser.error("--shard cannot be combined with --corpus: every shard must see the same exercises")
+            try:
+                args.shard = parse_shard(args.shard)
+            except ValueError as e:
+                parser.error(str(e))
+        return args
+
+    @staticmethod
+    def parse_merge_arguments(argv):
+        parser = argparse.ArgumentParser(prog="main.py merge",
+                                         description="Combine the results files of a sharded run.")
+        parser.add_argument("files", nargs="+", help="Results files written by the shards (*.shard-i-of-N.json)")
+        parser.add_argument("--output", type=str, default="results/output_llm_results.json",
+                            help="Combined results file (default: results/output_llm_results.json)")
+        return parser.parse_args(argv)
+
+    @staticmethod
+    def merge(args):
+        """Combines shard results into the summary format of an unsharded run."""
+        output_manager = OutputManager(args.output)
+        correct_exercises, total_exercises, total_time = output_manager.merge_shards(args.files)
+        output_manager.print_summary(correct_exercises, total_exercises, total_time)
+
+    @staticmethod
+    def parse_warehouse_arguments(argv):
+        from src.warehouse import ResultsWarehouse  # numpy is only loaded when the warehouse is used
+        parser = argparse.ArgumentParser(prog="main.py warehouse",
+                                         description="Query the per-test results of every run in the warehouse.")
+        parser.add_argument("--dir", type=str, default="results/warehouse",
+                            help="Warehouse directory (default: results/warehouse)")
+        commands = parser.add_subparsers(dest="command", required=True)
+        commands.add_parser("runs", help="List the runs in the warehouse")
+        ingest = commands.add_parser("ingest", help="Append results files of earlier runs (.json or .jsonl)")
+        ingest.add_argument("files", nargs="+")
+        ingest.add_argument("--run", type=str, default=None,
+                            help="Run name (default: the modification time of each file)")
+        commands.add_parser("compact", help="Rewrite all the chunks as one, so queries open a single file")
+        queries = {
+            "pass-rate": "Pass rate of tests (or, with --level exercise, of exercises) per group",
+            "latency": "Mean and percentiles of the per-exercise time per group",
+            "regressions": "Exercises passing in --baseline and failing in --candidate, per group"
+        }
+        for name, help_text in queries.items():
+            query = commands.add_parser(name, help=help_text)
+            query.add_argument("--by", type=str, nargs="*", default=[], choices=ResultsWarehouse.DIMENSIONS,
+                               help="Dimensions to group by")
+            query.add_argument("--where", type=str, action="append", default=[], metavar="KEY=VALUE",
+                               help="Only rows with KEY=VALUE, e.g. model=gpt-4 or run=last (repeatable)")
+            query.add_argument("--json", action="store_true", help="Print the rows as JSON")
+        commands.choices["pass-rate"].add_argument("--level", choices=["test", "exercise"], default="test")
+        commands.choices["latency"].add_argument("--percentiles", type=float, nargs="+", default=[50, 95, 99])
+        commands.choices["regressions"].add_argument("--baseline", type=str, default="last~1",
+                                                     help="Baseline run (default: last~1, the run before the last)")
+        commands.choices["regressions"].add_argument("--candidate", type=str, default="last",
+                                                     help="Candidate run (default: last)")
+        args = parser.parse_args(argv)
+        if "where" in args:
+            try:
+                args.where = dict(item.split("=", 1) for item in args.where)
+            except ValueError:
+                parser.error("--where expects KEY=VALUE")
+            unknown = set(args.where) - set(ResultsWarehouse.DIMENSIONS)
+            if unknown:
+                parser.error(f"unknown --where keys: {', '.join(sorted(unknown))}")
+            if not args.where.get("test", "0").isdecimal():
+                parser.error("--where test= expects a test index (0, 1, ...)")
+        runs = [args.where.get("run")] if "where" in args else []
+        for run in runs + [getattr(args, option, None) for option in ("baseline", "candidate")]:
+            if run and run.startswith("last~") and not ResultsWarehouse.RELATIVE_RUN.fullmatch(run):
+                parser.error(f"invalid run {run!r}: expected last or last~N with N a number of runs")
+        if any(not 0 <= percentile <= 100 for percentile in getattr(args, "percentiles", [])):
+            parser.error("--percentiles must be between 0 and 100")
+        return args
+
+    @staticmethod
+    def query_warehouse(args):
+        """Runs one warehouse command and prints its rows."""
+        from src.warehouse import ResultsWarehouse, format_table
+        warehouse = ResultsWarehouse(args.dir)
+        if args.command == "ingest":
+            for path in args.files:
+                rows, run = warehouse.ingest_results_file(path, args.run)
+                print(f"Appended {rows} test records from {path} as run {run}")
+            return
+        if args.command == "compact":
+            print(f"Compacted {warehouse.compact()} chunks into one")
+            return
+        if args.command == "runs":
+            rows = warehouse.runs()
+        elif args.command == "pass-rate":
+            rows = warehouse.pass_rate(args.by, args.where, args.level)
+        elif args.command == "latency":
+            rows = warehouse.latency(args.by, args.where, args.percentiles)
+        else:
+            rows = warehouse.regressions(args.baseline, args.candidate, args.by, args.where)
+        print(json.dumps(rows, indent=2, ensure_ascii=False) if getattr(args, "json", False) else format_table(rows))
+
+    @staticmethod
+    def archive(args, records):
+        """Appends the per-test results of the run to the warehouse."""
+        if args.no_warehouse:
+            return
+        from src.warehouse import ResultsWarehouse
+        run = time.strftime("%Y%m%d-%H%M%S")
+        if args.shard:
+            run += f".shard-{args.shard[0]}-of-{args.shard[1]}"
+        rows, run = ResultsWarehouse(args.warehouse).ingest(records, run)
+        print(f"[Warehouse] {rows} test records of run {run} appended to {args.warehouse}")
 
     @staticmethod
     def run():
+        if sys.argv[1:2] == ["merge"]:
+            Main.merge(Main.parse_merge_arguments(sys.argv[2:]))
+            return
+        if sys.argv[1:2] == ["warehouse"]:
+            Main.query_warehouse(Main.parse_warehouse_arguments(sys.argv[2:]))
+            return
         args = Main.parse_arguments()
+        transport.set_deadline(args.deadline)
         language = args.language
+        if args.trace:
+            tracer.enable()
+        matrix = MatrixRunner.load(args.matrix) if args.matrix else None
+        languages = (matrix.get("languages") or [language]) if matrix else [language]
+        for lang in languages:
+            Main.configure_executors(args, lang)
 
-        output_manager = OutputManager()
+        output_manager = OutputManager(model=Config.EXECUTOR_MODEL, language=language, resume=args.resume,
+                                       shard=args.shard)
         output_manager.pretty_print_startup()
 
-        generator = LLMGenerator(Config.GENERATOR_API_URL, Config.GENERATOR_API_KEY, Config.GENERATOR_MODEL)
+        cache = None
+        if args.record or args.replay:
+            cache = ResponseCache(args.cache_dir, args.cache_size * 1024 * 1024,
+                                  mode="replay" if args.replay else "record")
+
+        if args.import_json and not args.store:
+            output_manager.pretty_print_error("--import-json requires --store")
+            return
+        store = ExerciseStore(args.store) if args.store else None
+        if store and args.import_json:
+            for path in args.import_json:
+                print(f"Imported {store.import_json(path)} new exercises from {path} into {args.store}")
+            return
+
+        generator = LLMGenerator(Config.GENERATOR_API_URL, Config.GENERATOR_API_KEY, Config.GENERATOR_MODEL,
+                                 cache=cache, store=store)
         executor = LLMExecutor(Config.EXECUTOR_API_URL, Config.EXECUTOR_API_KEY, Config.EXECUTOR_MODEL,
-                               language=language)
+                               language=language, cache=cache)
+        executor.stream = args.stream
+        profiler = None
+        if args.profile:
+            profiler = SolutionProfiler(max_size=args.profile_max_size, time_budget=args.profile_budget,
+                                        size_timeout=args.test_timeout,
+                                        memory_limit=args.memory_limit * 1024 * 1024 if args.sandbox else None)
+
+        solver_options = None
+        if args.samples > 1 or args.repair_rounds > 0:
+            solver_options = {"samples": args.samples, "repair_rounds": args.repair_rounds,
+                              "budget": SolveBudget(args.repair_max_tokens, args.repair_max_seconds)}
+        solver = Solver(executor, **solver_options) if solver_options else None
+        batcher = BatchSolver(executor, args.batch_size) if args.batch_size > 1 else None
+
+        if args.corpus and not store and os.path.exists(generator.filename) and not args.force:
+            output_manager.pretty_print_error(f"--corpus would overwrite {generator.filename}: pass --force, "
+                                              "or keep the corpus in an exercise store with --store")
+            return
+        if args.corpus:
+            Main.evaluate_corpus(args, generator, executor, output_manager, profiler, solver, batcher)
+            Main.finish_trace(args)
+            return
+
+        if args.shard and not (store.count() if store else os.path.exists(generator.filename)):
+            output_manager.pretty_print_error("--shard needs the same exercises on every shard: generate them "
+                                              "once and copy them to every machine first")
+            return
+        exercises, total_exercises = Main.load_exercises(args, generator)
+        if matrix:
+            runner = MatrixRunner(matrix, default_language=language, cache=cache, resume=args.resume,
+                                  stream=args.stream, profiler=profiler,
+                                  solver_options=solver_options, batch_size=args.batch_size,
+                                  shard=args.shard)
+            output_manager.print_matrix_summary(asyncio.run(runner.run(exercises)))
+            Main.archive(args, runner.records())
+            output_manager.close()
+            CodeExecutionFactory.shutdown()
+            Main.finish_trace(args)
+            return
 
-        exercises = generator.generate_exercises()
-        total_exercises = len(exercises)
-        correct_exercises = 0
         total_start_time = time.time()
+        pending_exercises = output_manager.skip_completed(exercises)
+
+        if args.concurrency > 1:
+            pipeline = AsyncPipeline(executor, output_manager, concurrency=args.concurrency, profiler=profiler,
+                                     solver=solver, batcher=batcher)
+            correct_exercises = asyncio.run(pipeline.run(pending_exercises))
+        else:
+            correct_exercises = Main.evaluate_sequentially(executor, output_manager, pending_exercises, language,
+                                                           profiler, solver, batcher)
+        correct_exercises += output_manager.resumed_correct
+
+        total_end_time = time.time()
+        total_elapsed_time = total_end_time - total_start_time
+        output_manager.print_summary(correct_exercises, total_exercises, total_elapsed_time)
+        if batcher:
+            output_manager.print_batch_summary(batcher)
+        output_manager.save_summary(correct_exercises, total_exercises, total_elapsed_time)
+        Main.archive(args, output_manager.own_records())
+        output_manager.close()
+        CodeExecutionFactory.shutdown()
+        executor.response_log.close()
+        Main.finish_trace(args)
+
+    @staticmethod
+    def finish_trace(args):
+        """Prints the per-stage summary and writes the Chrome trace when --trace is set."""
+        if not args.trace:
+            return
+        tracer.print_summary()
+        tracer.write_chrome_trace(args.trace)
+        print(f"\nTrace saved in {args.trace} (open it in chrome://tracing or https://ui.perfetto.dev)")
 
-        for exercise in exercises:
+    @staticmethod
+    def load_exercises(args, generator):
+        """
+        Returns the selected exercises and their number. With --store they are read lazily from SQLite
+        (generated first if the store is empty); otherwise they come from the generator's JSON file.
+        """
+        filters = args.filter
+        if not generator.store:
+            exercises = [exercise for exercise in generator.generate_exercises()
+                         if all(str(exercise_hash(exercise) if key == "content_hash" else exercise.get(key)) == value
+                                for key, value in filters.items())]
+            exercises = exercises[:args.limit] if args.limit is not None else exercises
+            if args.shard:
+                exercises = list(Main.select_shard(exercises, args.shard))
+            return exercises, len(exercises)
+
+        store = generator.store
+        if not store.count():
+            generator.generate_exercises()
+        if args.shard:
+            index, count = args.shard
+            total = sum(1 for content_hash in store.iter_hashes(filters, args.limit)
+                        if shard_of(content_hash, count) == index)
+            return Main.select_shard(store.iter_exercises(filters, args.limit), args.shard), total
+        return store.iter_exercises(filters, args.limit), store.count(filters, args.limit)
+
+    @staticmethod
+    def select_shard(exercises, shard):
+        """
+        Yields the exercises of one shard, as copies tagged with their position in the whole selection,
+        so merge can put the results of all the shards back in the order of an unsharded run.
+        """
+        index, count = shard
+        for position, exercise in enumerate(exercises):
+            if shard_of(exercise_hash(exercise), count) == index:
+                yield dict(exercise, position=position)
+
+    @staticmethod
+    def evaluate_corpus(args, generator, executor, output_manager, profiler=None, solver=None, batcher=None):
+        """Generates a corpus in parallel and streams each accepted exercise straight into the pipeline."""
+        total_start_time = time.time()
+        corpus = generator.generate_corpus(args.corpus, concurrency=args.corpus_concurrency)
+        pipeline = AsyncPipeline(executor, output_manager, concurrency=max(args.concurrency, 2), profiler=profiler,
+                                 solver=solver, batcher=batcher)
+        correct_exercises = asyncio.run(pipeline.run(output_manager.skip_completed_async(corpus)))
+        correct_exercises += output_manager.resumed_correct
+        total_exercises = pipeline.total_exercises + output_manager.resumed_total
+
+        total_elapsed_time = time.time() - total_start_time
+        output_manager.print_summary(correct_exercises, total_exercises, total_elapsed_time)
+        if batcher:
+            output_manager.print_batch_summary(batcher)
+        output_manager.save_summary(correct_exercises, total_exercises, total_elapsed_time)
+        Main.archive(args, output_manager.own_records())
+        output_manager.close()
+        CodeExecutionFactory.shutdown()
+        executor.response_log.close()
+
+    @staticmethod
+    def configure_executors(args, language):
+        """Applies the execution options of the command line to one language."""
+        CodeExecutionFactory.configure(language, timeout=args.test_timeout)
+        if language == "java" and args.java_batch:
+            CodeExecutionFactory.configure("java", batch=True)
+        if language == "javascript" and args.js_batch:
+            CodeExecutionFactory.configure("javascript", batch=True)
+        if language in ("java", "c", "cpp") and args.compile_cache:
+            CodeExecutionFactory.configure(language, compile_cache=CompileCache(args.compile_cache,
+                                                                                args.compile_cache_size * 1024 * 1024))
+        if args.sandbox and language == "python":
+            CodeExecutionFactory.use_worker_pool(language, args.workers or None, args.worker_max_jobs,
+                                                 memory_limit=args.memory_limit * 1024 * 1024,
+                                                 cpu_limit=args.test_timeout)
+        elif args.workers > 0 and language in WORKER_CLASSES:
+            CodeExecutionFactory.use_worker_pool(language, args.workers, args.worker_max_jobs)
+
+    @staticmethod
+    def with_batches(exercises, batcher):
+        """
+        Yields (exercise, start_time, solved) for every exercise. With a batcher, `solved` is the
+        (prompt, content) pair from the batch request; otherwise it is None and the exercise is solved alone.
+        """
+        if not batcher:
+            for exercise in exercises:
+                yield exercise, time.time(), None
+            return
+        for batch in batcher.batches(exercises):
             start_time = time.time()
-            prompt = executor.create_prompt(exercise)
+            for exercise, solved in zip(batch, batcher.solve(batch)):
+                yield exercise, start_time, solved
+
+    @staticmethod
+    def evaluate_sequentially(executor, output_manager, exercises, language, profiler=None, solver=None,
+                              batcher=None):
+        """Evaluate the exercises one at a time and return the number of correct ones."""
+        correct_exercises = 0
+        # The candidates of one exercise still run in parallel.
+        pool = ThreadPoolExecutor(max_workers=AsyncPipeline.default_execution_workers(language)) if solver else None
+
+        for exercise, start_time, solved in Main.with_batches(exercises, batcher):
+            prompt = solved[0] if solved else executor.create_prompt(exercise)
             if not prompt:
                 output_manager.pretty_print_warning("No valid exercise!")
                 continue
 
             output_manager.pretty_print_prompt(prompt, exercise["name"])
-            response_data = executor.query_model(prompt)
-            content = extract_solution_code(response_data, language)
+            attempt = None
+            try:
+                if solved:
+                    content = solved[1]
+                elif solver:
+                    attempt = solver.solve(exercise, prompt, pool)
+                    content = {"solution": attempt["solution"]} if attempt else None
+                else:
+                    response_data = executor.query_model(prompt)
+                    content = extract_solution_code(response_data, language)
+            except RequestTimeout as e:
+                content = {"timeout": str(e)}
+            if content and "timeout" in content:
+                output_manager.report_timeout(exercise, content["timeout"], time.time() - start_time)
+                continue
             output_manager.pretty_print_response(content, exercise["name"])
 
             if content and "solution" in content:
                 code = content["solution"]
-                results = CodeExecutionFactory.get_executor(
-                    executor.language, code, exercise["input"], exercise["output"]
-                )
+                if attempt:
+                    results = attempt["test_results"]
+                else:
+                    results = CodeExecutionFactory.get_executor(
+                        executor.language, code, exercise["input"], exercise["output"]
+                    )
                 correct_count = sum(1 for result in results if result.get("success", False))
                 end_time = time.time()
                 elapsed_time = end_time - start_time
 
                 output_manager.pretty_print_result(exercise, code, results, elapsed_time)
-                output_manager.add_result(exercise, code, results, elapsed_time)
+                if attempt:
+                    output_manager.pretty_print_attempt(attempt)
+                profile = None
+                if profiler and correct_count == len(exercise["input"]):
+                    profile = profiler.profile(code, exercise, executor.language)
+                    output_manager.pretty_print_profile(profile)
+                output_manager.add_result(exercise, code, results, elapsed_time, profile, attempt)
 
                 if correct_count == len(exercise["input"]):
                     correct_exercises += 1
@@ -63,10 +501,9 @@ class Main:
                 output_manager.pretty_print_error("No valid solution received from LLM.")
                 continue
 
-        total_end_time = time.time()
-        total_elapsed_time = total_end_time - total_start_time
-        output_manager.print_summary(correct_exercises, total_exercises, total_elapsed_time)
-        output_manager.save_summary(correct_exercises, total_exercises, total_elapsed_time)
+        if pool:
+            pool.shutdown(wait=True)
+        return correct_exercises
 
 if __name__ == "__main__":
     Main.run()
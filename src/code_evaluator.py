@@ -1,17 +1,27 @@
-from pythonmonkey import eval as js_eval
+import importlib
 import tempfile
+import base64
+import hashlib
 import json
+import shutil
 import subprocess
 import os
 import re
 
+from src.compile_cache import toolchain_version
+from src.tracing import tracer
+from src.worker_pool import WORKER_CLASSES, WorkerError, WorkerPool, WorkerTimeout, run_javascript_job
+
 
 class CodeExecutor:
     """Base class for executing code in different programming languages."""
-    def __init__(self, code, test_inputs, expected_outputs):
+    text_output = False  # outputs are read from stdout and compared with the expected value as text
+
+    def __init__(self, code, test_inputs, expected_outputs, **options):
         self.code = code
         self.test_inputs = test_inputs
         self.expected_outputs = expected_outputs
+        self.options = options
         self.results = []
 
     def execute(self):
@@ -23,24 +33,13 @@ class CodeExecutor:
 
         for test_input, expected_output in zip(self.test_inputs, self.expected_outputs):
             try:
-                if isinstance(test_input, (list, tuple)):
-                    output = func(*test_input)
-                else:
-                    output = func(test_input)
-
-                if self.language == "Java":
-                    expected_output_tmp = str(expected_output)
-                    if isinstance(expected_output, bool):
-                        expected_output_tmp = str(expected_output).lower()
+                with tracer.span("test", language=self.language):
+                    if isinstance(test_input, (list, tuple)):
+                        output = func(*test_input)
+                    else:
+                        output = func(test_input)
 
-                    expected_output = expected_output_tmp
-
-                self.results.append({
-                    "input": test_input,
-                    "expected": expected_output,
-                    "output": output,
-                    "success": output == expected_output
-                })
+                self.record_output(test_input, expected_output, output)
             except Exception as e:
                 self.results.append({
                     "input": test_input,
@@ -50,14 +49,33 @@ class CodeExecutor:
 
         return self.results
 
+    def record_output(self, test_input, expected_output, output):
+        """Compares an output with the expected value and records the test result."""
+        if self.text_output:
+            expected_output_tmp = str(expected_output)
+            if isinstance(expected_output, bool):
+                expected_output_tmp = str(expected_output).lower()
+
+            expected_output = expected_output_tmp
+
+        self.results.append({
+            "input": test_input,
+            "expected": expected_output,
+            "output": output,
+            "success": output == expected_output
+        })
+
 
 class PythonExecutor(CodeExecutor):
     """Executes Python code dynamically using exec()."""
-    def __init__(self, code, test_inputs, expected_outputs):
-        super().__init__(code, test_inputs, expected_outputs)
+    def __init__(self, code, test_inputs, expected_outputs, **options):
+        super().__init__(code, test_inputs, expected_outputs, **options)
         self.language = "Python"
 
     def execute(self):
+        if self.options.get("pool"):
+            return self.execute_in_pool(self.options["pool"])
+
         global_scope = {}
         try:
             exec(self.code, global_scope)
@@ -66,14 +84,51 @@ class PythonExecutor(CodeExecutor):
         except Exception as e:
             return [{"error": f"Python execution failed: {str(e)}", "success": False}]
 
+    def execute_in_pool(self, pool):
+        """
+        Runs the test inputs in parallel on isolated worker processes instead of the main interpreter.
+        Each result carries a status: ok, error, timeout, memory_limit or crashed.
+        """
+        timeout = self.options.get("timeout", 10)
+        code_hash = hashlib.sha256(self.code.encode("utf-8")).hexdigest()
+        jobs = [{"code": self.code, "code_hash": code_hash, "input": test_input} for test_input in self.test_inputs]
+        with tracer.span("test.pool", language=self.language, tests=len(jobs)):
+            answers = pool.run_many(jobs, timeout)
+
+        for test_input, expected_output, answer in zip(self.test_inputs, self.expected_outputs, answers):
+            if isinstance(answer, WorkerTimeout):
+                answer = {"status": "timeout", "error": str(answer)}
+            elif isinstance(answer, WorkerError):
+                answer = {"status": "crashed", "error": str(answer)}
+
+            if answer["status"] == "load_error":
+                return [{"error": answer["error"], "success": False}]
+            if answer["status"] == "ok":
+                self.record_output(test_input, expected_output, answer["output"])
+                self.results[-1]["status"] = "ok"
+            else:
+                self.results.append({
+                    "input": test_input,
+                    "error": answer["error"],
+                    "status": answer["status"],
+                    "success": False
+                })
+
+        return self.results
+
 
 class JavaScriptExecutor(CodeExecutor):
     """Executes JavaScript code using PythonMonkey."""
-    def __init__(self, code, test_inputs, expected_outputs):
-        super().__init__(code, test_inputs, expected_outputs)
+    def __init__(self, code, test_inputs, expected_outputs, **options):
+        super().__init__(code, test_inputs, expected_outputs, **options)
         self.language = "JavaScript"
 
     def execute(self):
+        if self.options.get("pool") or self.options.get("batch"):
+            return self.execute_batch(self.options.get("pool"))
+
+        from pythonmonkey import eval as js_eval
+
         try:
             js_eval(self.code)
             function_name = self.code.split("function ")[1].split("(")[0].strip()
@@ -81,52 +136,280 @@ class JavaScriptExecutor(CodeExecutor):
         except Exception as e:
             return [{"error": f"JavaScript execution failed: {str(e)}", "success": False}]
 
+    def execute_batch(self, pool=None):
+        """
+        Evaluates the solution in an isolated scope and runs all test inputs in one JS call.
+        On a worker pool the per-exercise timeout is enforced by killing the worker;
+        in-process it is only checked between test inputs.
+        """
+        timeout = self.options.get("timeout", 10)
+        job = {"code": self.code, "inputs": self.test_inputs, "timeout": timeout}
+        try:
+            with tracer.span("test.batch", language=self.language, tests=len(self.test_inputs)):
+                answers = pool.run(job, timeout + 5) if pool else run_javascript_job(job)
+        except WorkerTimeout as e:
+            answers = [{"status": "timeout", "error": str(e)}] * len(self.test_inputs)
+        except WorkerError as e:
+            answers = [{"status": "crashed", "error": str(e)}] * len(self.test_inputs)
+
+        if answers and answers[0]["status"] == "load_error":
+            return [{"error": answers[0]["error"], "success": False}]
+        for test_input, expected_output, answer in zip(self.test_inputs, self.expected_outputs, answers):
+            if answer["status"] == "ok":
+                self.record_output(test_input, expected_output, answer["output"])
+                self.results[-1]["status"] = "ok"
+            else:
+                self.results.append({
+                    "input": test_input,
+                    "error": answer["error"],
+                    "status": answer["status"],
+                    "success": False
+                })
+
+        return self.results
+
 
 class JavaExecutor(CodeExecutor):
     """Executes Java code by compiling and running it as a subprocess."""
-    def __init__(self, code, test_inputs, expected_outputs):
-        super().__init__(code, test_inputs, expected_outputs)
+    HARNESS_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "java", "CertamenHarness.java")
+    text_output = True
+
+    def __init__(self, code, test_inputs, expected_outputs, **options):
+        super().__init__(code, test_inputs, expected_outputs, **options)
         self.language = "Java"
+        self.batch = options.get("batch", False)
+        self.timeout = options.get("timeout", 10)
 
     def execute(self):
         with tempfile.TemporaryDirectory() as temp_dir:
-            java_file_path = os.path.join(temp_dir, "Solution.java")
-            class_file_path = os.path.join(temp_dir, "Solution.class")
-
-            with open(java_file_path, "w") as f:
-                f.write(self.code)
-
             try:
-                subprocess.run(["javac", java_file_path], check=True, cwd=temp_dir)
+                class_dir = self.compile(temp_dir)
 
                 class_name_match = re.search(r"public\s+class\s+(\w+)", self.code)
                 class_name = class_name_match.group(1) if class_name_match else "Solution"
 
+                if self.options.get("pool"):
+                    return self.execute_in_pool(self.options["pool"], class_dir, class_name)
+                if self.batch:
+                    return self.execute_batch(class_dir, class_name, temp_dir)
+
                 def run_java_program(*input_values):
-                    cmd = ["java", "-cp", temp_dir, class_name] + [str(e) for e in input_values]
-                    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                    return result.stdout.strip()
-                    
+                    cmd = ["java", "-cp", class_dir, class_name] + [str(e) for e in input_values]
                     result = subprocess.run(cmd, capture_output=True, text=True, check=True)
                     return result.stdout.strip()
 
                 return self.execute_function(run_java_program)
 
             except subprocess.CalledProcessError as e:
-                return [{"error": f"Java execution failed: {str(e)}", "success": False}]
+                details = f"\n{e.stderr.strip()}" if e.stderr else ""
+                return [{"error": f"Java execution failed: {str(e)}{details}", "success": False}]
+
+    def compile(self, temp_dir):
+        """
+        Compiles the solution (with the harness in batch mode) and returns the directory of the classes.
+        With a compile cache, known sources are served from it and known failures fail without running javac.
+        """
+        sources = {"Solution.java": self.code}
+        if self.batch:
+            with open(self.HARNESS_SOURCE, "r", encoding="utf-8") as f:
+                sources["CertamenHarness.java"] = f.read()
+
+        cache = self.options.get("compile_cache")
+        cmd = ["javac"] + list(sources)
+        if cache:
+            key = cache.make_key(sources.values(), toolchain_version("javac", "-version"))
+            failure = cache.get_failure(key)
+            if failure is not None:
+                raise subprocess.CalledProcessError(1, cmd, stderr=f"(cached compile failure)\n{failure}")
+            class_dir = cache.get(key)
+            if class_dir:
+                return class_dir
+
+        for name, source in sources.items():
+            with open(os.path.join(temp_dir, name), "w") as f:
+                f.write(source)
+        try:
+            with tracer.span("javac"):
+                subprocess.run(cmd, check=True, cwd=temp_dir, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            if cache:
+                cache.put_failure(key, e.stderr or str(e))
+            raise
+
+        if cache:
+            return cache.put(key, temp_dir, [".class"])
+        return temp_dir
+
+    def execute_batch(self, class_dir, class_name, temp_dir):
+        """Runs every test input in one JVM through the generated harness."""
+        cases_path = os.path.join(temp_dir, "cases.txt")
+        with open(cases_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.encode_cases()) + "\n")
+
+        cmd = ["java", "-cp", class_dir, "CertamenHarness", cases_path, str(int(self.timeout * 1000)), class_name]
+        try:
+            # The per-case timeouts are enforced by the harness; this only guards against a wedged JVM.
+            with tracer.span("test.batch", language=self.language, tests=len(self.test_inputs)):
+                completed = subprocess.run(cmd, capture_output=True, text=True,
+                                           timeout=self.timeout * len(self.test_inputs) + 30)
+            stdout, stderr = completed.stdout, completed.stderr
+        except subprocess.TimeoutExpired as e:
+            stdout = e.stdout.decode("utf-8", "replace") if isinstance(e.stdout, bytes) else (e.stdout or "")
+            stderr = "Java harness timed out"
+
+        cases = self.run_missing(self.parse_harness_output(stdout), class_dir, class_name)
+        return self.record_cases(cases, f"Java harness exited before running this test: {stderr.strip()}")
+
+    def execute_in_pool(self, pool, class_dir, class_name):
+        """Runs every test input on a warm JVM worker, which loads the compiled class from class_dir."""
+        job = {
+            "class_dir": class_dir,
+            "class_name": class_name,
+            "case_timeout": self.timeout,
+            "cases": self.encode_cases()
+        }
+        try:
+            with tracer.span("test.pool", language=self.language, tests=len(self.test_inputs)):
+                cases = pool.run(job, self.timeout * max(1, len(self.test_inputs)) + 5)
+            failure = "Java worker did not run this test"
+        except WorkerError as e:
+            cases = {}
+            failure = f"Java worker failed: {str(e)}"
+        return self.record_cases(self.run_missing(cases, class_dir, class_name), failure)
+
+    def run_missing(self, cases, class_dir, class_name):
+        """
+        Runs the cases the harness did not report, each in its own JVM: the harness stops after the first
+        timeout, and a solution calling System.exit ends it early.
+        """
+        for index, test_input in enumerate(self.test_inputs):
+            if index not in cases:
+                cases[index] = self.run_case_alone(class_dir, class_name, test_input)
+        return cases
+
+    def run_case_alone(self, class_dir, class_name, test_input):
+        """Runs one test input with `java <class> <args>`; returns a harness record."""
+        values = test_input if isinstance(test_input, (list, tuple)) else [test_input]
+        cmd = ["java", "-cp", class_dir, class_name] + [str(e) for e in values]
+        try:
+            with tracer.span("test", language=self.language):
+                completed = subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            return {"status": "timeout", "error": f"Timed out after {self.timeout} seconds"}
+        except OSError as e:
+            return {"status": "error", "error": str(e)}
+        if completed.returncode != 0:
+            return {"status": "error", "error": f"Exited with status {completed.returncode}",
+                    "stderr": completed.stderr}
+        return {"status": "ok", "stdout": completed.stdout, "stderr": completed.stderr}
+
+    def encode_cases(self):
+        """
+        One line per test input with its number of arguments and the Base64 encoded arguments, as read
+        by CertamenHarness; the count keeps a single empty argument apart from no arguments.
+        """
+        lines = []
+        for test_input in self.test_inputs:
+            values = test_input if isinstance(test_input, (list, tuple)) else [test_input]
+            lines.append(" ".join([str(len(values))]
+                                  + [base64.b64encode(str(e).encode("utf-8")).decode("ascii") for e in values]))
+        return lines
+
+    def record_cases(self, cases, failure):
+        """Turns harness records (case index -> record) into test results."""
+        for index, (test_input, expected_output) in enumerate(zip(self.test_inputs, self.expected_outputs)):
+            case = cases.get(index)
+            if case is None:
+                self.results.append({
+                    "input": test_input,
+                    "error": failure,
+                    "status": "error",
+                    "success": False
+                })
+            elif case["status"] != "ok":
+                self.results.append({
+                    "input": test_input,
+                    "error": case.get("error") or case["status"],
+                    "status": case["status"],
+                    "stderr": case.get("stderr", ""),
+                    "success": False
+                })
+            else:
+                self.record_output(test_input, expected_output, case.get("stdout", "").strip())
+                if case.get("stderr"):
+                    self.results[-1]["stderr"] = case["stderr"]
+
+        return self.results
+
+    @staticmethod
+    def parse_harness_output(stdout):
+        """Maps case index to the harness record, skipping anything a runaway case printed."""
+        cases = {}
+        for line in stdout.splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and "case" in record and "status" in record:
+                cases[record["case"]] = record
+        return cases
 
 
 class CodeExecutionFactory:
     """Factory to create the appropriate executor based on language."""
+    # Backend of every language as "module:Class", imported the first time the language is used,
+    # so a run only loads the backends it needs.
     EXECUTOR_CLASSES = {
-        "python": PythonExecutor,
-        "javascript": JavaScriptExecutor,
-        "java": JavaExecutor
+        "python": "src.code_evaluator:PythonExecutor",
+        "javascript": "src.code_evaluator:JavaScriptExecutor",
+        "java": "src.code_evaluator:JavaExecutor",
+        "c": "src.native_executor:CExecutor",
+        "cpp": "src.native_executor:CppExecutor"
     }
 
+    # Per-language executor options, e.g. {"java": {"batch": True}}
+    OPTIONS = {}
+
+    @staticmethod
+    def configure(language, **options):
+        """Sets default options passed to every executor of the given language."""
+        CodeExecutionFactory.OPTIONS.setdefault(language.lower(), {}).update(options)
+
+    @staticmethod
+    def register(language, backend):
+        """Adds or replaces the backend of a language: an executor class or a "module:Class" string."""
+        CodeExecutionFactory.EXECUTOR_CLASSES[language.lower()] = backend
+
+    @staticmethod
+    def executor_class(language):
+        """Returns the executor class of a language, importing its backend on first use, or None."""
+        backend = CodeExecutionFactory.EXECUTOR_CLASSES.get(language.lower())
+        if isinstance(backend, str):
+            module_name, class_name = backend.split(":")
+            backend = getattr(importlib.import_module(module_name), class_name)
+            CodeExecutionFactory.EXECUTOR_CLASSES[language.lower()] = backend
+        return backend
+
+    @staticmethod
+    def use_worker_pool(language, size=None, max_jobs=100, **worker_options):
+        """Routes executions of the given language through a pool of warm, recyclable workers."""
+        pool = WorkerPool(WORKER_CLASSES[language.lower()], size, max_jobs, **worker_options)
+        CodeExecutionFactory.configure(language, pool=pool)
+        return pool
+
+    @staticmethod
+    def shutdown():
+        """Stops every worker pool started by use_worker_pool."""
+        for options in CodeExecutionFactory.OPTIONS.values():
+            pool = options.pop("pool", None)
+            if pool:
+                pool.close()
+
     @staticmethod
-    def get_executor(language, code, test_inputs, expected_outputs):
-        executor_class = CodeExecutionFactory.EXECUTOR_CLASSES.get(language.lower())
+    def get_executor(language, code, test_inputs, expected_outputs, **options):
+        executor_class = CodeExecutionFactory.executor_class(language)
         if not executor_class:
             return [{"error": f"Unsupported language: {language}", "success": False}]
-        return executor_class(code, test_inputs, expected_outputs).execute()
+        options = {**CodeExecutionFactory.OPTIONS.get(language.lower(), {}), **options}
+        with tracer.span("execute", language=language.lower()):
+            return executor_class(code, test_inputs, expected_outputs, **options).execute()
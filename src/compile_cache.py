@@ -0,0 +1,144 @@
+import functools
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+
+@functools.lru_cache(maxsize=None)
+def toolchain_version(*command):
+    """Version banner of a compiler, e.g. toolchain_version("javac", "-version"); part of every cache key."""
+    try:
+        completed = subprocess.run(list(command), capture_output=True, text=True)
+        return (completed.stdout + completed.stderr).strip()
+    except OSError:
+        return "unknown"
+
+
+class CompileCache:
+    """
+    Persistent cache of compiler outputs keyed by a hash of the sources and the toolchain version.
+    Artifacts live in artifacts/<key>/; sources that failed to compile are remembered in
+    failures/<key>.txt so they fail immediately the next time. Both are evicted least-recently-used
+    first once together they take more than max_bytes, except entries used in the last min_age
+    seconds: a path handed out by get() or put() may still be running, in this process or another.
+    """
+    def __init__(self, directory="results/compile_cache", max_bytes=256 * 1024 * 1024, min_age=300):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_age = min_age
+        self.artifacts_dir = os.path.join(directory, "artifacts")
+        self.failures_dir = os.path.join(directory, "failures")
+        self.lock = threading.Lock()
+        os.makedirs(self.artifacts_dir, exist_ok=True)
+        os.makedirs(self.failures_dir, exist_ok=True)
+        self.total_bytes = sum(size for _, size, _ in self.entries())
+
+    @staticmethod
+    def make_key(sources, toolchain):
+        digest = hashlib.sha256(toolchain.encode("utf-8"))
+        for source in sources:
+            digest.update(b"\0" + source.encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def directory_size(path):
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+    def entries(self):
+        """(last use, size, path) of every cached artifact directory and failure record."""
+        for name in os.listdir(self.artifacts_dir):
+            path = os.path.join(self.artifacts_dir, name)
+            if os.path.isdir(path) and not name.startswith("."):
+                yield os.stat(path).st_mtime, self.directory_size(path), path
+        for name in os.listdir(self.failures_dir):
+            path = os.path.join(self.failures_dir, name)
+            if not name.startswith("."):
+                stat = os.stat(path)
+                yield stat.st_mtime, stat.st_size, path
+
+    @staticmethod
+    def touch(path):
+        """Marks the entry as recently used, which protects it from eviction for min_age seconds."""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def get(self, key):
+        """Returns the directory holding the cached artifacts, or None."""
+        path = os.path.join(self.artifacts_dir, key)
+        if not os.path.isdir(path):
+            return None
+        self.touch(path)
+        return path
+
+    def put(self, key, build_dir, extensions):
+        """Copies the files of build_dir with the given extensions into the cache and returns their directory."""
+        path = os.path.join(self.artifacts_dir, key)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.artifacts_dir)
+        for name in os.listdir(build_dir):
+            if name.endswith(tuple(extensions)):
+                shutil.copy2(os.path.join(build_dir, name), staging)
+        size = self.directory_size(staging)
+        with self.lock:
+            try:
+                os.rename(staging, path)
+            except OSError:
+                # Another worker cached the same key first.
+                shutil.rmtree(staging, ignore_errors=True)
+                return path
+            self.total_bytes += size
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+        return path
+
+    def evict(self):
+        """Removes the least recently used entries not used in the last min_age seconds until under max_bytes."""
+        recent = time.time() - self.min_age
+        for last_use, size, path in sorted(self.entries()):
+            if self.total_bytes <= self.max_bytes or last_use > recent:
+                break
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+            self.total_bytes -= size
+
+    def get_failure(self, key):
+        """Returns the compiler error recorded for these sources, or None."""
+        path = os.path.join(self.failures_dir, f"{key}.txt")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                message = f.read()
+        except IOError:
+            return None
+        self.touch(path)
+        return message
+
+    def put_failure(self, key, message):
+        """Records the compiler error; written to a temporary file and renamed, so readers never see half of it."""
+        path = os.path.join(self.failures_dir, f"{key}.txt")
+        fd, staging = tempfile.mkstemp(prefix=".staging-", dir=self.failures_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(message)
+            size = os.path.getsize(staging)
+            with self.lock:
+                replaced = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(staging, path)
+                self.total_bytes += size - replaced
+                if self.total_bytes > self.max_bytes:
+                    self.evict()
+        except OSError:
+            try:
+                os.remove(staging)
+            except OSError:
+                pass
+            raise
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -13,3 +14,22 @@ class Config:
     EXECUTOR_API_KEY = os.getenv("EXECUTOR_API_KEY")
     EXECUTOR_API_URL = os.getenv("EXECUTOR_API_URL")
     EXECUTOR_MODEL = os.getenv("EXECUTOR_MODEL")
+
+    # Executor response log: rotate after this many MB, keep this many rotated files (unset keeps all).
+    RESPONSE_LOG_MAX_MB = int(os.getenv("RESPONSE_LOG_MAX_MB", "64"))
+    RESPONSE_LOG_RETENTION = int(os.getenv("RESPONSE_LOG_RETENTION")) if os.getenv("RESPONSE_LOG_RETENTION") else None
+
+    # Prices in USD per million tokens for the cost report of --trace,
+    # e.g. MODEL_PRICES={"gpt-4o-mini": {"prompt": 0.15, "completion": 0.6}}
+    MODEL_PRICES = json.loads(os.getenv("MODEL_PRICES") or "{}")
+
+    # Shared HTTP transport of the LLM clients: connection pool, HTTP/2 (needs `pip install "httpx[http2]"`),
+    # connect/read timeouts in seconds, SDK retries and an optional deadline in seconds for the whole run.
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    HTTP2 = os.getenv("HTTP2", "").lower() in ("1", "true", "yes")
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "120"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    RUN_DEADLINE = float(os.getenv("RUN_DEADLINE")) if os.getenv("RUN_DEADLINE") else None
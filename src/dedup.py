@@ -0,0 +1,66 @@
+import hashlib
+import random
+import re
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize_text(text):
+    """Lowercases and strips punctuation and extra whitespace, so trivial rewordings hash the same."""
+    return " ".join(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+
+class MinHashDeduplicator:
+    """
+    Detects exact and near-duplicate texts.
+    Exact duplicates are caught by hashing the normalized text; near duplicates by MinHash signatures
+    over word shingles, bucketed with LSH so each check only compares against a few candidates.
+    """
+    def __init__(self, threshold=0.8, num_perm=64, bands=16, shingle_size=3):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        # Fixed seed: signatures must be comparable across instances and runs.
+        seeded = random.Random(1)
+        self.permutations = [(seeded.randrange(1, MERSENNE_PRIME), seeded.randrange(0, MERSENNE_PRIME))
+                             for _ in range(num_perm)]
+        self.exact = set()
+        self.buckets = {}
+        self.signatures = []
+
+    def shingles(self, words):
+        if len(words) < self.shingle_size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, shingles):
+        """MinHash signature: for each of num_perm hash functions (a*x + b) mod p, the minimum over the shingles."""
+        values = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+                  for shingle in shingles]
+        return [min((a * x + b) % MERSENNE_PRIME for x in values) for a, b in self.permutations]
+
+    def is_duplicate(self, text):
+        """Returns True if text duplicates an earlier one; otherwise remembers it and returns False."""
+        normalized = normalize_text(text)
+        exact_key = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        if exact_key in self.exact:
+            return True
+
+        signature = self.signature(self.shingles(normalized.split()))
+        band_keys = [(band, tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
+        candidates = set()
+        for key in band_keys:
+            candidates.update(self.buckets.get(key, ()))
+        for index in candidates:
+            other = self.signatures[index]
+            similarity = sum(1 for a, b in zip(signature, other) if a == b) / self.num_perm
+            if similarity >= self.threshold:
+                return True
+
+        self.exact.add(exact_key)
+        self.signatures.append(signature)
+        for key in band_keys:
+            self.buckets.setdefault(key, []).append(len(self.signatures) - 1)
+        return False
@@ -0,0 +1,117 @@
+import json
+import os
+import sqlite3
+import time
+
+from src.utils import exercise_hash
+
+
+class ExerciseStore:
+    """
+    SQLite exercise store, indexed on content hash, topic, difficulty and creation batch.
+    Exercises are read lazily through iter_exercises, so startup time and memory do not grow with the corpus.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS exercises (
+            id INTEGER PRIMARY KEY,
+            content_hash TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            input TEXT NOT NULL,
+            output TEXT NOT NULL,
+            topic TEXT,
+            difficulty TEXT,
+            batch TEXT,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_exercises_topic ON exercises (topic);
+        CREATE INDEX IF NOT EXISTS idx_exercises_difficulty ON exercises (difficulty);
+        CREATE INDEX IF NOT EXISTS idx_exercises_batch ON exercises (batch);
+    """
+    FILTER_COLUMNS = ("content_hash", "name", "topic", "difficulty", "batch")
+
+    def __init__(self, path="results/exercises.db"):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(self.SCHEMA)
+
+    def add_exercises(self, exercises, batch=None):
+        """Inserts exercises, skipping those already stored; returns how many were added."""
+        created_at = time.time()
+        rows = [(
+            exercise_hash(exercise),
+            exercise["name"],
+            exercise["description"],
+            json.dumps(exercise["input"], ensure_ascii=False),
+            json.dumps(exercise["output"], ensure_ascii=False),
+            exercise.get("topic"),
+            exercise.get("difficulty"),
+            batch,
+            created_at
+        ) for exercise in exercises]
+        with self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO exercises (content_hash, name, description, input, output, topic, "
+                "difficulty, batch, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            return self.connection.total_changes - before
+
+    def import_json(self, path, batch=None):
+        """One-shot import of a generated_exercises.json style file."""
+        with open(path, "r", encoding="utf-8") as f:
+            exercises = json.load(f)
+        return self.add_exercises(exercises, batch=batch or os.path.basename(path))
+
+    def where_clause(self, filters):
+        filters = filters or {}
+        unknown = set(filters) - set(self.FILTER_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown exercise filter(s): {', '.join(sorted(unknown))}; "
+                             f"use {', '.join(self.FILTER_COLUMNS)}")
+        if not filters:
+            return "", []
+        return " WHERE " + " AND ".join(f"{column} = ?" for column in filters), list(filters.values())
+
+    def count(self, filters=None, limit=None):
+        where, params = self.where_clause(filters)
+        (total,) = self.connection.execute(f"SELECT COUNT(*) FROM exercises{where}", params).fetchone()
+        return min(total, limit) if limit is not None else total
+
+    def iter_hashes(self, filters=None, limit=None):
+        """Yields the content hash of the selected exercises, in the order of iter_exercises."""
+        where, params = self.where_clause(filters)
+        query = f"SELECT content_hash FROM exercises{where} ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        for (content_hash,) in self.connection.execute(query, params):
+            yield content_hash
+
+    def iter_exercises(self, filters=None, limit=None, chunk_size=256):
+        """Yields the selected exercises in insertion order, fetching them from SQLite a chunk at a time."""
+        where, params = self.where_clause(filters)
+        query = f"SELECT name, description, input, output, topic, difficulty FROM exercises{where} ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        cursor = self.connection.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for name, description, inputs, outputs, topic, difficulty in rows:
+                exercise = {
+                    "name": name,
+                    "description": description,
+                    "input": json.loads(inputs),
+                    "output": json.loads(outputs)
+                }
+                if topic is not None:
+                    exercise["topic"] = topic
+                if difficulty is not None:
+                    exercise["difficulty"] = difficulty
+                yield exercise
+
+    def close(self):
+        self.connection.close()
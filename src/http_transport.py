@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+import httpx
+import openai
+
+from src.config import Config
+
+
+class RequestTimeout(Exception):
+    """An LLM request that hit its connect/read timeout or the run deadline."""
+
+
+class LoopTransport(httpx.AsyncBaseTransport):
+    """Async connection pool per event loop: pooled connections cannot be shared across loops."""
+    def __init__(self, **options):
+        self.options = options
+        self.pools = weakref.WeakKeyDictionary()
+
+    async def handle_async_request(self, request):
+        loop = asyncio.get_running_loop()
+        pool = self.pools.get(loop)
+        if pool is None:
+            pool = self.pools[loop] = httpx.AsyncHTTPTransport(**self.options)
+        return await pool.handle_async_request(request)
+
+    async def aclose(self):
+        pool = self.pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+class HttpTransport:
+    """
+    HTTP layer shared by every LLM client of the process: one keep-alive connection pool (httpx keeps
+    the connections of each endpoint), optional HTTP/2, connect/read timeouts and SDK retries from
+    Config, and a deadline for the whole run after which no request is sent and requests still in
+    flight are cancelled. Timeouts of either kind are raised as RequestTimeout.
+    """
+    def __init__(self):
+        self.sync_client = None
+        self.async_client = None
+        self.deadline = None  # time.monotonic() at which the run ends
+        self.lock = threading.Lock()
+
+    def set_deadline(self, seconds):
+        self.deadline = time.monotonic() + seconds if seconds else None
+
+    def remaining(self):
+        """Seconds left before the run deadline, or None without one."""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    @staticmethod
+    def timeout(seconds=None):
+        seconds = Config.HTTP_READ_TIMEOUT if seconds is None else seconds
+        return httpx.Timeout(seconds, connect=min(Config.HTTP_CONNECT_TIMEOUT, seconds))
+
+    @staticmethod
+    def pool_options():
+        http2 = Config.HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401  (optional: pip install "httpx[http2]")
+            except ImportError:
+                print("Warning: HTTP2 is set but the h2 package is not installed, using HTTP/1.1.")
+                http2 = False
+        limits = httpx.Limits(max_connections=Config.HTTP_MAX_CONNECTIONS,
+                              max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE,
+                              keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY)
+        return {"limits": limits, "http2": http2}
+
+    def clients(self):
+        """The shared httpx clients, created on first use."""
+        with self.lock:
+            if self.sync_client is None:
+                options = self.pool_options()
+                self.sync_client = httpx.Client(transport=httpx.HTTPTransport(**options),
+                                                timeout=self.timeout(), follow_redirects=True)
+                self.async_client = httpx.AsyncClient(transport=LoopTransport(**options),
+                                                      timeout=self.timeout(), follow_redirects=True)
+            return self.sync_client, self.async_client
+
+    def openai_clients(self, api_url, api_key):
+        """Sync and async OpenAI clients for one endpoint, on the shared connection pools."""
+        sync_client, async_client = self.clients()
+        options = {"base_url": api_url, "api_key": api_key, "timeout": self.timeout(),
+                   "max_retries": Config.LLM_MAX_RETRIES}
+        return (openai.OpenAI(http_client=sync_client, **options),
+                openai.AsyncOpenAI(http_client=async_client, **options))
+
+    def check_deadline(self, message="Run deadline reached, request not sent"):
+        """Seconds left before the run deadline (None without one); raises once it has passed."""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise RequestTimeout(message)
+        return remaining
+
+    def bounded(self, client):
+        """The client with its timeouts cut to what is left of the run; raises once the deadline has passed."""
+        remaining = self.check_deadline()
+        if remaining is None or remaining >= Config.HTTP_READ_TIMEOUT:
+            return client
+        return client.with_options(timeout=self.timeout(remaining))
+
+    @staticmethod
+    def retry_delay(error, attempt):
+        """Seconds to wait before retrying after error, as the SDK would, or None when it is not retried."""
+        if isinstance(error, openai.APIStatusError):
+            if error.status_code not in (408, 409, 429) and error.status_code < 500:
+                return None
+            try:
+                return max(0.0, float(error.response.headers.get("retry-after", "")))
+            except ValueError:
+                pass
+        elif not isinstance(error, openai.APIConnectionError):  # timeouts included
+            return None
+        return min(0.5 * 2 ** attempt, 8.0)
+
+    def call(self, client, request):
+        """
+        Runs request(client) on a sync client. Under a run deadline the SDK's own retries are turned
+        off: every attempt gets at most the time left, the deadline is checked again before each retry,
+        and no retry is made when its backoff would end past the deadline.
+        """
+        if self.deadline is None:
+            return request(client)
+        client = client.with_options(max_retries=0)
+        for attempt in range(Config.LLM_MAX_RETRIES + 1):
+            try:
+                return request(self.bounded(client))
+            except openai.APIError as e:
+                delay = self.retry_delay(e, attempt)
+                if delay is None or attempt == Config.LLM_MAX_RETRIES:
+                    raise
+                remaining = self.remaining()
+                if delay >= remaining:
+                    raise RequestTimeout("Run deadline reached, request not retried") from e
+                time.sleep(delay)
+
+    async def within_deadline(self, awaitable):
+        """Awaits a request, cancelling it when the run deadline passes."""
+        remaining = self.remaining()
+        if remaining is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, max(remaining, 0))
+        except asyncio.TimeoutError:
+            raise RequestTimeout("Run deadline reached, request cancelled") from None
+
+    @contextmanager
+    def timeouts(self):
+        """Turns the timeouts of the SDK and of httpx (e.g. while streaming) into RequestTimeout."""
+        try:
+            yield
+        except (openai.APITimeoutError, httpx.TimeoutException) as e:
+            raise RequestTimeout(f"LLM request timed out: {e}") from e
+
+
+transport = HttpTransport()
@@ -0,0 +1,181 @@
+import java.io.ByteArrayOutputStream;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.io.UnsupportedEncodingException;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Files;
+import java.nio.file.Paths;
+import java.util.Base64;
+import java.util.List;
+import java.util.concurrent.ExecutionException;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+import java.util.concurrent.TimeUnit;
+import java.util.concurrent.TimeoutException;
+
+/**
+ * Runs every test case of a generated solution inside a single JVM.
+ *
+ * Usage: java CertamenHarness <cases file> <timeout ms> <class name>
+ *
+ * Each line of the cases file holds the number of arguments of one test case
+ * followed by the arguments, Base64 encoded, all separated by spaces. For
+ * every case the harness calls the solution's main(String[]) with its own
+ * stdout/stderr capture and timeout, then prints one JSON line on the real
+ * stdout:
+ *
+ *   {"case": 0, "status": "ok|error|timeout", "stdout": "...", "stderr": "...", "error": null}
+ *
+ * System.out and System.err are routed per thread, so a case only ever
+ * captures what its own threads print. The harness stops after the first
+ * timed out case, whose thread may still be running; the caller runs the
+ * remaining cases (and those lost to a System.exit) in a JVM each.
+ */
+public class CertamenHarness {
+    /** Capture streams of the thread running a case, inherited by the threads it starts. */
+    static final InheritableThreadLocal<PrintStream> CASE_OUT = new InheritableThreadLocal<>();
+    static final InheritableThreadLocal<PrintStream> CASE_ERR = new InheritableThreadLocal<>();
+    static final PrintStream REAL_OUT = System.out;
+    static final PrintStream REAL_ERR = System.err;
+
+    static {
+        System.setOut(routed(CASE_OUT, REAL_OUT));
+        System.setErr(routed(CASE_ERR, REAL_ERR));
+    }
+
+    public static void main(String[] args) throws Exception {
+        List<String> lines = Files.readAllLines(Paths.get(args[0]), StandardCharsets.UTF_8);
+        long timeoutMs = Long.parseLong(args[1]);
+        Method entryPoint = Class.forName(args[2]).getMethod("main", String[].class);
+
+        for (int i = 0; i < lines.size(); i++) {
+            String record = runCase(i, entryPoint, decodeArguments(lines.get(i)), timeoutMs);
+            REAL_OUT.println(record);
+            REAL_OUT.flush();
+            if (timedOut(record)) {
+                break;
+            }
+        }
+        // A timed out case may still be spinning on its daemon thread.
+        System.exit(0);
+    }
+
+    /** A stream writing to the capture of the current thread, or to the real stream outside of cases. */
+    static PrintStream routed(ThreadLocal<PrintStream> capture, PrintStream fallback) {
+        OutputStream stream = new OutputStream() {
+            PrintStream target() {
+                PrintStream target = capture.get();
+                return target != null ? target : fallback;
+            }
+
+            @Override
+            public void write(int b) {
+                target().write(b);
+            }
+
+            @Override
+            public void write(byte[] b, int off, int len) {
+                target().write(b, off, len);
+            }
+
+            @Override
+            public void flush() {
+                target().flush();
+            }
+        };
+        try {
+            return new PrintStream(stream, true, "UTF-8");
+        } catch (UnsupportedEncodingException e) {
+            throw new IllegalStateException(e);
+        }
+    }
+
+    static boolean timedOut(String record) {
+        // Quotes inside the captured output are escaped, so only the status field can match.
+        return record.contains(",\"status\":\"timeout\",");
+    }
+
+    /** Runs one test case with its own output capture and timeout and returns its JSON record. */
+    static String runCase(int index, Method entryPoint, String[] caseArgs, long timeoutMs) throws Exception {
+        ByteArrayOutputStream out = new ByteArrayOutputStream();
+        ByteArrayOutputStream err = new ByteArrayOutputStream();
+        PrintStream caseOut = new PrintStream(out, true, "UTF-8");
+        PrintStream caseErr = new PrintStream(err, true, "UTF-8");
+        String status = "ok";
+        String error = null;
+
+        ExecutorService runner = Executors.newSingleThreadExecutor(task -> {
+            Thread thread = new Thread(task);
+            thread.setDaemon(true);
+            return thread;
+        });
+        try {
+            Future<?> future = runner.submit(() -> {
+                CASE_OUT.set(caseOut);
+                CASE_ERR.set(caseErr);
+                entryPoint.invoke(null, (Object) caseArgs);
+                return null;
+            });
+            try {
+                future.get(timeoutMs, TimeUnit.MILLISECONDS);
+            } catch (TimeoutException e) {
+                future.cancel(true);
+                status = "timeout";
+                error = "Timed out after " + timeoutMs + " ms";
+            } catch (ExecutionException e) {
+                Throwable cause = e.getCause();
+                if (cause instanceof InvocationTargetException && cause.getCause() != null) {
+                    cause = cause.getCause();
+                }
+                status = "error";
+                error = String.valueOf(cause);
+            }
+        } finally {
+            runner.shutdownNow();
+        }
+
+        return record(index, status, out.toString("UTF-8"), err.toString("UTF-8"), error);
+    }
+
+    static String record(int index, String status, String stdout, String stderr, String error) {
+        return "{\"case\":" + index
+                + ",\"status\":" + quote(status)
+                + ",\"stdout\":" + quote(stdout)
+                + ",\"stderr\":" + quote(stderr)
+                + ",\"error\":" + (error == null ? "null" : quote(error)) + "}";
+    }
+
+    /** Decodes "<count> <Base64 argument> ..." into the arguments of one case. */
+    static String[] decodeArguments(String line) {
+        String[] fields = line.split(" ", -1);
+        String[] decoded = new String[Integer.parseInt(fields[0])];
+        for (int i = 0; i < decoded.length; i++) {
+            decoded[i] = new String(Base64.getDecoder().decode(fields[i + 1]), StandardCharsets.UTF_8);
+        }
+        return decoded;
+    }
+
+    static String quote(String value) {
+        StringBuilder builder = new StringBuilder("\"");
+        for (int i = 0; i < value.length(); i++) {
+            char c = value.charAt(i);
+            switch (c) {
+                case '"': builder.append("\\\""); break;
+                case '\\': builder.append("\\\\"); break;
+                case '\n': builder.append("\\n"); break;
+                case '\r': builder.append("\\r"); break;
+                case '\t': builder.append("\\t"); break;
+                default:
+                    if (c < 0x20) {
+                        builder.append(String.format("\\u%04x", (int) c));
+                    } else {
+                        builder.append(c);
+                    }
+            }
+        }
+        return builder.append('"').toString();
+    }
+}
@@ -0,0 +1,63 @@
+import java.io.BufferedReader;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.nio.charset.StandardCharsets;
+import java.nio.file.Paths;
+import java.util.ArrayList;
+import java.util.Base64;
+import java.util.List;
+
+/**
+ * Long-lived JVM that evaluates compiled solutions sent over stdin.
+ *
+ * Each job starts with a header line:
+ *
+ *   <Base64 class directory> <class name> <timeout ms> <case count>
+ *
+ * followed by one line per test case in the CertamenHarness format. The
+ * solution is loaded through a fresh class loader, so every job sees its
+ * own classes, and one JSON record per case is written to stdout. As in
+ * CertamenHarness, a job stops after its first timed out case: that case's
+ * thread may still be running, so the caller retires this JVM and runs the
+ * remaining cases elsewhere.
+ */
+public class CertamenWorker {
+    public static void main(String[] args) throws Exception {
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        PrintStream out = System.out;
+        String header;
+        while ((header = in.readLine()) != null) {
+            String[] fields = header.split(" ");
+            String classDir = new String(Base64.getDecoder().decode(fields[0]), StandardCharsets.UTF_8);
+            String className = fields[1];
+            long timeoutMs = Long.parseLong(fields[2]);
+            int count = Integer.parseInt(fields[3]);
+            List<String> cases = new ArrayList<>();
+            for (int i = 0; i < count; i++) {
+                cases.add(in.readLine());
+            }
+
+            URL[] classPath = {Paths.get(classDir).toUri().toURL()};
+            try (URLClassLoader loader = new URLClassLoader(classPath, CertamenWorker.class.getClassLoader())) {
+                Method entryPoint = Class.forName(className, true, loader).getMethod("main", String[].class);
+                for (int i = 0; i < count; i++) {
+                    String record = CertamenHarness.runCase(i, entryPoint,
+                            CertamenHarness.decodeArguments(cases.get(i)), timeoutMs);
+                    out.println(record);
+                    out.flush();
+                    if (CertamenHarness.timedOut(record)) {
+                        break;
+                    }
+                }
+            } catch (Exception | LinkageError e) {
+                for (int i = 0; i < count; i++) {
+                    out.println(CertamenHarness.record(i, "error", "", "", String.valueOf(e)));
+                }
+                out.flush();
+            }
+        }
+    }
+}
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import openai
+from openai.types.chat import ChatCompletion
+
+
+class CacheMiss(openai.OpenAIError):
+    """Raised in replay mode when a request is not in the cache."""
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of chat completions.
+    Entries are keyed by a hash of (endpoint, model, messages, sampling params) and evicted
+    least-recently-used first once the cache grows past max_bytes.
+
+    Modes:
+        record: serve hits from the cache, send misses to the network and store the answers.
+        replay: never touch the network; a miss raises CacheMiss.
+    """
+    def __init__(self, directory="results/llm_cache", max_bytes=512 * 1024 * 1024, mode="record"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.mode = mode
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.total_bytes = sum(os.path.getsize(path) for path in self.entries())
+
+    @staticmethod
+    def make_key(endpoint, params):
+        payload = json.dumps({"endpoint": str(endpoint), **params}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+
+    def get(self, key):
+        """Returns the cached completion as a dict, or None."""
+        path = self.path_for(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, json.JSONDecodeError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        size = os.path.getsize(tmp_path)
+        with self.lock:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            self.total_bytes += size - previous
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        entries = sorted((os.stat(path).st_mtime, os.path.getsize(path), path) for path in self.entries())
+        for _, size, path in entries:
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.total_bytes -= size
+            except OSError:
+                pass
+
+    def lookup(self, endpoint, params):
+        key = self.make_key(endpoint, params)
+        data = self.get(key)
+        if data is None and self.mode == "replay":
+            raise CacheMiss(f"No cached response for request {key[:12]} (replay mode)")
+        return key, data
+
+    def create(self, endpoint, send, **params):
+        """Returns the cached completion for params, or calls send(**params) and caches its answer."""
+        key, data = self.lookup(endpoint, params)
+        if data is None:
+            response = send(**params)
+            self.put(key, response.model_dump(mode="json"))
+            return response
+        return ChatCompletion.model_validate(data)
+
+    async def create_async(self, endpoint, send, **params):
+        """Same as create, for an async send."""
+        key, data = self.lookup(endpoint, params)
+        if data is None:
+            response = await send(**params)
+            self.put(key, response.model_dump(mode="json"))
+            return response
+        return ChatCompletion.model_validate(data)
@@ -1,16 +1,30 @@
 import json
 import openai
 import os
+from types import SimpleNamespace
 from src.config import Config
+from src.http_transport import transport
+from src.response_log import ResponseLog
+from src.stream_parser import SolutionStreamParser
+from src.tracing import tracer
 
 
 class LLMExecutor:
-    def __init__(self, api_url, api_key, model, language="python", debug=False):
+    def __init__(self, api_url, api_key, model, language="python", debug=False, cache=None):
         self.api_key = api_key
         self.model = model
-        self.client = openai.OpenAI(base_url=api_url, api_key=api_key)
+        self.client, self.async_client = transport.openai_clients(api_url, api_key)
         self.language = language
         self.debug = debug  # Check whether to print detailed logs.
+        self.cache = cache  # Optional ResponseCache for record/replay runs.
+        self.limiter = None  # Optional ProviderLimiter shared by every executor of the same provider.
+        self.stream = False  # Stream answers and stop reading once the solution is complete.
+        self.budget = None  # Optional SolveBudget charged with the tokens of every request.
+        self.response_log = ResponseLog(
+            os.path.join("results", f"executor_responses_{language}.jsonl"),
+            max_bytes=Config.RESPONSE_LOG_MAX_MB * 1024 * 1024,
+            retention=Config.RESPONSE_LOG_RETENTION
+        )
 
     # def create_prompt(self, data) -> str:
     #     """Generating a prompt for the LLM with the given data."""
@@ -58,6 +72,7 @@ class LLMExecutor:
         - The function must take as input all required parameters, process them as described, and return ONLY the result (no print, no extra output).
         - If the exercise has more than one argument, ensure the function signature is correct.
         - If the language is Java, include a full class with a static main that reads from args.
+        - If the language is c or cpp, include a main that reads the arguments from standard input and prints the result. Each argument is on its own line: numbers as written, booleans as true/false, a string as its length in bytes, one space and its characters ("5 hello"; read exactly that many bytes, the string may contain spaces), a list as its length followed by its elements separated by spaces ("3 1 2 3", an empty list is "0", nested lists and lists of strings follow the same rules: "2 2 1 2 0", "2 2 ab 1 c"), an object as its number of entries followed by each key and value.
         - DO NOT include any explanation, comments, markdown, triple backticks, or any text outside the JSON.
 
         Exercise: {data['name']}
@@ -72,70 +87,297 @@ class LLMExecutor:
         return ""
 
 
-    def query_model(self, prompt, save_response=True):
+    def create_batch_prompt(self, exercises) -> str:
+        """
+        Generates one prompt for several exercises: the instructions and the template once, then every
+        exercise, answered with a JSON array of solutions keyed by exercise name.
+        """
+        listing = "".join(f"""
+        Exercise: {exercise['name']}
+        Description: {exercise['description']}
+        """ for exercise in exercises)
+        return f"""
+        You are an automatic code generator.
+
+        Task:
+        Solve each of the {len(exercises)} exercises below and return ONLY a valid JSON array with one object per exercise.
+        Do NOT add any comments, markdown, explanations, or extra text.
+
+        Format (STRICT):
+        [
+            {{
+                "exercise": "<EXERCISE NAME, EXACTLY AS GIVEN>",
+                "solution": "<COMPLETE CODE AS A SINGLE STRING>"
+            }}
+        ]
+
+        - Every solution must be valid {self.language} code for a function named 'solution', as shown in the template below.
+        - The function must take as input all required parameters, process them as described, and return ONLY the result (no print, no extra output).
+        - If the exercise has more than one argument, ensure the function signature is correct.
+        - If the language is Java, include a full class with a static main that reads from args.
+        - If the language is c or cpp, include a main that reads the arguments from standard input and prints the result. Each argument is on its own line: numbers as written, booleans as true/false, a string as its length in bytes, one space and its characters ("5 hello"; read exactly that many bytes, the string may contain spaces), a list as its length followed by its elements separated by spaces ("3 1 2 3", an empty list is "0", nested lists and lists of strings follow the same rules: "2 2 1 2 0", "2 2 ab 1 c"), an object as its number of entries followed by each key and value.
+        - DO NOT include any explanation, comments, markdown, triple backticks, or any text outside the JSON.
+        {listing}
+        Template of one solution:
+        {json.dumps(self.generate_function_template())}
+        """
+
+    def query_model(self, prompt, save_response=True, allow_stream=True):
         """Send the request to the LLM and return the response."""
         try:
             if self.debug:
                 print(f"[DEBUG] Sending request to LLM ({self.model})...")
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}]
-            )
+            if self.stream and allow_stream and not self.cache:
+                with tracer.span("llm.query", model=self.model, stream=True):
+                    parser = self.stream_completion(prompt)
+                return self.handle_stream(prompt, parser, save_response)
 
-            # Verify that the answer is valid
-            if not response or not hasattr(response, "choices") or not response.choices:
-                print("Error: LLM response is empty or invalid.")
-                return None
+            with tracer.span("llm.query", model=self.model):
+                response = self.create_completion(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+            return self.handle_response(prompt, response, save_response)
 
-            response_content = response.choices[0].message.content.strip()
+        except openai.OpenAIError as e:
+            print(f"OpenAI API error: {e}")
+            return None
 
-            # Response log only if debug is active
+    async def query_model_async(self, prompt, save_response=True, allow_stream=True):
+        """Same as query_model, but awaits the request so many exercises can be in flight at once."""
+        try:
             if self.debug:
-                print(f"[DEBUG] LLM Response: {response_content}")
+                print(f"[DEBUG] Sending async request to LLM ({self.model})...")
 
-            # Save response only if required
-            if save_response:
-                self.save_response_to_json(prompt, response_content)
+            if self.stream and allow_stream and not self.cache:
+                with tracer.span("llm.query", model=self.model, stream=True):
+                    parser = await self.stream_completion_async(prompt)
+                return self.handle_stream(prompt, parser, save_response)
 
-            return response_content
+            with tracer.span("llm.query", model=self.model):
+                response = await self.create_completion_async(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+            return self.handle_response(prompt, response, save_response)
 
         except openai.OpenAIError as e:
             print(f"OpenAI API error: {e}")
             return None
 
-    def save_response_to_json(self, prompt, response_content):
-        """Save the response of the LLM in a JSON file for each language."""
-        filename = os.path.join("results", f"executor_responses_{self.language}.json")
-        print(f"")
-        response_data = {
-            "prompt": prompt.strip(),
-            "response": response_content
-        }
+    def create_repair_prompt(self, exercise, code, test_results, max_failures=5):
+        """Prompt asking the model to fix its previous solution, given the tests it failed."""
+        failures = []
+        for result in [result for result in test_results if not result.get("success")][:max_failures]:
+            if "input" not in result:
+                failures.append(f"- error: {result.get('error')}")
+            elif "error" in result:
+                failures.append(f"- input: {json.dumps(result.get('input'), default=str)} -> error: {result['error']}")
+            else:
+                failures.append(f"- input: {json.dumps(result.get('input'), default=str)} -> expected: "
+                                f"{json.dumps(result.get('expected'), default=str)}, got: "
+                                f"{json.dumps(result.get('output'), default=str)}")
+        return self.create_prompt(exercise) + f"""
+        Your previous solution was:
+        {code}
 
-        # If the file already exists, search for the existing data
-        if os.path.exists(filename):
-            with open(filename, "r", encoding="utf-8") as f:
-                try:
-                    existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    existing_data = []  # If the file is corrupt, we start from scratch.
-        else:
-            existing_data = []
+        It fails these tests:
+        {chr(10).join(failures)}
 
-        # Adding the new response
-        existing_data.append(response_data)
+        Fix the solution and answer again with the JSON object only.
+        """
 
-        # Limit the number of saved responses to 10
-        if len(existing_data) > 10:
-            existing_data = existing_data[-10:]
+    def query_candidates(self, prompt, samples=1, save_response=True):
+        """Asks for `samples` answers in a single request (n=samples) and returns their texts."""
+        if samples <= 1:
+            response = self.query_model(prompt, save_response)
+            return [response] if response else []
+        try:
+            with tracer.span("llm.query", model=self.model, n=samples):
+                response = self.create_completion(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    n=samples
+                )
+            return self.handle_choices(prompt, response, samples, save_response)
+        except openai.OpenAIError as e:
+            print(f"OpenAI API error: {e}")
+            return []
+
+    async def query_candidates_async(self, prompt, samples=1, save_response=True):
+        if samples <= 1:
+            response = await self.query_model_async(prompt, save_response)
+            return [response] if response else []
+        try:
+            with tracer.span("llm.query", model=self.model, n=samples):
+                response = await self.create_completion_async(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    n=samples
+                )
+            return self.handle_choices(prompt, response, samples, save_response)
+        except openai.OpenAIError as e:
+            print(f"OpenAI API error: {e}")
+            return []
+
+    def handle_choices(self, prompt, response, samples, save_response=True):
+        """Returns the text of every choice of a response; some providers ignore n and send fewer."""
+        if not response or not getattr(response, "choices", None):
+            print("Error: LLM response is empty or invalid.")
+            return []
+        contents = [choice.message.content.strip() for choice in response.choices
+                    if choice.message and choice.message.content]
+        if len(contents) < samples:
+            print(f"Warning: {self.model} returned {len(contents)} of {samples} requested answers.")
+        for content in contents:
+            if self.debug:
+                print(f"[DEBUG] LLM Response: {content}")
+            if save_response:
+                self.save_response_to_json(prompt, content)
+        return contents
 
-        # Write the updated data in the JSON file
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, indent=4, ensure_ascii=False)
+    def record_usage(self, usage):
+        tracer.record_usage(self.model, usage)
+        if self.budget:
+            self.budget.charge(usage)
+
+    def create_completion(self, **params):
+        """Chat completion request, served from the response cache when one is configured."""
+        if self.cache:
+            return self.cache.create(self.client.base_url, self.send, **params)
+        return self.send(**params)
+
+    def send(self, **params):
+        """Sends the request and records its token usage; cache hits never get here."""
+        with transport.timeouts():
+            response = transport.call(self.client, lambda client: client.chat.completions.create(**params))
+        self.record_usage(getattr(response, "usage", None))
+        return response
+
+    async def create_completion_async(self, **params):
+        if self.cache:
+            return await self.cache.create_async(self.async_client.base_url, self.send_async, **params)
+        return await self.send_async(**params)
+
+    async def send_async(self, **params):
+        """
+        Sends the request, through the provider's rate limiter when one is set; the wait for the limiter
+        and its retries count towards the run deadline too.
+        """
+        with transport.timeouts():
+            client = transport.bounded(self.async_client)
+            if self.limiter:
+                response = await transport.within_deadline(
+                    self.limiter.call(lambda: client.chat.completions.create(**params)))
+            else:
+                response = await transport.within_deadline(client.chat.completions.create(**params))
+        self.record_usage(getattr(response, "usage", None))
+        return response
+
+    def stream_completion(self, prompt):
+        """
+        Streams the answer through a SolutionStreamParser and closes the stream as soon as the
+        solution string is complete or can no longer come, so the rest is neither awaited nor paid for.
+        """
+        parser = SolutionStreamParser()
+        stream = self.send(model=self.model, messages=[{"role": "user", "content": prompt}], stream=True,
+                           stream_options={"include_usage": True})
+        try:
+            with transport.timeouts():
+                for chunk in stream:
+                    if self.read_chunk(parser, chunk):
+                        break
+                    transport.check_deadline("Run deadline reached, stream closed")
+        finally:
+            stream.close()
+            self.record_stream_usage(prompt, parser)
+        return parser
+
+    async def stream_completion_async(self, prompt):
+        parser = SolutionStreamParser()
+        stream = await self.send_async(model=self.model, messages=[{"role": "user", "content": prompt}], stream=True,
+                                       stream_options={"include_usage": True})
+        try:
+            with transport.timeouts():
+                await transport.within_deadline(self.read_stream(parser, stream))
+        finally:
+            await stream.close()
+            self.record_stream_usage(prompt, parser)
+        return parser
+
+    async def read_stream(self, parser, stream):
+        async for chunk in stream:
+            if self.read_chunk(parser, chunk):
+                break
+
+    @staticmethod
+    def read_chunk(parser, chunk):
+        """
+        Feeds one stream chunk to the parser; returns True when the rest of the stream is not needed.
+        The usage chunk (stream_options include_usage) comes last and has no choices.
+        """
+        if getattr(chunk, "usage", None) is not None:
+            parser.usage = chunk.usage
+        if not chunk.choices:
+            return False
+        return parser.feed(chunk.choices[0].delta.content)
+
+    def record_stream_usage(self, prompt, parser):
+        """
+        Records the usage chunk of the stream. A stream closed before it arrived is charged an estimate
+        of four characters per token, so token budgets and costs still count the request.
+        """
+        usage = parser.usage
+        if usage is None:
+            prompt_tokens = -(-len(prompt) // 4)
+            completion_tokens = -(-len(parser.text) // 4)
+            usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                    total_tokens=prompt_tokens + completion_tokens)
+        self.record_usage(usage)
+
+    def handle_stream(self, prompt, parser, save_response=True):
+        """Logs what was streamed and returns the answer, reduced to the solution when it was found."""
+        if not parser.text.strip():
+            print("Error: LLM response is empty or invalid.")
+            return None
+        if parser.state == "invalid":
+            print("Error: LLM response stream was cut off, no valid solution could follow.")
+
+        if self.debug:
+            print(f"[DEBUG] LLM Response ({parser.state}): {parser.text}")
+        if save_response:
+            self.save_response_to_json(prompt, parser.text.strip())
+        return parser.result()
+
+    def handle_response(self, prompt, response, save_response=True):
+        """Validate an LLM response, log it and return its text content."""
+        # Verify that the answer is valid
+        if not response or not hasattr(response, "choices") or not response.choices:
+            print("Error: LLM response is empty or invalid.")
+            return None
+
+        response_content = response.choices[0].message.content.strip()
+
+        # Response log only if debug is active
+        if self.debug:
+            print(f"[DEBUG] LLM Response: {response_content}")
+
+        # Save response only if required
+        if save_response:
+            self.save_response_to_json(prompt, response_content)
+
+        return response_content
+
+    def save_response_to_json(self, prompt, response_content):
+        """Append the response of the LLM to the JSONL response log of the language."""
+        self.response_log.append({
+            "prompt": prompt.strip(),
+            "response": response_content
+        })
 
         if self.debug:
-            print(f"[DEBUG] Executor response saved in {filename}")
+            print(f"[DEBUG] Executor response saved in {self.response_log.path}")
 
     def generate_function_template(self):
         """Generates a function template for the selected programming language."""
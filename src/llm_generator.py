@@ -1,37 +1,89 @@
+import asyncio
 import json
 import json5
 import openai
 import os
 import re
+import time
 from src.config import Config
+from src.dedup import MinHashDeduplicator
+from src.http_transport import RequestTimeout, transport
+from src.tracing import tracer
 
 
 class LLMGenerator:
-    def __init__(self, api_url, api_key, model, filename="results/generated_exercises.json"):
+    # Seeds spread corpus generation across concepts and difficulty levels.
+    TOPICS = ["loops", "recursion", "strings", "lists", "dictionaries", "sorting", "searching", "math",
+              "dynamic programming", "graphs", "bit manipulation", "stacks and queues"]
+    DIFFICULTIES = ["easy", "medium", "hard"]
+
+    def __init__(self, api_url, api_key, model, filename="results/generated_exercises.json", cache=None,
+                 store=None):
         self.api_key = api_key
         self.model = model
-        self.client = openai.OpenAI(base_url=api_url, api_key=api_key)
+        self.client, self.async_client = transport.openai_clients(api_url, api_key)
         self.filename = filename
+        self.cache = cache  # Optional ResponseCache for record/replay runs.
+        self.store = store  # Optional ExerciseStore that replaces the JSON file.
 
     def generate_exercises(self, force_regenerate=False):
         """Generates a list of programming exercises using OpenAI and saves them in a JSON file."""
 
         # If the file exists, and we don't want to regenerate, we read the existing data.
-        if not force_regenerate and os.path.exists(self.filename):
+        if not force_regenerate and self.store and self.store.count():
+            print(f"Loading exercises from {self.store.path}")
+            return list(self.store.iter_exercises())
+        if not force_regenerate and not self.store and os.path.exists(self.filename):
             print(f"Loading exercises from {self.filename}")
             return self.load_exercises_from_json()
 
+        prompt = self.build_prompt()
+
+        try:
+            print(f"Generating exercises using {self.model} ...")
+            response = self.create_completion(
+                model=self.model,
+                messages=[{"role": "system", "content": prompt}]
+            )
+
+            # Valid response control
+            if not response or not hasattr(response, "choices") or not response.choices:
+                print("Error: LLM response is empty or invalid.")
+                return []
+
+            raw_response = response.choices[0].message.content.strip()
+            exercises = self.clean_and_validate_json(raw_response)
+
+            if exercises:
+                self.save_exercises(exercises)
+
+            return exercises if exercises else []
+
+        except (openai.OpenAIError, RequestTimeout) as e:
+            print(f"OpenAI API error: {e}")
+            return []
+
+    @staticmethod
+    def build_prompt(count=10, topic=None, difficulty=None):
+        """Prompt for generating `count` exercises, optionally seeded with a topic and a difficulty."""
+        seed = ""
+        if topic or difficulty:
+            seed = f"""
+        ### Focus:
+        All exercises must be about **{topic or "any programming concept"}** with **{difficulty or "mixed"}** difficulty.
+        """
+
         # Prompt for generating the exercises
-        prompt = """
-        Generate a list of 10 programming exercises in JSON format. Each exercise must strictly follow this structure:
+        prompt = f"""
+        Generate a list of {count} programming exercises in JSON format. Each exercise must strictly follow this structure:
 
         [
-            {
+            {{
                 "name": "<A concise and clear title for the exercise>",
                 "description": "<A detailed description of the exercise, specifying exactly what needs to be implemented>",
                 "input": [<A list of example inputs of the correct type that will be used to test the solution>],
                 "output": [<A list of expected outputs of the correct type corresponding to each input>]
-            }
+            }}
         ]
 
         ### Constraints:
@@ -48,31 +100,127 @@ class LLMGenerator:
         5. Ensure diverse exercises covering different programming concepts such as **loops, recursion, data structures, and algorithms**.
         6. The **JSON output must be properly formatted and valid**.
         """
+        return prompt + seed
+
+    async def generate_corpus(self, total, batch_size=10, concurrency=8, topics=None, difficulties=None,
+                              max_requests=None):
+        """
+        Async generator of up to `total` exercises, sending many seeded generation requests in parallel.
+        Each batch is validated as soon as it arrives; exercises whose input and output lengths differ
+        and near-duplicates of earlier descriptions are dropped. Accepted exercises are yielded right away,
+        so evaluation can start while later batches are still being generated. A batch that fails for any
+        reason is logged and counted, and generation goes on.
+        """
+        topics = topics or self.TOPICS
+        difficulties = difficulties or self.DIFFICULTIES
+        seeds = [(topic, difficulty) for difficulty in difficulties for topic in topics]
+        max_requests = max_requests or 2 * (total // batch_size + 1)
+        deduplicator = MinHashDeduplicator()
+        accepted, rejected, duplicates, failed, requests_sent = [], 0, 0, 0, 0
+        batch = f"corpus-{time.strftime('%Y%m%dT%H%M%S')}"
+        in_flight = set()
 
         try:
-            print(f"Generating exercises using {self.model} ...")
-            response = self.client.chat.completions.create(
+            while len(accepted) < total and (in_flight or requests_sent < max_requests):
+                while len(in_flight) < concurrency and requests_sent < max_requests:
+                    topic, difficulty = seeds[requests_sent % len(seeds)]
+                    in_flight.add(asyncio.create_task(self.generate_batch(batch_size, topic, difficulty)))
+                    requests_sent += 1
+
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is not None:
+                        print(f"Corpus batch failed: {error!r}")
+                    exercises = task.result() if error is None else None
+                    if exercises is None:
+                        failed += 1
+                        continue
+                    for exercise in exercises:
+                        if len(accepted) >= total:
+                            break
+                        if not self.is_valid_exercise(exercise):
+                            rejected += 1
+                        elif deduplicator.is_duplicate(exercise["description"]):
+                            duplicates += 1
+                        else:
+                            accepted.append(exercise)
+                            if self.store:
+                                self.store.add_exercises([exercise], batch=batch)
+                            yield exercise
+        finally:
+            for task in in_flight:
+                task.cancel()
+            print(f"Corpus: {len(accepted)} exercises accepted, {rejected} invalid, {duplicates} duplicates "
+                  f"from {requests_sent} requests ({failed} failed)")
+            if accepted and not self.store:
+                self.save_exercises_to_json(accepted)
+
+    async def generate_batch(self, count, topic, difficulty):
+        """One generation request; returns the parsed exercises tagged with their seed, or None when it failed."""
+        try:
+            response = await self.create_completion_async(
                 model=self.model,
-                messages=[{"role": "system", "content": prompt}]
+                messages=[{"role": "system", "content": self.build_prompt(count, topic, difficulty)}]
             )
+            content = response.choices[0].message.content if response and response.choices else None
+            if content is None:
+                print(f"Corpus batch ({topic}, {difficulty}) failed: empty response")
+                return None
+            exercises = self.clean_and_validate_json(content.strip())
+        except (openai.OpenAIError, RequestTimeout, ValueError) as e:
+            print(f"Corpus batch ({topic}, {difficulty}) failed: {e}")
+            return None
+        if not isinstance(exercises, list):
+            return None
+        for exercise in exercises:
+            if isinstance(exercise, dict):
+                exercise.setdefault("topic", topic)
+                exercise.setdefault("difficulty", difficulty)
+        return exercises
 
-            # Valid response control
-            if not response or not hasattr(response, "choices") or not response.choices:
-                print("Error: LLM response is empty or invalid.")
-                return []
-
-            raw_response = response.choices[0].message.content.strip()
-            exercises = self.clean_and_validate_json(raw_response)
-
-            if exercises:
-                self.save_exercises_to_json(exercises)  # We save exercises in JSON
-                print(f"Exercises saved in {self.filename}")
-
-            return exercises if exercises else []
-
-        except openai.OpenAIError as e:
-            print(f"OpenAI API error: {e}")
-            return []
+    @staticmethod
+    def is_valid_exercise(exercise):
+        """An exercise needs a name, a description and as many inputs as outputs."""
+        return (isinstance(exercise, dict)
+                and isinstance(exercise.get("name"), str) and exercise["name"].strip()
+                and isinstance(exercise.get("description"), str) and exercise["description"].strip()
+                and isinstance(exercise.get("input"), list) and isinstance(exercise.get("output"), list)
+                and len(exercise["input"]) > 0 and len(exercise["input"]) == len(exercise["output"]))
+
+    def create_completion(self, **params):
+        """Chat completion request, served from the response cache when one is configured."""
+        if self.cache:
+            return self.cache.create(self.client.base_url, self.send, **params)
+        return self.send(**params)
+
+    async def create_completion_async(self, **params):
+        if self.cache:
+            return await self.cache.create_async(self.async_client.base_url, self.send_async, **params)
+        return await self.send_async(**params)
+
+    def send(self, **params):
+        """Sends the request and records its token usage; cache hits never get here."""
+        with tracer.span("llm.generate", model=self.model), transport.timeouts():
+            response = transport.call(self.client, lambda client: client.chat.completions.create(**params))
+        tracer.record_usage(self.model, getattr(response, "usage", None))
+        return response
+
+    async def send_async(self, **params):
+        with tracer.span("llm.generate", model=self.model), transport.timeouts():
+            response = await transport.within_deadline(
+                transport.bounded(self.async_client).chat.completions.create(**params))
+        tracer.record_usage(self.model, getattr(response, "usage", None))
+        return response
+
+    def save_exercises(self, exercises):
+        """Save the exercises in the exercise store if there is one, otherwise in the JSON file."""
+        if self.store:
+            added = self.store.add_exercises(exercises, batch=f"generated-{time.strftime('%Y%m%dT%H%M%S')}")
+            print(f"{added} new exercises saved in {self.store.path}")
+        else:
+            self.save_exercises_to_json(exercises)  # We save exercises in JSON
+            print(f"Exercises saved in {self.filename}")
 
     def save_exercises_to_json(self, exercises):
         """Save the exercises in a JSON file."""
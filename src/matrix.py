@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+from src.code_evaluator import CodeExecutionFactory
+from src.llm_executor import LLMExecutor
+from src.output_manager import OutputManager
+from src.pipeline import AsyncPipeline
+from src.solver import BatchSolver, Solver
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`."""
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ProviderLimiter:
+    """
+    Shared by every executor talking to one provider: a token bucket for the request rate, a cap on
+    requests in flight, and exponential-backoff retries for 429s, 5xx errors and dropped connections.
+    """
+    RETRYABLE_ERRORS = (openai.RateLimitError, openai.InternalServerError,
+                        openai.APIConnectionError, openai.APITimeoutError)
+
+    def __init__(self, requests_per_minute=60, max_concurrency=4, max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.bucket = TokenBucket(requests_per_minute / 60.0, capacity=max(1, max_concurrency))
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    async def call(self, request):
+        """Awaits request() within the provider limits, retrying transient failures."""
+        attempt = 0
+        while True:
+            await self.bucket.acquire()
+            async with self.slots:
+                try:
+                    return await request()
+                except self.RETRYABLE_ERRORS as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self.retry_delay(e, attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def retry_delay(self, error, attempt):
+        """Honours Retry-After when the provider sends it, otherwise backs off exponentially with jitter."""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return min(self.max_delay, float(retry_after))
+        except (TypeError, ValueError):
+            return min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class MatrixRunner:
+    """
+    Evaluates every (exercise x model x language) job in one event loop.
+    Each (model, language) pair gets its own pipeline and results files; the pipelines of one provider
+    share a ProviderLimiter, so every provider's quota is used without serializing on the slowest model.
+
+    The matrix file is JSON:
+        {
+            "languages": ["python", "javascript"],
+            "providers": [
+                {"api_url": "https://openrouter.ai/api/v1/", "api_key_env": "EXECUTOR_API_KEY",
+                 "models": ["deepseek/deepseek-r1:free"],
+                 "requests_per_minute": 20, "max_concurrency": 4}
+            ]
+        }
+    """
+    def __init__(self, matrix, default_language="python", cache=None, resume=False, stream=False, profiler=None,
+                 solver_options=None, batch_size=1, shard=None):
+        self.providers = matrix.get("providers", [])
+        self.languages = matrix.get("languages") or [default_language]
+        self.cache = cache
+        self.resume = resume
+        self.stream = stream
+        self.profiler = profiler
+        self.solver_options = solver_options  # Solver arguments (samples, repair_rounds, budget), if any
+        self.batch_size = batch_size
+        self.shard = shard  # (index, count) when evaluating one shard of the exercises
+        self.output_managers = []
+
+    @staticmethod
+    def load(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def results_file(model, language):
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model)
+        return os.path.join("results", f"output_llm_results_{slug}_{language}.json")
+
+    async def run(self, exercises):
+        """Runs the whole matrix and returns {(model, language): (correct, total, elapsed)}."""
+        exercises = list(exercises)
+        # In-process JavaScript shares one SpiderMonkey runtime, so all its pipelines share a single thread.
+        execution_pools = {}
+        for language in self.languages:
+            in_process_js = language == "javascript" and not CodeExecutionFactory.OPTIONS.get(language, {}).get("pool")
+            execution_pools[language] = ThreadPoolExecutor(max_workers=1 if in_process_js else (os.cpu_count() or 1))
+
+        jobs = []
+        for provider in self.providers:
+            limiter = ProviderLimiter(provider.get("requests_per_minute", 60), provider.get("max_concurrency", 4),
+                                      provider.get("max_retries", 5))
+            api_key = provider.get("api_key") or os.getenv(provider.get("api_key_env", "EXECUTOR_API_KEY"))
+            for model in provider["models"]:
+                for language in self.languages:
+                    executor = LLMExecutor(provider["api_url"], api_key, model, language=language, cache=self.cache)
+                    executor.limiter = limiter
+                    executor.stream = self.stream
+                    # The limiter retries, so the SDK's own hidden retries are turned off.
+                    executor.async_client = executor.async_client.with_options(max_retries=0)
+                    output_manager = OutputManager(self.results_file(model, language), model=model,
+                                                   language=language, resume=self.resume, shard=self.shard)
+                    pipeline = AsyncPipeline(executor, output_manager,
+                                             concurrency=provider.get("max_concurrency", 4) * 2,
+                                             execution_pool=execution_pools[language],
+                                             profiler=self.profiler,
+                                             solver=Solver(executor, **self.solver_options)
+                                             if self.solver_options else None,
+                                             batcher=BatchSolver(executor, self.batch_size)
+                                             if self.batch_size > 1 else None)
+                    jobs.append(((model, language), output_manager, pipeline))
+                    self.output_managers.append(output_manager)
+
+        try:
+            summaries = await asyncio.gather(*(self.run_job(output_manager, pipeline, exercises)
+                                               for _, output_manager, pipeline in jobs))
+        finally:
+            for pool in execution_pools.values():
+                pool.shutdown(wait=True)
+        return {key: summary for (key, _, _), summary in zip(jobs, summaries)}
+
+    def records(self):
+        """The result records of every model and language of the last run."""
+        for output_manager in self.output_managers:
+            yield from output_manager.own_records()
+
+    @staticmethod
+    async def run_job(output_manager, pipeline, exercises):
+        start_time = time.time()
+        correct = await pipeline.run(output_manager.skip_completed(exercises))
+        correct += output_manager.resumed_correct
+        elapsed = time.time() - start_time
+        output_manager.save_summary(correct, len(exercises), elapsed)
+        output_manager.close()
+        return correct, len(exercises), elapsed
@@ -0,0 +1,152 @@
+import os
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.code_evaluator import CodeExecutor
+from src.compile_cache import CompileCache, toolchain_version
+from src.tracing import tracer
+
+
+class NativeExecutor(CodeExecutor):
+    """
+    Compiles a C or C++ solution once and runs its test inputs in parallel, each as a separate process
+    fed through stdin in the format of encode_stdin.
+    Binaries are cached by a hash of the source, the flags and the compiler version, in the
+    configured compile cache or, without one, in results/compile_cache.
+    """
+    COMPILER = None
+    SOURCE_NAME = None
+    FLAGS = []
+    LIBRARIES = []
+    BINARY_NAME = "solution.bin"
+    text_output = True
+
+    default_cache = None
+    default_cache_lock = threading.Lock()
+
+    def __init__(self, code, test_inputs, expected_outputs, **options):
+        super().__init__(code, test_inputs, expected_outputs, **options)
+        self.timeout = options.get("timeout", 10)
+
+    @staticmethod
+    def compile_cache(options):
+        if options.get("compile_cache"):
+            return options["compile_cache"]
+        with NativeExecutor.default_cache_lock:
+            if NativeExecutor.default_cache is None:
+                NativeExecutor.default_cache = CompileCache()
+            return NativeExecutor.default_cache
+
+    def execute(self):
+        try:
+            binary = self.compile()
+        except subprocess.CalledProcessError as e:
+            details = f"\n{e.stderr.strip()}" if e.stderr else ""
+            return [{"error": f"{self.language} compilation failed{details}", "success": False}]
+        except OSError as e:
+            return [{"error": f"{self.language} compiler not available: {str(e)}", "success": False}]
+
+        workers = max(1, min(len(self.test_inputs), os.cpu_count() or 1))
+        with tracer.span("test.batch", language=self.language, tests=len(self.test_inputs)):
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                answers = list(pool.map(lambda test_input: self.run_test(binary, test_input), self.test_inputs))
+
+        for test_input, expected_output, answer in zip(self.test_inputs, self.expected_outputs, answers):
+            if answer["status"] == "ok":
+                self.record_output(test_input, expected_output, answer["stdout"].strip())
+                self.results[-1]["status"] = "ok"
+            else:
+                self.results.append({
+                    "input": test_input,
+                    "error": answer["error"],
+                    "status": answer["status"],
+                    "success": False
+                })
+        return self.results
+
+    def compile(self):
+        """Returns the path of the compiled binary, compiling only sources not yet in the cache."""
+        cache = self.compile_cache(self.options)
+        cmd = [self.COMPILER] + self.FLAGS + ["-o", self.BINARY_NAME, self.SOURCE_NAME] + self.LIBRARIES
+        key = cache.make_key([self.code, " ".join(cmd)], toolchain_version(self.COMPILER, "--version"))
+        failure = cache.get_failure(key)
+        if failure is not None:
+            raise subprocess.CalledProcessError(1, cmd, stderr=f"(cached compile failure)\n{failure}")
+        cached = cache.get(key)
+        if cached:
+            return os.path.join(cached, self.BINARY_NAME)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, self.SOURCE_NAME), "w", encoding="utf-8") as f:
+                f.write(self.code)
+            try:
+                with tracer.span(self.COMPILER):
+                    subprocess.run(cmd, check=True, cwd=temp_dir, capture_output=True, text=True)
+            except subprocess.CalledProcessError as e:
+                cache.put_failure(key, e.stderr or str(e))
+                raise
+            return os.path.join(cache.put(key, temp_dir, [self.BINARY_NAME]), self.BINARY_NAME)
+
+    @staticmethod
+    def encode_stdin(test_input):
+        """
+        One line per argument, with every length given up front so the input parses the same way
+        whatever it contains: numbers as written, booleans as true/false, a string as its length in
+        UTF-8 bytes, a space and its bytes ("5 hello"), a list as its length followed by its elements
+        separated by spaces ("3 1 2 3", nested: "2 2 1 2 0"), a dict as its number of entries followed
+        by each key and value.
+        """
+        values = test_input if isinstance(test_input, (list, tuple)) else [test_input]
+
+        def encode(value):
+            if isinstance(value, bool):
+                return str(value).lower()
+            if isinstance(value, str):
+                return f"{len(value.encode('utf-8'))} {value}"
+            if isinstance(value, (list, tuple)):
+                return " ".join([str(len(value))] + [encode(item) for item in value])
+            if isinstance(value, dict):
+                return " ".join([str(len(value))] + [encode(item) for pair in value.items() for item in pair])
+            return str(value)
+
+        return "\n".join(encode(value) for value in values) + "\n"
+
+    def run_test(self, binary, test_input):
+        try:
+            with tracer.span("test", language=self.language):
+                completed = subprocess.run([binary], input=self.encode_stdin(test_input), capture_output=True,
+                                           text=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            return {"status": "timeout", "error": f"Timed out after {self.timeout} seconds"}
+        except OSError as e:
+            return {"status": "error", "error": str(e)}
+        if completed.returncode != 0:
+            stderr = completed.stderr.strip()
+            return {"status": "error",
+                    "error": f"Exited with status {completed.returncode}" + (f": {stderr}" if stderr else "")}
+        return {"status": "ok", "stdout": completed.stdout}
+
+
+class CExecutor(NativeExecutor):
+    """Compiles C solutions with gcc."""
+    COMPILER = "gcc"
+    SOURCE_NAME = "solution.c"
+    FLAGS = ["-O2"]
+    LIBRARIES = ["-lm"]
+
+    def __init__(self, code, test_inputs, expected_outputs, **options):
+        super().__init__(code, test_inputs, expected_outputs, **options)
+        self.language = "C"
+
+
+class CppExecutor(NativeExecutor):
+    """Compiles C++ solutions with g++."""
+    COMPILER = "g++"
+    SOURCE_NAME = "solution.cpp"
+    FLAGS = ["-O2", "-std=c++17"]
+
+    def __init__(self, code, test_inputs, expected_outputs, **options):
+        super().__init__(code, test_inputs, expected_outputs, **options)
+        self.language = "C++"
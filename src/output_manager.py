@@ -1,12 +1,107 @@
 from colorama import init, Fore, Style
 import json
+import os
+import time
+
+from src.tracing import tracer
+from src.utils import exercise_hash
 
 init(autoreset=True)
 
 class OutputManager:
-    def __init__(self, save_file="results/output_llm_results.json"):
-        self.all_results = []
+    """
+    Prints results and streams one record per evaluated exercise to a JSONL sink (records_file),
+    so nothing is lost on a crash and memory stays flat. Every record is flushed to the OS as it is
+    written; the sink is fsynced every fsync_every records or fsync_interval seconds and on close().
+    With resume=True the existing records are indexed by (exercise hash, model, language) and those
+    exercises are skipped.
+    """
+    def __init__(self, save_file="results/output_llm_results.json", records_file=None,
+                 model=None, language=None, resume=False, shard=None, fsync_every=32, fsync_interval=5.0):
+        self.shard = shard  # (index, count) when this run evaluates one shard of the exercises
+        if shard:
+            save_file = self.shard_path(save_file, shard)
         self.save_file = save_file
+        self.records_file = records_file or os.path.splitext(save_file)[0] + ".jsonl"
+        self.model = model
+        self.language = language
+        self.completed = {}
+        self.resumed_correct = 0
+        self.resumed_total = 0
+        self.timed_out = 0
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.unsynced = 0
+        self.last_fsync = time.monotonic()
+
+        self.resume = resume
+        self.sink = None  # opened on first use, so an OutputManager that only prints never touches the files
+        if resume:
+            self.completed = self.index_records()
+
+    @staticmethod
+    def shard_path(save_file, shard):
+        """Results file of one shard, e.g. results/output_llm_results.shard-0-of-4.json."""
+        root, extension = os.path.splitext(save_file)
+        return f"{root}.shard-{shard[0]}-of-{shard[1]}{extension}"
+
+    def open_sink(self):
+        if self.sink is None:
+            os.makedirs(os.path.dirname(self.records_file) or ".", exist_ok=True)
+            self.sink = open(self.records_file, "a" if self.resume else "w", encoding="utf-8")
+        return self.sink
+
+    def result_key(self, exercise):
+        return exercise_hash(exercise), self.model, self.language
+
+    def index_records(self):
+        """
+        Maps the key of every exercise already in the sink to whether it passed. Timed-out exercises
+        are left out, so --resume evaluates them again.
+        """
+        completed = {}
+        for record in self.read_records():
+            if not record.get("timed_out"):
+                completed[self.record_key(record)] = record.get("passed", False)
+        return completed
+
+    @staticmethod
+    def record_key(record):
+        return record.get("exercise_hash"), record.get("model"), record.get("language")
+
+    def read_records(self):
+        if not os.path.exists(self.records_file):
+            return
+        with open(self.records_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # a line cut short by a crash
+
+    def own_records(self):
+        """
+        The records of this model and language; after --resume the sink may also hold other ones.
+        A timed-out record is left out when a later record of the sink evaluated the same exercise again.
+        """
+        last = {self.record_key(record): position for position, record in enumerate(self.read_records())}
+        for position, record in enumerate(self.read_records()):
+            if record.get("timed_out") and last[self.record_key(record)] > position:
+                continue
+            if ((self.model is None or record.get("model") == self.model)
+                    and (self.language is None or record.get("language") == self.language)):
+                yield record
+
+    def skip_completed(self, exercises):
+        """Yields the exercises not evaluated yet, counting the correct ones already in the sink."""
+        for exercise in exercises:
+            passed = self.completed.get(self.result_key(exercise))
+            if passed is None:
+                yield exercise
+                continue
+            self.resumed_total += 1
+            if passed:
+                self.resumed_correct += 1
 
     def pretty_print_result(self, exercise, solution_code, test_results, elapsed_time):
         print(Style.BRIGHT + Fore.BLUE + "="*60)
@@ -32,32 +127,161 @@ class OutputManager:
         print(Fore.YELLOW + f"Time: {elapsed_time:.2f} seconds")
         print(Fore.BLUE + "="*60 + "\n")
 
-    def add_result(self, exercise, solution_code, test_results, elapsed_time):
-        self.all_results.append({
+    async def skip_completed_async(self, exercises):
+        """skip_completed for an async iterable of exercises."""
+        async for exercise in exercises:
+            passed = self.completed.get(self.result_key(exercise))
+            if passed is None:
+                yield exercise
+                continue
+            self.resumed_total += 1
+            if passed:
+                self.resumed_correct += 1
+
+    @tracer.traced("output.add_result")
+    def add_result(self, exercise, solution_code, test_results, elapsed_time, profile=None, attempt=None,
+                   timed_out=False):
+        correct_count = sum(1 for r in test_results if r.get("success"))
+        exercise_key, model, language = self.result_key(exercise)
+        record = {
             "exercise": exercise["name"],
             "description": exercise["description"],
             "solution": solution_code,
             "test_results": test_results,
-            "elapsed_time": elapsed_time
-        })
+            "elapsed_time": elapsed_time,
+            "exercise_hash": exercise_key,
+            "model": model,
+            "language": language,
+            "passed": correct_count == len(exercise["input"])
+        }
+        if profile is not None:
+            record["profile"] = profile
+        if attempt is not None:
+            record["attempt"] = {key: attempt[key] for key in ("round", "candidate", "rounds", "candidates")}
+        if timed_out:
+            record["timed_out"] = True
+        if self.shard and "position" in exercise:
+            record["position"] = exercise["position"]  # lets merge restore the unsharded order
+        sink = self.open_sink()
+        sink.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        sink.flush()
+        self.unsynced += 1
+        if self.unsynced >= self.fsync_every or time.monotonic() - self.last_fsync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """Forces the records written so far to disk."""
+        if self.sink is not None and self.unsynced:
+            os.fsync(self.sink.fileno())
+        self.unsynced = 0
+        self.last_fsync = time.monotonic()
 
-    def save_summary(self, correct_exercises, total_exercises, total_time):
+    @tracer.traced("output.save_summary")
+    def save_summary(self, correct_exercises, total_exercises, total_time, records=None):
+        """
+        Writes the JSON summary, streaming the records from the sink instead of holding them in memory,
+        or the given records instead.
+        """
         summary = {
             "correct_exercises": correct_exercises,
             "total_exercises": total_exercises,
             "total_time": total_time
         }
-        to_save = {
-            "results": self.all_results,
-            "summary": summary
-        }
+        if self.shard:
+            summary["shard"] = {"index": self.shard[0], "count": self.shard[1]}
+        if records is None:
+            self.open_sink().flush()
+            records = self.own_records()
         with open(self.save_file, "w", encoding="utf-8") as f:
-            json.dump(to_save, f, indent=2, ensure_ascii=False)
+            f.write('{\n  "results": [')
+            for index, record in enumerate(records):
+                f.write(",\n    " if index else "\n    ")
+                f.write(json.dumps(record, indent=2, ensure_ascii=False).replace("\n", "\n    "))
+            f.write('\n  ],\n  "summary": ')
+            f.write(json.dumps(summary, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+            f.write("\n}\n")
         print(Fore.YELLOW + f"\n[OutputManager] Full details saved in {self.save_file}\n")
 
+    def merge_shards(self, paths):
+        """
+        Combines the results files of the shards of a run into save_file, in the format and order of
+        an unsharded run. Returns (correct, total, time); time is that of the slowest shard, as the shards
+        run side by side. Missing, duplicated or mismatched shards are reported as errors.
+        """
+        records, correct_exercises, total_exercises, total_time = [], 0, 0, 0.0
+        seen, counts = set(), set()
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            summary = data["summary"]
+            shard = summary.get("shard")
+            if shard is None:
+                self.pretty_print_error(f"{path} is not the output of a sharded run")
+                continue
+            if shard["index"] in seen:
+                self.pretty_print_error(f"Shard {shard['index']} given twice ({path}), skipped")
+                continue
+            seen.add(shard["index"])
+            counts.add(shard["count"])
+            records.extend(data["results"])
+            correct_exercises += summary["correct_exercises"]
+            total_exercises += summary["total_exercises"]
+            total_time = max(total_time, summary["total_time"])
+
+        if len(counts) > 1:
+            self.pretty_print_error(f"The shards come from runs split in different ways: {sorted(counts)}")
+        elif counts and len(seen) < min(counts):
+            missing = sorted(set(range(min(counts))) - seen)
+            self.pretty_print_error(f"Missing shards: {', '.join(map(str, missing))}; the totals are partial")
+
+        records.sort(key=lambda record: record.get("position", float("inf")))
+        for record in records:
+            record.pop("position", None)
+        self.save_summary(correct_exercises, total_exercises, total_time, records)
+        return correct_exercises, total_exercises, total_time
+
+    def report_timeout(self, exercise, message, elapsed_time):
+        """Records an exercise whose LLM request timed out as failed, with a single `timeout` test result."""
+        self.pretty_print_error(f"{exercise['name']}: {message}")
+        self.timed_out += 1
+        self.add_result(exercise, None, [{"error": message, "status": "timeout", "success": False}],
+                        elapsed_time, timed_out=True)
+
+    def close(self):
+        if self.sink is not None:
+            self.sync()
+            self.sink.close()
+            self.sink = None
+
     def print_summary(self, correct_exercises, total_exercises, total_time):
         print(Style.BRIGHT + Fore.CYAN + f"\nSummary: {correct_exercises}/{total_exercises} correct exercises")
         print(Fore.CYAN + f"Total time: {total_time:.2f} seconds")
+        if self.timed_out:
+            print(Fore.YELLOW + f"{self.timed_out} exercises timed out waiting for the LLM")
+
+    def print_batch_summary(self, batcher):
+        print(Fore.CYAN + f"Batched requests: {batcher.requests}, solutions requested again one by one: "
+                          f"{batcher.retried}")
+
+    def print_matrix_summary(self, summaries):
+        """Prints one line per (model, language) pair of a matrix run."""
+        print(Style.BRIGHT + Fore.CYAN + "\nMatrix summary:")
+        for (model, language), (correct, total, elapsed) in summaries.items():
+            print(Fore.CYAN + f"  {model} [{language}]: {correct}/{total} correct exercises in {elapsed:.2f} seconds")
+
+    def pretty_print_profile(self, profile):
+        if "error" in profile:
+            print(Fore.YELLOW + f"Profile: {profile['error']}")
+            return
+        largest = max((m["size"] for m in profile["measurements"] if m["status"] == "ok"), default=None)
+        print(Fore.MAGENTA + f"Profile: time {profile['complexity'] or 'undetermined'}, "
+                             f"memory {profile['memory_complexity'] or 'undetermined'} "
+                             f"({profile['family']} inputs up to n={largest})")
+
+    def pretty_print_attempt(self, attempt):
+        outcome = "passed" if attempt["passed"] else "best"
+        print(Fore.MAGENTA + f"Attempt: candidate {attempt['candidate'] + 1} of round {attempt['round'] + 1} {outcome} "
+                             f"({attempt['candidates']} candidates in {attempt['rounds']} rounds)")
 
     def pretty_print_startup(self):
         print(Style.BRIGHT + Fore.GREEN + "\n==== Starting LLM Exercise Evaluation ====\n")
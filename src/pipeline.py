@@ -0,0 +1,230 @@
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.code_evaluator import CodeExecutionFactory
+from src.http_transport import RequestTimeout
+from src.tracing import trace_lane
+from src.utils import extract_solution_code
+
+
+class AsyncPipeline:
+    """
+    Evaluates exercises with two overlapping stages:
+    many LLM requests in flight at once, feeding a bounded queue that the
+    code execution workers drain while the network is still busy.
+    Results are handed to the OutputManager in the original exercise order.
+    """
+    def __init__(self, executor, output_manager, concurrency=8, queue_size=None, execution_workers=None,
+                 execution_pool=None, profiler=None, solver=None, batcher=None):
+        self.executor = executor
+        self.solver = solver  # optional Solver for pass@k sampling and self-repair
+        self.batcher = batcher  # optional BatchSolver packing several exercises into one request
+        self.profiler = profiler  # optional SolutionProfiler run on every correct solution
+        self.execution_pool = execution_pool  # optional thread pool shared with other pipelines
+        self.output_manager = output_manager
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size or self.concurrency * 2
+        if execution_workers is None and execution_pool is not None:
+            execution_workers = execution_pool._max_workers
+        if execution_workers is None:
+            execution_workers = self.default_execution_workers(executor.language)
+        self.execution_workers = max(1, execution_workers)
+
+        self.pending = {}
+        self.next_index = 0
+        self.correct_exercises = 0
+        self.total_exercises = 0
+
+    @staticmethod
+    def default_execution_workers(language):
+        # In-process PythonMonkey shares one SpiderMonkey runtime, so JavaScript runs on a single thread
+        # unless it is sent to worker processes.
+        in_process_js = (language == "javascript"
+                         and not CodeExecutionFactory.OPTIONS.get("javascript", {}).get("pool"))
+        return 1 if in_process_js else (os.cpu_count() or 1)
+
+    async def run(self, exercises):
+        """Evaluate every exercise and return the number of correct ones."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        pool = self.execution_pool or ThreadPoolExecutor(max_workers=self.execution_workers)
+        try:
+            workers = [asyncio.create_task(self.execution_worker(queue, pool))
+                       for _ in range(self.execution_workers)]
+            await self.produce(exercises, queue, pool)
+            await queue.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            if pool is not self.execution_pool:
+                pool.shutdown(wait=True)
+        return self.correct_exercises
+
+    async def produce(self, exercises, queue, pool=None):
+        """
+        Start one LLM request per exercise, keeping at most `concurrency` in flight.
+        `exercises` may be an async iterable, e.g. a corpus that is still being generated.
+        """
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = []
+        batch = []
+
+        async def start(exercise):
+            await slots.acquire()
+            tasks.append(asyncio.create_task(self.solve(self.total_exercises, exercise, queue, slots, pool)))
+            self.total_exercises += 1
+
+        async def start_batch():
+            await slots.acquire()
+            tasks.append(asyncio.create_task(self.solve_batch(self.total_exercises, list(batch), queue, slots)))
+            self.total_exercises += len(batch)
+            batch.clear()
+
+        async def add(exercise):
+            if not self.batcher:
+                await start(exercise)
+                return
+            if not self.batcher.fits(batch, exercise):
+                await start_batch()
+            batch.append(exercise)
+
+        if hasattr(exercises, "__aiter__"):
+            async for exercise in exercises:
+                await add(exercise)
+        else:
+            for exercise in exercises:
+                await add(exercise)
+        if batch:
+            await start_batch()
+        await asyncio.gather(*tasks)
+
+    async def solve(self, index, exercise, queue, slots, pool=None):
+        """
+        LLM stage: build the prompt, query the model and queue the extracted solution.
+        With a solver the candidates are run and repaired here, and the queue gets the tested attempt.
+        A request that times out queues {"timeout": message} as the content, and the pipeline moves on.
+        """
+        start_time = time.time()
+        trace_lane.set(self.lane(index))
+        prompt = content = attempt = None
+        try:
+            prompt = self.executor.create_prompt(exercise)
+            if prompt and self.solver and pool:
+                attempt = await self.solver.solve_async(exercise, prompt, pool)
+                content = {"solution": attempt["solution"]} if attempt else None
+            elif prompt:
+                response_data = await self.executor.query_model_async(prompt)
+                content = extract_solution_code(response_data, self.executor.language)
+        except RequestTimeout as e:
+            content = {"timeout": str(e)}
+        except Exception as e:
+            self.output_manager.pretty_print_error(f"LLM stage failed for {exercise.get('name')}: {e}")
+        try:
+            await queue.put((index, exercise, prompt, content, start_time, attempt))
+        finally:
+            slots.release()
+
+    async def solve_batch(self, index, exercises, queue, slots):
+        """LLM stage of a batch: one request for all the exercises, then each solution is queued on its own."""
+        start_time = time.time()
+        trace_lane.set(self.lane(index))
+        try:
+            solved = await self.batcher.solve_async(exercises)
+        except Exception as e:
+            self.output_manager.pretty_print_error(f"LLM stage failed for a batch of {len(exercises)} exercises: {e}")
+            solved = [(self.executor.create_prompt(exercise), None) for exercise in exercises]
+        try:
+            for offset, (exercise, (prompt, content)) in enumerate(zip(exercises, solved)):
+                await queue.put((index + offset, exercise, prompt, content, start_time, None))
+        finally:
+            slots.release()
+
+    def lane(self, index):
+        """Trace timeline row of one exercise."""
+        return f"{self.executor.model} {self.executor.language} #{index}"
+
+    async def execution_worker(self, queue, pool):
+        """
+        Execution stage: run queued solutions in the thread pool as they arrive.
+        A failing exercise is logged and skipped, so the worker keeps draining the queue.
+        """
+        while True:
+            index, exercise, prompt, content, start_time, attempt = await queue.get()
+            try:
+                outcome = await self.execute(index, exercise, prompt, content, start_time, attempt, pool)
+            except Exception as e:
+                self.output_manager.pretty_print_error(f"Execution stage failed for {exercise.get('name')}: {e}")
+                outcome = None
+            try:
+                self.emit(index, outcome)
+            finally:
+                queue.task_done()
+
+    async def execute(self, index, exercise, prompt, content, start_time, attempt, pool):
+        """Runs (and profiles) one solution; returns the arguments of report."""
+        loop = asyncio.get_running_loop()
+        results = attempt["test_results"] if attempt else None
+        if results is None and prompt and content and "solution" in content:
+            trace_lane.set(self.lane(index))
+            try:
+                # Run in a copy of this context so the execution spans land on the exercise's row.
+                results = await loop.run_in_executor(
+                    pool, contextvars.copy_context().run, CodeExecutionFactory.get_executor,
+                    self.executor.language, content["solution"], exercise["input"], exercise["output"]
+                )
+            except Exception as e:
+                results = [{"error": f"Execution failed: {str(e)}", "success": False}]
+        elapsed_time = time.time() - start_time
+        profile = None
+        if self.profiler and results and all(result.get("success") for result in results):
+            profile = await loop.run_in_executor(
+                pool, contextvars.copy_context().run, self.profiler.profile,
+                content["solution"], exercise, self.executor.language
+            )
+        return exercise, prompt, content, results, elapsed_time, profile, attempt
+
+    def emit(self, index, outcome):
+        """
+        Buffer finished exercises and report them in their original order. An outcome of None (a failed
+        exercise) only advances the order; an error while reporting one exercise does not stop the others.
+        """
+        self.pending[index] = outcome
+        while self.next_index in self.pending:
+            outcome = self.pending.pop(self.next_index)
+            self.next_index += 1
+            if outcome is None:
+                continue
+            try:
+                self.report(*outcome)
+            except Exception as e:
+                self.output_manager.pretty_print_error(f"Reporting failed for {outcome[0].get('name')}: {e}")
+
+    def report(self, exercise, prompt, content, results, elapsed_time, profile=None, attempt=None):
+        output_manager = self.output_manager
+        if not prompt:
+            output_manager.pretty_print_warning("No valid exercise!")
+            return
+
+        output_manager.pretty_print_prompt(prompt, exercise["name"])
+        if content and "timeout" in content:
+            output_manager.report_timeout(exercise, content["timeout"], elapsed_time)
+            return
+        output_manager.pretty_print_response(content, exercise["name"])
+        if results is None:
+            output_manager.pretty_print_error("No valid solution received from LLM.")
+            return
+
+        code = content["solution"]
+        output_manager.pretty_print_result(exercise, code, results, elapsed_time)
+        if attempt is not None:
+            output_manager.pretty_print_attempt(attempt)
+        if profile is not None:
+            output_manager.pretty_print_profile(profile)
+        output_manager.add_result(exercise, code, results, elapsed_time, profile, attempt)
+
+        correct_count = sum(1 for result in results if result.get("success", False))
+        if correct_count == len(exercise["input"]):
+            self.correct_exercises += 1
@@ -0,0 +1,296 @@
+import copy
+import gc
+import json
+import math
+import random
+import string
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from src.tracing import tracer
+from src.worker_pool import PythonWorker, WorkerError, WorkerTimeout, load_code
+
+# Timings closer than this are within the jitter of a single call.
+TIMING_NOISE = 2e-6
+# Peak memory differences below this are a few small objects, not growth.
+MEMORY_NOISE = 1024
+# Elements copied ahead of one timed batch, for solutions that modify their input.
+COPY_LIMIT = 1 << 20
+
+# Candidate growth functions; the measurements are fitted to a + c * f(n) for each of them, and to
+# an exponential a * b^n, reported as O(2^n).
+COMPLEXITY_CLASSES = [
+    ("O(1)", lambda n: 0.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+    ("O(n^2)", lambda n: float(n) ** 2),
+    ("O(n^3)", lambda n: float(n) ** 3),
+]
+
+
+def log_slope(sizes, values):
+    """Least-squares slope of log(value) against log(size): the exponent the values grow with."""
+    xs, ys = [math.log(n) for n in sizes], [math.log(value) for value in values]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread if spread else 0.0
+
+
+def fit_complexity(sizes, values, tolerance=1.5, noise=0.0):
+    """
+    Returns the complexity class that best fits values measured at sizes, by least squares on
+    a + c * f(n) with c >= 0. Residuals are relative, so small sizes count as much as large ones;
+    values below `noise` (the measurement resolution) are weighted as if they were `noise`.
+    Simpler classes are preferred: a more complex class replaces the current one only when its error
+    is more than `tolerance` times lower and the growth of the values over the larger half of the
+    sizes, on a log scale, is closer to its own than to that of the current class.
+    """
+    if len(sizes) < 3:
+        return None
+    if max(values) <= 1.5 * min(values) or max(values) - min(values) <= noise:
+        return "O(1)"  # differences this small over a range of sizes are noise
+    weights = [1.0 / max(value, noise, 1e-12) ** 2 for value in values]
+    total = sum(weights)
+    mean_y = sum(w * y for w, y in zip(weights, values)) / total
+    start = min(len(sizes) // 2, len(sizes) - 3)
+    low, high = sizes[start], sizes[-1]
+    slope = log_slope(sizes[start:], [max(value, noise, 1e-12) for value in values[start:]])
+    fits = []  # (name, error, exponent of the class between the low and high sizes)
+    for name, growth in COMPLEXITY_CLASSES:
+        try:
+            xs = [growth(n) for n in sizes]
+            exponent = math.log(growth(high) / growth(low)) / math.log(high / low) if growth(low) > 0 else None
+        except (OverflowError, ValueError, ZeroDivisionError):
+            continue
+        if name == "O(1)":
+            exponent = 0.0
+        mean_x = sum(w * x for w, x in zip(weights, xs)) / total
+        variance = sum(w * (x - mean_x) ** 2 for w, x in zip(weights, xs))
+        covariance = sum(w * (x - mean_x) * (y - mean_y) for w, x, y in zip(weights, xs, values))
+        c = max(0.0, covariance / variance) if variance else 0.0
+        intercept = mean_y - c * mean_x
+        fits.append((name, sum(w * (intercept + c * x - y) ** 2 for w, x, y in zip(weights, xs, values)),
+                     exponent))
+
+    # Exponential: a straight line through log(value) against n.
+    if min(values) > 0:
+        logs = [math.log(value) for value in values]
+        mean_n, mean_log = sum(sizes) / len(sizes), sum(logs) / len(logs)
+        spread = sum((n - mean_n) ** 2 for n in sizes)
+        rate = sum((n - mean_n) * (y - mean_log) for n, y in zip(sizes, logs)) / spread
+        try:
+            predictions = [math.exp(mean_log + rate * (n - mean_n)) for n in sizes]
+            fits.append(("O(2^n)", sum(w * (p - y) ** 2 for w, p, y in zip(weights, predictions, values)),
+                         rate * (high - low) / math.log(high / low)))
+        except OverflowError:
+            pass
+
+    chosen, chosen_error, chosen_exponent = fits[0]
+    for name, error, exponent in fits[1:]:
+        if error * tolerance >= chosen_error:
+            continue
+        if exponent is not None and chosen_exponent is not None and slope < (chosen_exponent + exponent) / 2:
+            continue
+        chosen, chosen_error, chosen_exponent = name, error, exponent
+    return chosen
+
+
+def scale_value(value, size, rng):
+    """Scales one example argument to `size`: ints become n, strings and lists get n elements."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return size
+    if isinstance(value, float):
+        return float(size)
+    if isinstance(value, str):
+        alphabet = sorted(set(value)) or list(string.ascii_lowercase)
+        return "".join(rng.choice(alphabet) for _ in range(size))
+    if isinstance(value, list):
+        numbers = [item for item in value if isinstance(item, (int, float)) and not isinstance(item, bool)]
+        if value and len(numbers) == len(value):
+            low, high = int(min(min(numbers), 0)), int(max(max(numbers), size))
+            return [rng.randint(low, high) for _ in range(size)]
+        if value:
+            return [copy.deepcopy(rng.choice(value)) for _ in range(size)]
+        return [rng.randint(0, size) for _ in range(size)]
+    return value
+
+
+def build_input(family, size):
+    """
+    Test input of the given size: from the exercise's declared generator (a `lambda n: ...` returning a
+    test input), or by scaling every argument of an example input.
+    """
+    if "generator" in family:
+        generator = eval(family["generator"], {"random": random.Random(size), "math": math, "string": string})
+        return generator(size)
+    rng = random.Random(size)
+    example = family["example"]
+    if isinstance(example, (list, tuple)):
+        return [scale_value(value, size, rng) for value in example]
+    return scale_value(example, size, rng)
+
+
+def time_calls(function, batch):
+    """Wall and CPU seconds of calling function on each argument list of batch, with the garbage collector off."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        for call_args in batch:
+            function(*call_args)
+        return time.perf_counter() - wall_start, time.process_time() - cpu_start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def run_profile_job(job, code_cache):
+    """Measures one solution at one input size inside a profiling worker."""
+    scope = {}
+    try:
+        exec(load_code(job, code_cache), scope)
+        function = scope[[name for name in scope if callable(scope[name])][0]]
+        test_input = build_input(job["family"], job["size"])
+        args = list(test_input) if isinstance(test_input, (list, tuple)) else [test_input]
+
+        # The fastest call of several, with the garbage collector off. Solutions may sort or consume their
+        # input, so each call gets its own copy unless the first call left the arguments unchanged.
+        # Copies are made before the timer starts, and fast calls are timed in batches so that a
+        # sample lasts well above the timer resolution.
+        pristine = copy.deepcopy(args)
+        call_args = copy.deepcopy(args)
+        wall, cpu = time_calls(function, [call_args])
+        try:
+            reusable = call_args == pristine
+        except Exception:
+            reusable = False
+        min_time = job.get("min_time", 0.05)
+        number = max(1, int(min_time / 10 / max(wall, 1e-7)))
+        if not reusable:
+            number = min(number, max(1, COPY_LIMIT // max(job["size"], 1)))
+        timed, calls, samples = wall, 1, 1
+        while timed < min_time and samples < job.get("max_samples", 100):
+            batch = [args] * number if reusable else [copy.deepcopy(args) for _ in range(number)]
+            run_wall, run_cpu = time_calls(function, batch)
+            wall, cpu = min(wall, run_wall / number), min(cpu, run_cpu / number)
+            timed += run_wall
+            calls += number
+            samples += 1
+            del batch
+
+        # Memory is measured on a separate run: tracing allocations slows the code down.
+        call_args = copy.deepcopy(args)
+        tracemalloc.start()
+        try:
+            function(*call_args)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {"status": "ok", "size": job["size"], "wall": wall, "cpu": cpu, "peak_memory": peak_memory,
+                "repeats": calls}
+    except MemoryError:
+        return {"status": "memory_limit", "size": job["size"], "error": "Memory limit exceeded"}
+    except Exception as e:
+        return {"status": "error", "size": job["size"], "error": str(e)}
+    finally:
+        scope.clear()
+
+
+def profile_worker_main(conn, memory_limit=None):
+    """Entry point of a profiling worker: answer jobs until the pipe is closed."""
+    if memory_limit:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    code_cache = OrderedDict()
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        conn.send(run_profile_job(job, code_cache))
+
+
+class ProfileWorker(PythonWorker):
+    """Python worker process that runs profiling jobs, so a slow or runaway solution can be killed."""
+    def __init__(self, memory_limit=None):
+        self.start(profile_worker_main, memory_limit)
+
+
+class SolutionProfiler:
+    """
+    Runs a correct Python solution on inputs of increasing size and fits the complexity class of its
+    running time and peak memory.
+
+    Inputs come from the exercise's "profile" field when present:
+        "profile": {"generator": "lambda n: [list(range(n, 0, -1))]", "sizes": [16, 64, 256, 1024]}
+    otherwise from the largest example input, with every int, string and list argument scaled to n.
+    Sizes double from min_size until max_size, the time budget, or a size taking longer than size_timeout.
+    """
+    def __init__(self, min_size=8, max_size=1 << 16, time_budget=10.0, size_timeout=10.0, memory_limit=None):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.time_budget = time_budget
+        self.size_timeout = size_timeout
+        self.memory_limit = memory_limit
+
+    def family(self, exercise):
+        declared = exercise.get("profile") or {}
+        if declared.get("generator"):
+            return {"generator": declared["generator"]}, declared.get("sizes")
+        inputs = exercise.get("input") or []
+        if not inputs:
+            return None, None
+        example = max(inputs, key=lambda test_input: len(json.dumps(test_input, default=str)))
+        return {"example": example}, None
+
+    def sizes(self):
+        size = self.min_size
+        while size <= self.max_size:
+            yield size
+            size *= 2
+
+    @tracer.traced("profile")
+    def profile(self, code, exercise, language="python"):
+        """Returns {"complexity", "memory_complexity", "family", "measurements"} or {"error"}."""
+        if language.lower() != "python":
+            return {"error": f"Profiling is not supported for {language}"}
+        family, declared_sizes = self.family(exercise)
+        if family is None:
+            return {"error": "No input to derive a profiling family from"}
+
+        measurements = []
+        worker = ProfileWorker(self.memory_limit)
+        started = time.perf_counter()
+        try:
+            for size in declared_sizes or self.sizes():
+                job = {"code": code, "family": family, "size": size}
+                remaining = self.time_budget - (time.perf_counter() - started)
+                try:
+                    measurement = worker.request(job, max(1.0, min(self.size_timeout, remaining)))
+                except WorkerError as e:
+                    status = "timeout" if isinstance(e, WorkerTimeout) else "crashed"
+                    measurements.append({"status": status, "size": size, "error": str(e)})
+                    break
+                measurements.append(measurement)
+                if measurement["status"] != "ok":
+                    break
+                # Stop before a size that would not fit in the budget if it grew quadratically
+                # (one timed and one memory-traced run at four times the time).
+                remaining = self.time_budget - (time.perf_counter() - started)
+                if remaining <= 0 or (not declared_sizes and measurement["wall"] * 8 > remaining):
+                    break
+        finally:
+            worker.stop()
+
+        ok = [m for m in measurements if m["status"] == "ok"]
+        sizes = [m["size"] for m in ok]
+        return {
+            "complexity": fit_complexity(sizes, [m["wall"] for m in ok], noise=TIMING_NOISE),
+            "memory_complexity": fit_complexity(sizes, [float(m["peak_memory"]) for m in ok], noise=MEMORY_NOISE),
+            "family": "declared" if "generator" in family else "derived",
+            "measurements": measurements
+        }
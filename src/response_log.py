@@ -0,0 +1,77 @@
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+
+
+class ResponseLog:
+    """
+    Append-only JSONL log of LLM responses.
+
+    Records are buffered in memory and appended in batches with a single write, under an
+    exclusive lock on a sidecar lock file so that threads and processes can share the log.
+    The file is fsynced at most every fsync_interval seconds, rotated once it grows past
+    max_bytes, and only the newest `retention` rotated files are kept (None keeps them all).
+    """
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, retention=None, buffer_size=32, fsync_interval=5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.retention = retention
+        self.buffer_size = buffer_size
+        self.fsync_interval = fsync_interval
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.last_fsync = time.monotonic()
+        atexit.register(self.close)
+
+    def append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.buffer.append(line)
+            due = time.monotonic() - self.last_fsync >= self.fsync_interval
+            if len(self.buffer) >= self.buffer_size or due:
+                self.flush_locked(fsync=due)
+
+    def flush(self, fsync=False):
+        with self.lock:
+            self.flush_locked(fsync)
+
+    def flush_locked(self, fsync=False):
+        if not self.buffer:
+            return
+        data = "".join(self.buffer).encode("utf-8")
+        self.buffer = []
+
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                    self.rotate()
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data)
+                    if fsync:
+                        os.fsync(fd)
+                finally:
+                    os.close(fd)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        if fsync:
+            self.last_fsync = time.monotonic()
+
+    def rotate(self):
+        """Moves the current file aside and applies the retention policy. Called with the file lock held."""
+        base, extension = os.path.splitext(self.path)
+        os.replace(self.path, f"{base}.{time.strftime('%Y%m%dT%H%M%S')}.{time.time_ns() % 10**9:09d}{extension}")
+        if self.retention is not None:
+            rotated = sorted(glob.glob(f"{glob.escape(base)}.*{extension}"))
+            for old_path in rotated[:max(0, len(rotated) - self.retention)]:
+                os.remove(old_path)
+
+    def close(self):
+        self.flush(fsync=True)
@@ -0,0 +1,248 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import as_completed
+
+from src.code_evaluator import CodeExecutionFactory
+from src.http_transport import RequestTimeout
+from src.utils import extract_batch_solutions, extract_solution_code
+
+
+class SolveBudget:
+    """Token and wall-clock budget for the repair rounds of a whole run, shared by every exercise."""
+    def __init__(self, max_tokens=None, max_seconds=None):
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+        self.started = time.time()
+        self.tokens = 0
+        self.lock = threading.Lock()
+
+    def charge(self, usage):
+        """Adds the tokens of one response (response.usage)."""
+        if usage is None:
+            return
+        tokens = getattr(usage, "total_tokens", None)
+        if tokens is None:
+            tokens = (getattr(usage, "prompt_tokens", 0) or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+        with self.lock:
+            self.tokens += tokens
+
+    @property
+    def exhausted(self):
+        if self.max_tokens is not None and self.tokens >= self.max_tokens:
+            return True
+        return self.max_seconds is not None and time.time() - self.started >= self.max_seconds
+
+
+class Solver:
+    """
+    pass@k sampling with an optional self-repair loop.
+    Every round asks for `samples` candidates in a single request (n=samples), runs them in parallel and
+    stops at the first one that passes every test. When none does, the best candidate and the tests it
+    failed are sent back to the model, for up to `repair_rounds` more rounds while the budget lasts.
+    """
+    def __init__(self, executor, samples=1, repair_rounds=0, budget=None):
+        self.executor = executor
+        self.samples = max(1, samples)
+        self.repair_rounds = max(0, repair_rounds)
+        self.budget = budget
+        if budget:
+            executor.budget = budget  # the executor charges the tokens of every request it sends
+
+    def run_candidate(self, code, exercise):
+        try:
+            return CodeExecutionFactory.get_executor(
+                self.executor.language, code, exercise["input"], exercise["output"]
+            )
+        except Exception as e:
+            return [{"error": f"Execution failed: {str(e)}", "success": False}]
+
+    def candidates(self, responses):
+        """Solutions extracted from the answers of one request; answers without one are dropped."""
+        codes = []
+        for response in responses:
+            content = extract_solution_code(response, self.executor.language)
+            if content and "solution" in content:
+                codes.append(content["solution"])
+        return codes
+
+    def submit(self, pool, codes, exercise):
+        """Starts every candidate on the pool; returns {future: candidate index}."""
+        return {pool.submit(contextvars.copy_context().run, self.run_candidate, code, exercise): index
+                for index, code in enumerate(codes)}
+
+    def round_prompt(self, exercise, prompt, attempt):
+        if attempt is None:
+            return prompt  # nothing to repair yet: ask again
+        return self.executor.create_repair_prompt(exercise, attempt["solution"], attempt["test_results"])
+
+    def can_continue(self, round_number, attempt):
+        if attempt and attempt["passed"]:
+            return False
+        return round_number == 0 or not (self.budget and self.budget.exhausted)
+
+    @staticmethod
+    def better(attempt, round_number, index, code, results, exercise):
+        """Keeps the candidate passing the most tests; earlier candidates win ties."""
+        correct = sum(1 for result in results if result.get("success", False))
+        if attempt is not None and attempt["correct"] >= correct:
+            return attempt
+        return {"solution": code, "test_results": results, "correct": correct,
+                "passed": correct == len(exercise["input"]), "round": round_number, "candidate": index}
+
+    @staticmethod
+    def finish(attempt, rounds, candidates):
+        if attempt is not None:
+            attempt.update(rounds=rounds, candidates=candidates)
+        return attempt
+
+    def solve(self, exercise, prompt, pool):
+        """
+        Returns the best attempt as {"solution", "test_results", "passed", "round", "candidate",
+        "rounds", "candidates"}, or None when the model never answered with a solution.
+        """
+        attempt = None
+        rounds = candidates = 0
+        while rounds <= self.repair_rounds and self.can_continue(rounds, attempt):
+            try:
+                codes = self.candidates(self.executor.query_candidates(
+                    self.round_prompt(exercise, prompt, attempt), self.samples))
+            except RequestTimeout:
+                if attempt is None:
+                    raise
+                break  # keep the best attempt of the earlier rounds
+            futures = self.submit(pool, codes, exercise)
+            for future in as_completed(futures):
+                index = futures[future]
+                attempt = self.better(attempt, rounds, index, codes[index], future.result(), exercise)
+                if attempt["passed"]:
+                    for other in futures:
+                        other.cancel()
+                    break
+            rounds += 1
+            candidates += len(codes)
+        return self.finish(attempt, rounds, candidates)
+
+    async def solve_async(self, exercise, prompt, pool):
+        """Same as solve, awaiting the requests so the repair loops of many exercises overlap."""
+        attempt = None
+        rounds = candidates = 0
+        while rounds <= self.repair_rounds and self.can_continue(rounds, attempt):
+            try:
+                codes = self.candidates(await self.executor.query_candidates_async(
+                    self.round_prompt(exercise, prompt, attempt), self.samples))
+            except RequestTimeout:
+                if attempt is None:
+                    raise
+                break
+            futures = {asyncio.wrap_future(future): index
+                       for future, index in self.submit(pool, codes, exercise).items()}
+            pending = set(futures)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    index = futures[future]
+                    attempt = self.better(attempt, rounds, index, codes[index], future.result(), exercise)
+                if attempt["passed"]:
+                    for other in pending:
+                        other.cancel()
+                    break
+            rounds += 1
+            candidates += len(codes)
+        return self.finish(attempt, rounds, candidates)
+
+
+class BatchSolver:
+    """
+    Solves exercises `batch_size` at a time: one request with a shared instruction header asks for a
+    JSON array of solutions keyed by exercise name, and only the exercises whose entry is missing or
+    malformed are asked again, one request each.
+    """
+    def __init__(self, executor, batch_size=8):
+        self.executor = executor
+        self.batch_size = max(1, batch_size)
+        self.requests = 0
+        self.retried = 0
+
+    def fits(self, batch, exercise):
+        """Names key the answer, so a batch never holds two exercises with the same name."""
+        return len(batch) < self.batch_size and all(other.get("name") != exercise.get("name") for other in batch)
+
+    def batches(self, exercises):
+        batch = []
+        for exercise in exercises:
+            if not self.fits(batch, exercise):
+                yield batch
+                batch = []
+            batch.append(exercise)
+        if batch:
+            yield batch
+
+    def prepare(self, batch):
+        """The individual prompt of every exercise, and the exercises that can go in the batched request."""
+        prompts = [self.executor.create_prompt(exercise) for exercise in batch]
+        return prompts, [exercise for exercise, prompt in zip(batch, prompts) if prompt]
+
+    def split(self, response, valid, prompts, batch):
+        """Returns [(prompt, content)] in batch order, and the indices that need an individual request."""
+        solutions = extract_batch_solutions(response, [exercise["name"] for exercise in valid], self.executor.language)
+        solved, missing = [], []
+        for index, (exercise, prompt) in enumerate(zip(batch, prompts)):
+            code = solutions.get(exercise["name"]) if prompt else None
+            solved.append((prompt, {"solution": code} if code is not None else None))
+            if prompt and code is None:
+                missing.append(index)
+        self.requests += 1
+        self.retried += len(missing)
+        if missing and len(valid) > 1:
+            print(f"Warning: {len(missing)} of {len(valid)} solutions missing from the batched answer, "
+                  f"asking for them one by one.")
+        return solved, missing
+
+    @staticmethod
+    def timed_out(prompts, error):
+        """Every exercise of a batch whose request timed out, with the timeout as its content."""
+        return [(prompt, {"timeout": str(error)} if prompt else None) for prompt in prompts]
+
+    def solve(self, batch):
+        """
+        Returns [(prompt, content)] for the exercises of one batch, in order; the content of an exercise
+        whose request timed out is {"timeout": message}.
+        """
+        prompts, valid = self.prepare(batch)
+        try:
+            response = self.executor.query_model(self.executor.create_batch_prompt(valid), allow_stream=False) if valid else None
+        except RequestTimeout as e:
+            return self.timed_out(prompts, e)
+        solved, missing = self.split(response, valid, prompts, batch)
+        for index in missing:
+            try:
+                answer = self.executor.query_model(prompts[index])
+            except RequestTimeout as e:
+                solved[index] = self.timed_out([prompts[index]], e)[0]
+                continue
+            solved[index] = (prompts[index], extract_solution_code(answer, self.executor.language))
+        return solved
+
+    async def solve_async(self, batch):
+        """Same as solve; the individual requests for missing entries are sent concurrently."""
+        prompts, valid = self.prepare(batch)
+        response = None
+        try:
+            if valid:
+                response = await self.executor.query_model_async(self.executor.create_batch_prompt(valid),
+                                                                 allow_stream=False)
+        except RequestTimeout as e:
+            return self.timed_out(prompts, e)
+        solved, missing = self.split(response, valid, prompts, batch)
+        answers = await asyncio.gather(*(self.executor.query_model_async(prompts[index]) for index in missing),
+                                       return_exceptions=True)
+        for index, answer in zip(missing, answers):
+            if isinstance(answer, RequestTimeout):
+                solved[index] = self.timed_out([prompts[index]], answer)[0]
+            elif isinstance(answer, BaseException):
+                raise answer
+            else:
+                solved[index] = (prompts[index], extract_solution_code(answer, self.executor.language))
+        return solved
@@ -0,0 +1,98 @@
+import json
+
+from src.utils import decode_json_string
+
+
+class SolutionStreamParser:
+    """
+    Incremental scanner for the "solution" string of a streamed JSON answer.
+    feed() returns True as soon as reading more is pointless: the solution string has closed, or the
+    answer can no longer contain one (the key is not followed by a string, or max_chars was exceeded).
+    A leading <think>...</think> block of reasoning models is skipped and does not count towards
+    max_chars; once the key is found, only the text from the key on counts.
+    """
+    KEY = '"solution"'
+
+    def __init__(self, max_chars=50000):
+        self.max_chars = max_chars
+        self.text = ""
+        self.position = 0
+        self.state = "key"  # key -> colon -> value -> string -> done, or invalid
+        self.value_start = None
+        self.solution = None
+        self.usage = None  # usage chunk of the stream, set by the reader when the API sends one
+        self.counted_from = None  # max_chars counts from here: after the think block, then from the key
+
+    @property
+    def finished(self):
+        return self.state in ("done", "invalid")
+
+    def feed(self, chunk):
+        if self.finished:
+            return True
+        self.text += chunk or ""
+        self.scan()
+        if not self.finished and self.counted_from is not None and len(self.text) - self.counted_from > self.max_chars:
+            self.state = "invalid"
+        return self.finished
+
+    def scan(self):
+        text = self.text
+        while self.position < len(text) and not self.finished:
+            if self.state == "key":
+                if self.position == 0:
+                    head = text.lstrip()
+                    if "<think>".startswith(head):
+                        return  # too short to tell whether a think block starts
+                    if head.startswith("<think>"):
+                        end = text.find("</think>")
+                        if end < 0:
+                            return
+                        self.position = end + len("</think>")
+                    if self.counted_from is None:
+                        self.counted_from = self.position
+                index = text.find(self.KEY, self.position)
+                if index < 0:
+                    # Keep the tail: the key may be split across chunks.
+                    self.position = max(self.position, len(text) - len(self.KEY) + 1)
+                    return
+                self.position = index + len(self.KEY)
+                self.counted_from = index
+                self.state = "colon"
+            elif self.state in ("colon", "value"):
+                char = text[self.position]
+                if char.isspace():
+                    self.position += 1
+                elif self.state == "colon":
+                    # "solution" followed by anything but ':' was a mention, not the key.
+                    self.state = "value" if char == ":" else "key"
+                    self.position += char == ":"
+                elif char == '"':
+                    self.value_start = self.position
+                    self.position += 1
+                    self.state = "string"
+                else:
+                    self.state = "invalid"
+            elif self.state == "string":
+                char = text[self.position]
+                if char == "\\":
+                    if self.position + 1 >= len(text):
+                        return  # wait for the escaped character
+                    self.position += 2
+                elif char == '"':
+                    self.solution = self.decode(text[self.value_start:self.position + 1])
+                    self.position += 1
+                    self.state = "done"
+                else:
+                    self.position += 1
+
+    @staticmethod
+    def decode(literal):
+        """Decodes the JSON string literal, tolerating raw newlines and invalid escapes."""
+        return decode_json_string(literal[1:-1])
+
+    def result(self):
+        """The answer to hand on: a minimal JSON object once the solution is known, else the raw text."""
+        if self.state == "done":
+            return json.dumps({"solution": self.solution}, ensure_ascii=False)
+        return self.text
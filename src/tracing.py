@@ -0,0 +1,189 @@
+import contextvars
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+from src.config import Config
+
+# Timeline row of the current span: set per exercise by the pipeline, otherwise the thread id is used.
+trace_lane = contextvars.ContextVar("trace_lane", default=None)
+
+
+class NullSpan:
+    """Span used while tracing is off, so instrumented code costs one attribute check."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add_span(self.name, self.start, time.perf_counter(), **self.args)
+        return False
+
+
+class Tracer:
+    """
+    Lightweight span recorder for the evaluation stages, plus token usage and cost per model.
+    Spans are written as a Chrome trace (chrome://tracing, Perfetto) and summarized per stage at the
+    end of a run. Disabled by default; nothing is recorded until enable() is called.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.usage = {}
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+        self.origin = time.perf_counter()
+
+    def span(self, name, **args):
+        """Context manager timing one stage; extra keyword arguments are stored with the span."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    def traced(self, name):
+        """Decorator recording a span around every call of the function."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def add_span(self, name, start, end, **args):
+        """Records a finished span from perf_counter timestamps."""
+        lane = trace_lane.get()
+        event = {
+            "name": name,
+            "cat": name.split(".")[0],
+            "ph": "X",
+            "ts": (start - self.origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": lane if lane is not None else threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with self.lock:
+            self.events.append(event)
+
+    def record_usage(self, model, usage):
+        """Adds the token counts of one response (response.usage) to the totals of the model."""
+        if not self.enabled or usage is None:
+            return
+        with self.lock:
+            totals = self.usage.setdefault(model, {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            totals["requests"] += 1
+            totals["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            totals["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+    @staticmethod
+    def cost(model, totals):
+        """Cost in USD from Config.MODEL_PRICES (per million tokens), or None for unpriced models."""
+        prices = Config.MODEL_PRICES.get(model)
+        if not prices:
+            return None
+        return (totals["prompt_tokens"] * prices.get("prompt", 0)
+                + totals["completion_tokens"] * prices.get("completion", 0)) / 1e6
+
+    def stage_summary(self):
+        """Per stage: count, total/mean/p50/p95/max seconds and a histogram over power-of-two ms buckets."""
+        durations = {}
+        with self.lock:
+            for event in self.events:
+                durations.setdefault(event["name"], []).append(event["dur"] / 1e6)
+
+        summary = {}
+        for name, values in sorted(durations.items()):
+            values.sort()
+            histogram = {}
+            for value in values:
+                bucket = 2 ** max(0, math.ceil(math.log2(max(value * 1000, 1e-9))))
+                histogram[bucket] = histogram.get(bucket, 0) + 1
+            summary[name] = {
+                "count": len(values),
+                "total": sum(values),
+                "mean": sum(values) / len(values),
+                "p50": values[int(0.50 * (len(values) - 1))],
+                "p95": values[int(0.95 * (len(values) - 1))],
+                "max": values[-1],
+                "histogram_ms": {f"<={bucket}": count for bucket, count in sorted(histogram.items())}
+            }
+        return summary
+
+    def usage_summary(self):
+        with self.lock:
+            usage = {model: dict(totals) for model, totals in self.usage.items()}
+        for model, totals in usage.items():
+            totals["cost_usd"] = self.cost(model, totals)
+        return usage
+
+    def write_chrome_trace(self, path):
+        """Writes the spans in the Chrome trace event format, with the summaries under otherData."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self.lock:
+            events = [dict(event) for event in self.events]
+        # Trace viewers want integer thread ids; named lanes get one each plus a thread_name record.
+        lanes = {}
+        for event in events:
+            if isinstance(event["tid"], str):
+                lane = event["tid"]
+                if lane not in lanes:
+                    lanes[lane] = len(lanes) + 1
+                event["tid"] = lanes[lane]
+        events += [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": lane}}
+                   for lane, tid in lanes.items()]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "traceEvents": events,
+                "displayTimeUnit": "ms",
+                "otherData": {"stages": self.stage_summary(), "usage": self.usage_summary()}
+            }, f)
+
+    def print_summary(self):
+        print("\nTime per stage:")
+        print(f"  {'stage':24} {'count':>7} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for name, stats in self.stage_summary().items():
+            print(f"  {name:24} {stats['count']:7d} {stats['total']:9.2f} {stats['mean'] * 1000:9.1f} "
+                  f"{stats['p50'] * 1000:9.1f} {stats['p95'] * 1000:9.1f} {stats['max'] * 1000:9.1f}")
+            peak = max(stats["histogram_ms"].values())
+            for bucket, count in stats["histogram_ms"].items():
+                print(f"      {bucket + ' ms':>12} {'#' * max(1, round(30 * count / peak))} {count}")
+
+        usage = self.usage_summary()
+        if usage:
+            print("\nToken usage:")
+            for model, totals in usage.items():
+                cost = f"${totals['cost_usd']:.4f}" if totals["cost_usd"] is not None else "n/a"
+                print(f"  {model}: {totals['requests']} requests, {totals['prompt_tokens']} prompt + "
+                      f"{totals['completion_tokens']} completion tokens, cost {cost}")
+
+
+# Process-wide tracer used by every instrumented module.
+tracer = Tracer()
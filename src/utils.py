@@ -1,43 +1,268 @@
+import hashlib
 import json
 import re
 
-def extract_solution_code(response_content, language="python"):
-    """Tries to extract the 'solution' code from the LLM response."""
+from src.tracing import tracer
+
+
+def exercise_hash(exercise):
+    """Content hash of an exercise, stable across runs and machines."""
+    content = {key: exercise.get(key) for key in ("name", "description", "input", "output")}
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def parse_shard(spec):
+    """Parses "i/N" (0 <= i < N) into (i, N)."""
     try:
-        parsed = json.loads(response_content)
-        if isinstance(parsed, dict) and "solution" in parsed:
-            return {"solution": parsed["solution"]}
-    except Exception:
-        pass
-
-    match = re.search(r'"solution"\s*:\s*"([\s\S]*?)"\s*[\}\n]', response_content)
-    if match:
-        sol = match.group(1)
-        sol = sol.encode('utf-8').decode('unicode_escape')
-        return {"solution": sol}
-
-    match = re.search(r"def solution\(.*?\):[\s\S]+?(?=\n\S|\Z)", response_content)
-    if match:
-        return {"solution": match.group(0)}
-
-    match = re.search(rf"```{language}\n(.*?)\n```", response_content, re.DOTALL)
-    if match:
-        return {"solution": match.group(1).strip()}
-    return None
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {spec!r}, expected i/N") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard {spec!r}, expected 0 <= i < N")
+    return index, count
 
-def clean_and_parse_json(content_str, language="python"):
-    match = re.search(r"```json\n(.*?)\n```", content_str, re.DOTALL)
-    if match:
-        cleaned_str = match.group(1).strip()
-    else:
-        match = re.search(rf"```{language}\n(.*?)\n```", content_str, re.DOTALL)
-        if match:
-            return {"solution": match.group(1).strip()}
-        return None
+
+def shard_of(content_hash, count):
+    """Shard of an exercise given its exercise_hash: the same on every machine, without coordination."""
+    return int(content_hash, 16) % count
+
+
+# Markers the response scanner looks for, found with str.find, and the precompiled patterns that
+# check the text right after each marker. No pattern runs over more than the line it starts on,
+# so nothing can backtrack over the whole response.
+RESPONSE_MARKERS = {"key": '"solution"', "fence": "```", "definition": "def solution("}
+KEY_TAIL = re.compile(r'"solution"[ \t\r\n]*:[ \t\r\n]*"')
+FENCE_TAIL = re.compile(r"```[ \t]*([\w+#.-]*)[ \t]*\r?(?:\n|$)")
+DEFINITION_HEADER = re.compile(r"def solution\([^\n]*?\):")
+DEFINITION_END = re.compile(r"\n(?=\S)")
+# Body of a JSON string: anything but a quote that closes it (see scan_string). The alternatives
+# exclude each other, so the match is a single forward pass.
+STRING_BODY = re.compile(
+    r'(?:[^"\\]+|\\[\s\S]|"(?![ \t\r]*(?:[}\n]|,[ \t\r\n]*(?:[}\]]|"[^"\n]*"[ \t\r\n]*:)|$)))*'
+)
+# Strict JSON string body, for keys: the first unescaped quote closes it.
+KEY_BODY = re.compile(r'(?:[^"\\]+|\\[\s\S])*')
+VALUE_START = re.compile(r'[ \t\r\n]*:[ \t\r\n]*"')
+STRUCTURE = re.compile(r'[{}"]')
+JSON_ESCAPE = re.compile(r'\\(["\\/bfnrt]|u[0-9a-fA-F]{4})')
+JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def decode_json_string(body):
+    """
+    Decodes the body of a JSON string literal. Unlike unicode_escape it keeps non-ASCII text intact,
+    and unknown escapes such as \\d in a regex are left as written.
+    """
     try:
-        return json.loads(cleaned_str)
+        return json.loads(f'"{body}"', strict=False)
     except json.JSONDecodeError:
-        match = re.search(rf"```{language}\n(.*?)\n```", content_str, re.DOTALL)
-        if match:
-            return {"solution": match.group(1).strip()}
+        return JSON_ESCAPE.sub(lambda m: JSON_ESCAPES.get(m.group(1)) or chr(int(m.group(1)[1:], 16)), body)
+
+
+def scan_string(text, start):
+    """
+    Scans a JSON string whose body starts at `start` and returns (body, end) with end just past the
+    closing quote. LLMs often leave quotes inside code unescaped, so a quote only closes the string
+    when it is followed by '}', a line break, the end of the response, or a comma and then the next
+    key or a closing bracket.
+    """
+    end = STRING_BODY.match(text, start).end()
+    if end < len(text) and text[end] == '"':
+        return text[start:end], end + 1
+    return text[start:], len(text)
+
+
+def at_line_start(text, index):
+    while index > 0 and text[index - 1] in " \t":
+        index -= 1
+    return index == 0 or text[index - 1] == "\n"
+
+
+def scan_response(response_content, stop_at_key=True):
+    """
+    Scans an LLM response once and returns what it found:
+        "json": decoded value of the first "solution" string,
+        "definition": the first bare `def solution(...):` block,
+        "fences": {language tag: content} of the first fenced block of each language.
+    A leading <think>...</think> block is skipped. Unless stop_at_key is False, the scan stops at the
+    first "solution" string, which wins over everything else.
+    """
+    text = response_content
+    found = {"json": None, "definition": None, "fences": {}}
+    position = 0
+    if text.lstrip().startswith("<think>"):
+        end = text.find("</think>")
+        position = end + len("</think>") if end >= 0 else len(text)
+
+    upcoming = {kind: text.find(marker, position) for kind, marker in RESPONSE_MARKERS.items()}
+    fence = None  # (language tag, content start) of the open fenced block
+    while True:
+        candidates = [(index, kind) for kind, index in upcoming.items() if index >= 0]
+        if not candidates:
+            break
+        index, kind = min(candidates)
+        position = index + 1
+
+        if kind == "key":
+            match = KEY_TAIL.match(text, index)
+            if match:
+                body, position = scan_string(text, match.end())
+                if found["json"] is None:
+                    found["json"] = decode_json_string(body)
+                if stop_at_key:
+                    break
+        elif kind == "fence":
+            match = FENCE_TAIL.match(text, index)
+            if match and at_line_start(text, index):
+                if fence is None:
+                    fence = (match.group(1).lower(), match.end())
+                else:
+                    tag, start = fence
+                    found["fences"].setdefault(tag, text[start:max(start, index - 1)].strip())
+                    fence = None
+                position = match.end()
+        elif found["definition"] is None:
+            match = DEFINITION_HEADER.match(text, index)
+            if match:
+                end = DEFINITION_END.search(text, match.end() + 1)
+                found["definition"] = text[index:end.start() if end else len(text)]
+            else:
+                # No "):" on the rest of the line, so no later header on this line can match either.
+                line_end = text.find("\n", index)
+                position = line_end if line_end >= 0 else len(text)
+        else:
+            upcoming["definition"] = -1  # only the first definition is used
+
+        for other, other_index in upcoming.items():
+            if 0 <= other_index < position:
+                upcoming[other] = text.find(RESPONSE_MARKERS[other], position)
+    return found
+
+
+@tracer.traced("extract")
+def extract_solution_code(response_content, language="python"):
+    """
+    Tries to extract the 'solution' code from the LLM response, in order of preference:
+    the "solution" field of a JSON answer (bare or fenced), a bare `def solution` block, a fenced block
+    of the language. Scans the response once, so long reasoning answers stay cheap.
+    """
+    if not response_content:
         return None
+    if response_content.lstrip().startswith("{"):
+        try:
+            parsed = json.loads(response_content)
+            if isinstance(parsed, dict) and "solution" in parsed:
+                return {"solution": parsed["solution"]}
+        except ValueError:
+            pass
+
+    found = scan_response(response_content)
+    if found["json"] is not None:
+        return {"solution": found["json"]}
+    if found["definition"] is not None:
+        return {"solution": found["definition"]}
+    if language.lower() in found["fences"]:
+        return {"solution": found["fences"][language.lower()]}
+    return None
+
+
+def clean_and_parse_json(content_str, language="python"):
+    """Parses the fenced JSON block of a response, falling back to the fenced code of the language."""
+    fences = scan_response(content_str, stop_at_key=False)["fences"]
+    if "json" in fences:
+        try:
+            return json.loads(fences["json"])
+        except json.JSONDecodeError:
+            pass
+    if language.lower() in fences:
+        return {"solution": fences[language.lower()]}
+    return None
+
+
+def parse_json_answer(response_content):
+    """Parses a JSON answer given bare, in a fenced json block, or surrounded by text; None if it is malformed."""
+    text = response_content.strip()
+    if text.startswith("<think>"):
+        end = text.find("</think>")
+        text = text[end + len("</think>"):].strip() if end >= 0 else ""
+    candidates = [text, scan_response(text, stop_at_key=False)["fences"].get("json")]
+    start, end = text.find("["), text.rfind("]")
+    if 0 <= start < end:
+        candidates.append(text[start:end + 1])
+    for candidate in candidates:
+        try:
+            return json.loads(candidate) if candidate else None
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def batch_entries(response_content):
+    """
+    (exercise name, object text) of every {...} object with an "exercise" key in a possibly malformed
+    answer. Strings are skipped (values with scan_string), so braces and quotes in code do not count.
+    Objects that are never closed, as in a truncated answer, are left out.
+    """
+    text = response_content
+    position = 0
+    if text.lstrip().startswith("<think>"):
+        end = text.find("</think>")
+        position = end + len("</think>") if end >= 0 else len(text)
+    entries = []
+    opened = []  # [start, exercise name] of each object not closed yet, innermost last
+    while True:
+        match = STRUCTURE.search(text, position)
+        if not match:
+            break
+        index = match.start()
+        position = index + 1
+        if match.group() == "{":
+            opened.append([index, None])
+        elif match.group() == "}":
+            if opened:
+                start, name = opened.pop()
+                if name is not None:
+                    entries.append((name, text[start:position]))
+        else:
+            key_end = KEY_BODY.match(text, position).end()
+            value = VALUE_START.match(text, key_end + 1) if key_end < len(text) else None
+            if value is None:
+                position = key_end + 1
+                continue
+            body, position = scan_string(text, value.end())
+            if opened and opened[-1][1] is None and text[index + 1:key_end] == "exercise":
+                opened[-1][1] = decode_json_string(body)
+    return entries
+
+
+@tracer.traced("extract")
+def extract_batch_solutions(response_content, names, language="python"):
+    """
+    Splits the answer to a batched prompt into {exercise name: solution}, for the names asked for.
+    The answer should be a JSON array of {"exercise", "solution"} objects (a {name: solution} object is
+    accepted too). When it is malformed, the "solution" of each object with an "exercise" key is looked
+    for inside that object only, so one broken solution only loses that entry. Missing, malformed and
+    unterminated entries are left out.
+    """
+    if not response_content:
+        return {}
+    names = set(names)
+    solutions = {}
+    parsed = parse_json_answer(response_content)
+    if isinstance(parsed, dict) and isinstance(parsed.get("solutions"), list):
+        parsed = parsed["solutions"]
+    if isinstance(parsed, list):
+        for entry in parsed:
+            if isinstance(entry, dict) and entry.get("exercise") in names and isinstance(entry.get("solution"), str):
+                solutions.setdefault(entry["exercise"], entry["solution"])
+    elif isinstance(parsed, dict):
+        solutions = {name: code for name, code in parsed.items() if name in names and isinstance(code, str)}
+
+    if len(solutions) < len(names):
+        for name, entry in batch_entries(response_content):
+            if name in names and name not in solutions:
+                code = scan_response(entry)["json"]
+                if code is not None:
+                    solutions[name] = code
+    return {name: code for name, code in solutions.items() if code.strip()}
@@ -0,0 +1,356 @@
+import fcntl
+import json
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+
+class ResultsWarehouse:
+    """
+    Append-only columnar store of per-test results across runs.
+    Every ingested run adds one chunk, an uncompressed .npz file with one NumPy array per column and one
+    row per test. The run, exercise, model, language and status columns hold integer codes into the
+    dictionaries of dictionaries.json, so aggregations never parse JSON or compare strings.
+
+        directory/dictionaries.json   {"run": [...], "exercise": [hashes], "exercise_name": [...], ...}
+        directory/chunks/000001.npz   run, exercise, model, language, status, test, passed,
+                                      exercise_passed, elapsed
+    """
+    DICTIONARY_COLUMNS = ("run", "exercise", "model", "language", "status")
+    DIMENSIONS = ("run", "model", "language", "exercise", "status", "test")
+    RELATIVE_RUN = re.compile(r"last(?:~(\d+))?")  # "last", or "last~N" for N runs before it
+    DENSE_GROUPS = 1 << 24  # largest key space grouped with a counting pass instead of a sort
+    DTYPES = {
+        "run": np.int32, "exercise": np.int32, "model": np.int32, "language": np.int32, "status": np.int32,
+        "test": np.int32, "passed": np.bool_, "exercise_passed": np.bool_, "elapsed": np.float32
+    }
+
+    def __init__(self, directory="results/warehouse"):
+        self.directory = directory
+        self.chunks_dir = os.path.join(directory, "chunks")
+        self.dictionaries_path = os.path.join(directory, "dictionaries.json")
+        self.dictionaries = None
+        self.cache = {}  # column name -> concatenated array, for the queries of one process
+
+    def writer_lock(self):
+        """Exclusive lock on a sidecar file, so runs finishing at the same time append one after the other."""
+        os.makedirs(self.directory, exist_ok=True)
+        lock_file = open(os.path.join(self.directory, ".lock"), "a")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file  # closing it releases the lock
+
+    def load_dictionaries(self):
+        if self.dictionaries is None:
+            try:
+                with open(self.dictionaries_path, "r", encoding="utf-8") as f:
+                    self.dictionaries = json.load(f)
+            except IOError:
+                self.dictionaries = {}
+            for column in self.DICTIONARY_COLUMNS + ("exercise_name", "run_started"):
+                self.dictionaries.setdefault(column, [])
+        return self.dictionaries
+
+    def write_atomically(self, path, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def save_dictionaries(self):
+        payload = json.dumps(self.dictionaries, ensure_ascii=False).encode("utf-8")
+        self.write_atomically(self.dictionaries_path, lambda f: f.write(payload))
+
+    def encode(self, column, values):
+        """Integer codes of values in the dictionary of column, adding the values not seen before."""
+        dictionary = self.load_dictionaries()[column]
+        codes = {value: code for code, value in enumerate(dictionary)}
+        encoded = np.empty(len(values), dtype=self.DTYPES[column])
+        for index, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(dictionary)
+                dictionary.append(value)
+            encoded[index] = code
+        return encoded
+
+    def chunks(self):
+        if not os.path.isdir(self.chunks_dir):
+            return []
+        return sorted(os.path.join(self.chunks_dir, name) for name in os.listdir(self.chunks_dir)
+                      if name.endswith(".npz"))
+
+    def write_chunk(self, columns):
+        existing = self.chunks()
+        number = int(os.path.basename(existing[-1])[:-len(".npz")]) + 1 if existing else 1
+        path = os.path.join(self.chunks_dir, f"{number:06d}.npz")
+        self.write_atomically(path, lambda f: np.savez(f, **columns))
+        self.cache.clear()
+        return path
+
+    def ingest(self, records, run=None):
+        """
+        Appends the per-test rows of the result records of one run (as written by OutputManager) and
+        returns (number of rows, run name). `run` names the run, by default after the current time; a
+        name already in the warehouse gets a numeric suffix, so two runs are never mixed up.
+        """
+        run = run or time.strftime("%Y%m%d-%H%M%S")
+        rows = {name: [] for name in ("exercise", "model", "language", "status", "test", "passed",
+                                      "exercise_passed", "elapsed")}
+        names = {}
+        for record in records:
+            content_hash = record.get("exercise_hash") or record.get("exercise")
+            names[content_hash] = record.get("exercise")
+            tests = record.get("test_results") or [{"status": "no_tests", "success": False}]
+            passed = record.get("passed", all(result.get("success") for result in tests))
+            for index, result in enumerate(tests):
+                rows["exercise"].append(content_hash)
+                rows["model"].append(record.get("model") or "unknown")
+                rows["language"].append(record.get("language") or "unknown")
+                rows["status"].append(result.get("status") or ("ok" if "output" in result else "error"))
+                rows["test"].append(index)
+                rows["passed"].append(bool(result.get("success")))
+                rows["exercise_passed"].append(bool(passed))
+                rows["elapsed"].append(record.get("elapsed_time") or 0.0)
+        if not rows["exercise"]:
+            return 0, run
+
+        with self.writer_lock():
+            self.dictionaries = None  # another run may have added values since they were read
+            dictionaries = self.load_dictionaries()
+            name, suffix = run, 1
+            while run in dictionaries["run"]:
+                suffix += 1
+                run = f"{name}.{suffix}"
+            columns = {"run": self.encode("run", [run] * len(rows["exercise"]))}
+            dictionaries["run_started"].append(time.time())
+            for column in ("exercise", "model", "language", "status"):
+                columns[column] = self.encode(column, rows[column])
+            exercise_names = dictionaries["exercise_name"]
+            exercise_names.extend([None] * (len(dictionaries["exercise"]) - len(exercise_names)))
+            for content_hash, code in zip(rows["exercise"], columns["exercise"]):
+                exercise_names[code] = names[content_hash]
+            for column in ("test", "passed", "exercise_passed", "elapsed"):
+                columns[column] = np.asarray(rows[column], dtype=self.DTYPES[column])
+
+            # The dictionaries go first: a chunk must never hold codes they do not know.
+            self.save_dictionaries()
+            self.write_chunk(columns)
+        return len(rows["exercise"]), run
+
+    def ingest_results_file(self, path, run=None):
+        """Imports a results file of an earlier run (output_llm_results.json or its JSONL sink)."""
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                records = [json.loads(line) for line in f if line.strip()]
+            else:
+                records = json.load(f).get("results", [])
+        run = run or time.strftime("%Y%m%d-%H%M%S", time.localtime(os.path.getmtime(path)))
+        return self.ingest(records, run)
+
+    def columns(self, names):
+        """Concatenated arrays of the given columns over every chunk."""
+        missing = [name for name in names if name not in self.cache]
+        if missing:
+            parts = {name: [] for name in missing}
+            for path in self.chunks():
+                with np.load(path) as chunk:
+                    for name in missing:
+                        parts[name].append(chunk[name])
+            for name in missing:
+                self.cache[name] = np.concatenate(parts[name]) if parts[name] else np.empty(0, self.DTYPES[name])
+        return {name: self.cache[name] for name in names}
+
+    def compact(self):
+        """Rewrites every chunk as a single one, so queries open one file."""
+        with self.writer_lock():
+            paths = self.chunks()
+            if len(paths) < 2:
+                return len(paths)
+            self.cache.clear()
+            columns = self.columns(list(self.DTYPES))
+            self.write_chunk(dict(columns))
+            for path in paths:
+                os.remove(path)
+        return len(paths)
+
+    def mask(self, filters):
+        """Boolean row mask for {column: value}; runs may also be given as "last" or "last~N"."""
+        columns = self.columns(list(filters))
+        mask = None
+        for column, value in filters.items():
+            if column == "test":
+                selected = columns[column] == int(value)
+            else:
+                selected = columns[column] == self.code(column, value)
+            mask = selected if mask is None else mask & selected
+        if mask is None:
+            mask = np.ones(len(self.columns(["run"])["run"]), dtype=bool)
+        return mask
+
+    def code(self, column, value):
+        """Dictionary code of a value, or -1 when it never occurs."""
+        dictionary = self.load_dictionaries()[column]
+        relative = self.RELATIVE_RUN.fullmatch(value) if column == "run" else None
+        if relative:
+            back = int(relative.group(1) or 0)
+            return len(dictionary) - 1 - back if back < len(dictionary) else -1
+        if column == "exercise" and value not in dictionary:
+            names = self.dictionaries["exercise_name"]
+            return names.index(value) if value in names else -1
+        return dictionary.index(value) if value in dictionary else -1
+
+    def group(self, by, mask):
+        """Group index of every selected row, the dimension codes of every group and the number of groups."""
+        columns = self.columns(list(by))
+        if not by:
+            return np.zeros(int(mask.sum()), dtype=np.int64), {}, 1
+        # Codes are small integers, so the dimensions combine into one mixed-radix key.
+        values = [columns[column][mask].astype(np.int64) for column in by]
+        sizes = [int(value.max(initial=0)) + 1 for value in values]
+        key = np.zeros(len(values[0]), dtype=np.int64)
+        for value, size in zip(values, sizes):
+            key = key * size + value
+        if np.prod(sizes, dtype=np.float64) <= self.DENSE_GROUPS:
+            # Counting sort: one pass over the rows instead of sorting them.
+            present = np.flatnonzero(np.bincount(key))
+            index = np.zeros(int(present[-1]) + 1 if len(present) else 0, dtype=np.int64)
+            index[present] = np.arange(len(present))
+            inverse = index[key]
+        else:
+            present, inverse = np.unique(key, return_inverse=True)
+        groups, dimensions = len(present), {}
+        for column, size in zip(reversed(by), reversed(sizes)):
+            present, dimensions[column] = np.divmod(present, size)
+        return inverse, dimensions, groups
+
+    def labels(self, column, codes):
+        if column == "test":
+            return [int(code) for code in codes]
+        dictionary = self.load_dictionaries()["exercise_name" if column == "exercise" else column]
+        return [dictionary[code] for code in codes]
+
+    def rows(self, by, dimensions, **metrics):
+        """Turns grouped arrays into a list of dicts, one per group."""
+        labels = {column: self.labels(column, dimensions[column]) for column in by}
+        count = len(next(iter(metrics.values())))
+        rows = []
+        for index in range(count):
+            row = {column: labels[column][index] for column in by}
+            row.update({name: values[index].item() for name, values in metrics.items()})
+            rows.append(row)
+        return rows
+
+    def pass_rate(self, by=(), filters=None, level="test"):
+        """
+        Pass rate per group: of single tests, or with level="exercise" of exercises (all tests passed).
+        Exercise-level rows are the first test row of every exercise of every run.
+        """
+        mask = self.mask(filters or {})
+        if level == "exercise":
+            mask &= self.columns(["test"])["test"] == 0
+            passed = self.columns(["exercise_passed"])["exercise_passed"][mask]
+        else:
+            passed = self.columns(["passed"])["passed"][mask]
+        inverse, dimensions, groups = self.group(by, mask)
+        totals = np.bincount(inverse, minlength=groups)
+        passes = np.bincount(inverse, weights=passed, minlength=groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = np.where(totals > 0, passes / np.maximum(totals, 1), 0.0)
+        return self.rows(by, dimensions, total=totals, passed=passes.astype(np.int64), pass_rate=rates)
+
+    def latency(self, by=(), filters=None, percentiles=(50, 95, 99)):
+        """Percentiles of the per-exercise elapsed time (LLM request and tests) per group, in seconds."""
+        mask = self.mask(filters or {}) & (self.columns(["test"])["test"] == 0)
+        values = self.columns(["elapsed"])["elapsed"][mask].astype(np.float64)
+        inverse, dimensions, groups = self.group(by, mask)
+        if not len(values):
+            return []
+        counts = np.bincount(inverse, minlength=groups)
+        order = np.lexsort((values, inverse))
+        ordered = values[order]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        metrics = {"count": counts, "mean": np.bincount(inverse, weights=values) / np.maximum(counts, 1)}
+        for percentile in percentiles:
+            # Linear interpolation between the closest ranks, as numpy.percentile does.
+            position = (counts - 1) * percentile / 100.0
+            low = np.floor(position).astype(np.int64)
+            high = np.minimum(low + 1, counts - 1)
+            fraction = position - low
+            metrics[f"p{percentile:g}"] = (ordered[starts + low] * (1 - fraction)
+                                         + ordered[starts + high] * fraction)
+        return self.rows(by, dimensions, **metrics)
+
+    def regressions(self, baseline="last~1", candidate="last", by=(), filters=None):
+        """
+        Compares two runs exercise by exercise (same exercise, model and language) and returns, per
+        group, how many were compared, how many passed in the baseline and fail in the candidate
+        (regressions), the reverse (fixes), and the regressed exercises.
+        """
+        filters = {key: value for key, value in (filters or {}).items() if key != "run"}
+        first_test = self.columns(["test"])["test"] == 0
+        sides = []
+        for run in (baseline, candidate):
+            mask = self.mask({**filters, "run": run}) & first_test
+            columns = self.columns(["exercise", "model", "language", "exercise_passed"])
+            key = (columns["exercise"][mask].astype(np.int64) * (len(self.dictionaries["model"]) + 1)
+                   + columns["model"][mask]) * (len(self.dictionaries["language"]) + 1) + columns["language"][mask]
+            sides.append((key, columns["exercise_passed"][mask], np.flatnonzero(mask)))
+
+        (old_key, old_passed, _), (new_key, new_passed, new_rows) = sides
+        _, old_index, new_index = np.intersect1d(old_key, new_key, return_indices=True)
+        regressed = old_passed[old_index] & ~new_passed[new_index]
+        fixed = ~old_passed[old_index] & new_passed[new_index]
+
+        mask = np.zeros(len(first_test), dtype=bool)
+        rows = new_rows[new_index]
+        mask[rows] = True
+        # Group the compared rows in row order, so the metrics line up with the groups.
+        order = np.argsort(rows)
+        regressed, fixed = regressed[order], fixed[order]
+        inverse, dimensions, groups = self.group(by, mask)
+        result = self.rows(by, dimensions, compared=np.bincount(inverse, minlength=groups),
+                           regressions=np.bincount(inverse, weights=regressed, minlength=groups).astype(np.int64),
+                           fixes=np.bincount(inverse, weights=fixed, minlength=groups).astype(np.int64))
+        names = self.labels("exercise", self.columns(["exercise"])["exercise"][np.sort(rows)][regressed])
+        for row in result:
+            row["regressed"] = set()
+        for name, group in zip(names, inverse[regressed]):
+            result[group]["regressed"].add(name)
+        for row in result:
+            row["regressed"] = sorted(row["regressed"], key=str)
+        return result
+
+    def runs(self):
+        """Every run with its number of test rows, exercises and start time."""
+        dictionaries = self.load_dictionaries()
+        columns = self.columns(["run", "test"])
+        rows_per_run = np.bincount(columns["run"], minlength=len(dictionaries["run"]))
+        exercises_per_run = np.bincount(columns["run"][columns["test"] == 0], minlength=len(dictionaries["run"]))
+        return [{"run": run, "tests": int(rows_per_run[code]), "exercises": int(exercises_per_run[code]),
+                 "ingested": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started))}
+                for code, (run, started) in enumerate(zip(dictionaries["run"], dictionaries["run_started"]))]
+
+
+def format_table(rows):
+    """Plain-text table of a list of dicts with the same keys."""
+    if not rows:
+        return "(no rows)"
+    headers = list(rows[0])
+
+    def cell(value):
+        if isinstance(value, float):
+            return f"{value:.4f}"
+        if isinstance(value, list):
+            return ", ".join(map(str, value[:5])) + (f" (+{len(value) - 5})" if len(value) > 5 else "")
+        return str(value)
+
+    cells = [[cell(row[header]) for header in headers] for row in rows]
+    widths = [max(len(header), *(len(line[index]) for line in cells)) for index, header in enumerate(headers)]
+    lines = ["  ".join(header.ljust(width) for header, width in zip(headers, widths)),
+             "  ".join("-" * width for width in widths)]
+    lines += ["  ".join(value.ljust(width) for value, width in zip(line, widths)) for line in cells]
+    return "\n".join(lines)
@@ -0,0 +1,372 @@
+import base64
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import re
+import resource
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class WorkerError(Exception):
+    """Raised when a worker crashes or does not answer in time."""
+
+
+class WorkerTimeout(WorkerError):
+    """Raised when a worker does not answer within the job timeout."""
+
+
+class CpuLimitExceeded(BaseException):
+    """Raised inside a worker on SIGXCPU; a BaseException so solutions cannot swallow it."""
+
+
+class PythonWorker:
+    """
+    Forked Python process that receives solutions and test inputs over a pipe.
+    memory_limit (bytes) caps the worker's address space, cpu_limit (seconds) caps the CPU time of each test.
+    """
+    def __init__(self, memory_limit=None, cpu_limit=None):
+        self.start(python_worker_main, memory_limit, cpu_limit)
+
+    def start(self, target, *args):
+        methods = multiprocessing.get_all_start_methods()
+        # forkserver forks from a clean single-threaded server, which is safe while the pipeline runs threads.
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=target, args=(child_conn,) + args, daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def request(self, job, timeout):
+        try:
+            self.conn.send(job)
+            if not self.conn.poll(timeout):
+                raise WorkerTimeout(f"Timed out after {timeout} seconds")
+            return self.conn.recv()
+        except (EOFError, OSError) as e:
+            self.process.join(1)
+            raise WorkerError(f"{type(self).__name__} crashed (exit code {self.process.exitcode}): {e}")
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def stop(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+def python_worker_main(conn, memory_limit=None, cpu_limit=None):
+    """Entry point of a Python worker: answer jobs until the pipe is closed."""
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    if cpu_limit:
+        signal.signal(signal.SIGXCPU, raise_cpu_limit)
+
+    code_cache = OrderedDict()
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        result = run_python_job(job, code_cache, cpu_limit)
+        try:
+            conn.send(result)
+        except Exception as e:
+            conn.send({"status": "error", "error": f"Unable to return the output: {str(e)}"})
+
+
+def raise_cpu_limit(signum, frame):
+    raise CpuLimitExceeded()
+
+
+def set_cpu_limit(seconds):
+    """Sets the soft CPU limit `seconds` past the CPU time used so far (None lifts it)."""
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = resource.RLIM_INFINITY
+    if seconds is not None:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    # Only the soft limit moves: an unprivileged process cannot raise its hard limit again.
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def load_code(job, code_cache, max_entries=128):
+    """Compiles a solution once per source hash and keeps the code objects in an LRU cache."""
+    key = job.get("code_hash") or hashlib.sha256(job["code"].encode("utf-8")).hexdigest()
+    code = code_cache.get(key)
+    if code is None:
+        code = compile(job["code"], "<solution>", "exec")
+        code_cache[key] = code
+        if len(code_cache) > max_entries:
+            code_cache.popitem(last=False)
+    else:
+        code_cache.move_to_end(key)
+    return code
+
+
+def run_python_job(job, code_cache, cpu_limit=None):
+    """Runs one test input against a solution inside the worker."""
+    global_scope = {}
+    try:
+        if cpu_limit:
+            set_cpu_limit(cpu_limit)
+        try:
+            exec(load_code(job, code_cache), global_scope)
+            function_name = [name for name in global_scope if callable(global_scope[name])][0]
+        except MemoryError:
+            return {"status": "memory_limit", "error": "Memory limit exceeded while loading the solution"}
+        except Exception as e:
+            return {"status": "load_error", "error": f"Python execution failed: {str(e)}"}
+
+        test_input = job["input"]
+        try:
+            if isinstance(test_input, (list, tuple)):
+                output = global_scope[function_name](*test_input)
+            else:
+                output = global_scope[function_name](test_input)
+            return {"status": "ok", "output": output}
+        except MemoryError:
+            return {"status": "memory_limit", "error": "Memory limit exceeded"}
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+    except CpuLimitExceeded:
+        return {"status": "timeout", "error": f"CPU time limit of {cpu_limit} seconds exceeded"}
+    finally:
+        global_scope.clear()
+        if cpu_limit:
+            set_cpu_limit(None)
+
+
+class JavaScriptWorker(PythonWorker):
+    """
+    Forked process with its own SpiderMonkey runtime, so a runaway solution can be killed on timeout.
+    PythonMonkey is only imported inside the worker.
+    """
+    def __init__(self):
+        self.start(javascript_worker_main)
+
+
+def javascript_worker_main(conn):
+    """Entry point of a JavaScript worker: answer batch jobs until the pipe is closed."""
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        conn.send(run_javascript_job(job))
+
+
+JAVASCRIPT_BATCH_RUNNER = """
+(function () {
+%(code)s
+;
+    return function (inputsJson, timeoutMs) {
+        var entryPoint = (typeof solution === "function") ? solution
+            : (typeof %(name)s === "function") ? %(name)s : undefined;
+        if (entryPoint === undefined) {
+            throw new Error("Function %(name)s is not defined");
+        }
+        var deadline = Date.now() + timeoutMs;
+        return JSON.stringify(JSON.parse(inputsJson).map(function (args) {
+            if (Date.now() > deadline) {
+                return {status: "timeout", error: "Timed out after " + timeoutMs + " ms"};
+            }
+            try {
+                var output = entryPoint.apply(null, args);
+                return {status: "ok", output: output === undefined ? null : output};
+            } catch (e) {
+                return {status: "error", error: String(e)};
+            }
+        }));
+    };
+})()
+"""
+
+
+def run_javascript_job(job):
+    """
+    Evaluates a solution inside a fresh function scope, so definitions never leak between exercises,
+    and runs every test input in a single JS call. Returns one {"status", "output"|"error"} per input,
+    or a single {"status": "load_error"} when the solution cannot be evaluated.
+    """
+    from pythonmonkey import eval as js_eval
+
+    code = job["code"]
+    match = re.search(r"function\s+([A-Za-z_$][\w$]*)\s*\(", code) or \
+        re.search(r"(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=", code)
+    function_name = match.group(1) if match else "solution"
+    args_list = [list(test_input) if isinstance(test_input, (list, tuple)) else [test_input]
+                 for test_input in job["inputs"]]
+    try:
+        runner = js_eval(JAVASCRIPT_BATCH_RUNNER % {"code": code, "name": function_name})
+        return json.loads(runner(json.dumps(args_list), int(job["timeout"] * 1000)))
+    except Exception as e:
+        return [{"status": "load_error", "error": f"JavaScript execution failed: {str(e)}"}]
+
+
+class JavaWorker:
+    """Warm JVM running CertamenWorker, which loads each compiled solution with a fresh class loader."""
+    JAVA_SOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "java")
+    support_dir = None
+    support_lock = threading.Lock()
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            ["java", "-cp", JavaWorker.compile_support_classes(), "CertamenWorker"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding="utf-8", bufsize=1
+        )
+        self.lines = queue.Queue()
+        self.dirty = False
+        # A reader thread lets request() wait on the JVM's output with a timeout.
+        threading.Thread(target=self.read_output, daemon=True).start()
+
+    @staticmethod
+    def compile_support_classes():
+        """Compiles the harness and worker classes once per process."""
+        with JavaWorker.support_lock:
+            if JavaWorker.support_dir is None:
+                support_dir = tempfile.mkdtemp(prefix="certamen-java-worker-")
+                sources = [shutil.copy(os.path.join(JavaWorker.JAVA_SOURCES, name), support_dir)
+                           for name in ("CertamenHarness.java", "CertamenWorker.java")]
+                subprocess.run(["javac"] + sources, check=True, cwd=support_dir)
+                JavaWorker.support_dir = support_dir
+            return JavaWorker.support_dir
+
+    def read_output(self):
+        for line in self.process.stdout:
+            self.lines.put(line)
+        self.lines.put(None)
+
+    def request(self, job, timeout):
+        """
+        Sends a compiled class and its cases; returns the harness record of each case run, which stops
+        after the first timed out case.
+        """
+        cases = job["cases"]
+        header = " ".join([
+            base64.b64encode(job["class_dir"].encode("utf-8")).decode("ascii"),
+            job["class_name"],
+            str(int(job["case_timeout"] * 1000)),
+            str(len(cases))
+        ])
+        try:
+            self.process.stdin.write("\n".join([header] + cases) + "\n")
+            self.process.stdin.flush()
+        except OSError as e:
+            raise WorkerError(f"Java worker crashed: {e}")
+
+        records = {}
+        while len(records) < len(cases):
+            try:
+                line = self.lines.get(timeout=timeout)
+            except queue.Empty:
+                raise WorkerTimeout(f"Timed out after {timeout} seconds")
+            if line is None:
+                raise WorkerError(f"Java worker exited with code {self.process.wait()}")
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # stray output from a runaway solution thread
+            if isinstance(record, dict) and "case" in record and "status" in record:
+                records[record["case"]] = record
+                if record["status"] == "timeout":
+                    # The worker stops the job here: the case's thread is still spinning inside this
+                    # JVM, so it must not take more jobs either.
+                    self.dirty = True
+                    break
+        return records
+
+    def alive(self):
+        return self.process.poll() is None and not self.dirty
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+
+WORKER_CLASSES = {
+    "python": PythonWorker,
+    "javascript": JavaScriptWorker,
+    "java": JavaWorker
+}
+
+
+class WorkerPool:
+    """
+    Keeps up to `size` warm workers for one language.
+    Workers are started lazily, recycled after `max_jobs` jobs and replaced when they crash or time out.
+    """
+    def __init__(self, worker_class, size=None, max_jobs=100, **worker_options):
+        self.worker_class = worker_class
+        self.worker_options = worker_options
+        self.size = size or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self.dispatcher = ThreadPoolExecutor(max_workers=self.size)
+        # Idle slots: [worker, jobs done], or None for a free slot whose worker must be (re)started.
+        self.idle = queue.Queue()
+        for _ in range(self.size):
+            self.idle.put(None)
+        self.closed = False
+
+    def checkout(self):
+        slot = self.idle.get()
+        if slot is None:
+            try:
+                slot = [self.worker_class(**self.worker_options), 0]
+            except Exception:
+                self.idle.put(None)
+                raise
+        return slot
+
+    def checkin(self, slot, recycle):
+        worker, jobs = slot
+        if recycle or self.closed or jobs >= self.max_jobs or not worker.alive():
+            worker.stop()
+            slot = None
+        self.idle.put(slot)
+
+    def run(self, job, timeout):
+        """Runs a job on an idle worker and returns its answer, raising WorkerError on crashes and timeouts."""
+        slot = self.checkout()
+        recycle = True
+        try:
+            result = slot[0].request(job, timeout)
+            slot[1] += 1
+            recycle = False
+            return result
+        finally:
+            self.checkin(slot, recycle)
+
+    def run_many(self, jobs, timeout):
+        """Runs jobs in parallel across the workers; returns answers in order, or the WorkerError raised."""
+        def run_one(job):
+            try:
+                return self.run(job, timeout)
+            except WorkerError as e:
+                return e
+        return list(self.dispatcher.map(run_one, jobs))
+
+    def close(self):
+        """Stops the idle workers; busy ones are stopped when they are checked back in."""
+        self.closed = True
+        self.dispatcher.shutdown(wait=False)
+        while True:
+            try:
+                slot = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if slot is not None:
+                slot[0].stop()
@@ -0,0 +1,79 @@
+"""Tests for the eviction and failure records of the compile cache."""
+import os
+import time
+
+import pytest
+
+from src.compile_cache import CompileCache
+
+
+def build(tmp_path, name, size):
+    build_dir = tmp_path / f"build-{name}"
+    build_dir.mkdir()
+    (build_dir / "Main.class").write_bytes(b"x" * size)
+    return str(build_dir)
+
+
+def age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CompileCache(str(tmp_path / "cache"), max_bytes=250, min_age=60)
+
+
+def test_put_and_get(tmp_path, cache):
+    path = cache.put("a", build(tmp_path, "a", 10), [".class"])
+    assert cache.get("a") == path
+    assert os.listdir(path) == ["Main.class"]
+    assert cache.get("b") is None
+
+
+def test_evicts_least_recently_used(tmp_path, cache):
+    first = cache.put("a", build(tmp_path, "a", 100), [".class"])
+    second = cache.put("b", build(tmp_path, "b", 100), [".class"])
+    age(first, 3600)
+    age(second, 1800)
+    cache.put("c", build(tmp_path, "c", 100), [".class"])
+    assert cache.get("a") is None
+    assert cache.get("b") and cache.get("c")
+    assert cache.total_bytes == 200
+
+
+def test_recently_handed_out_paths_are_not_evicted(tmp_path, cache):
+    first = cache.put("a", build(tmp_path, "a", 100), [".class"])
+    second = cache.put("b", build(tmp_path, "b", 100), [".class"])
+    age(first, 3600)
+    age(second, 3600)
+    assert cache.get("a") == first  # handed out again, maybe still running
+    cache.put("c", build(tmp_path, "c", 100), [".class"])
+    assert os.path.isdir(first)
+    assert cache.get("b") is None
+
+
+def test_over_the_limit_while_everything_is_in_use(tmp_path, cache):
+    for key in "abc":
+        cache.put(key, build(tmp_path, key, 100), [".class"])
+    assert all(cache.get(key) for key in "abc")
+    assert cache.total_bytes == 300
+
+
+def test_failures_are_recorded(cache):
+    assert cache.get_failure("a") is None
+    cache.put_failure("a", "error: missing ;")
+    assert cache.get_failure("a") == "error: missing ;"
+    cache.put_failure("a", "error: again")
+    assert cache.get_failure("a") == "error: again"
+    assert os.listdir(cache.failures_dir) == ["a.txt"]
+    assert cache.total_bytes == len("error: again")
+
+
+def test_failures_count_towards_the_limit(tmp_path, cache):
+    for index in range(5):
+        cache.put_failure(str(index), "e" * 100)
+        age(os.path.join(cache.failures_dir, f"{index}.txt"), 3600 - index)
+    assert cache.total_bytes <= 250
+    assert sorted(os.listdir(cache.failures_dir)) == ["3.txt", "4.txt"]
+    assert CompileCache(cache.directory).total_bytes == cache.total_bytes
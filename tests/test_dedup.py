@@ -0,0 +1,66 @@
+"""Tests for the exact and near-duplicate detection of generated exercises."""
+import pytest
+
+from src.dedup import MinHashDeduplicator, normalize_text
+
+DESCRIPTION = ("Write a function that takes a list of integers and returns the sum of the even numbers "
+               "in the list, or zero when the list has no even numbers at all")
+
+
+def test_normalize_text():
+    assert normalize_text("  Sum the EVEN numbers, please!\n") == "sum the even numbers please"
+
+
+def test_first_occurrence_is_not_a_duplicate():
+    deduplicator = MinHashDeduplicator()
+    assert not deduplicator.is_duplicate(DESCRIPTION)
+    assert deduplicator.is_duplicate(DESCRIPTION)
+
+
+@pytest.mark.parametrize("variant", [
+    DESCRIPTION.upper(),
+    DESCRIPTION.replace(" ", "   ") + ".",
+    DESCRIPTION.replace(",", ";"),
+], ids=["case", "whitespace-punctuation", "punctuation"])
+def test_trivial_rewordings_are_exact_duplicates(variant):
+    deduplicator = MinHashDeduplicator()
+    deduplicator.is_duplicate(DESCRIPTION)
+    assert deduplicator.is_duplicate(variant)
+
+
+def test_near_duplicate_is_detected():
+    deduplicator = MinHashDeduplicator(threshold=0.7)
+    deduplicator.is_duplicate(DESCRIPTION)
+    assert deduplicator.is_duplicate(DESCRIPTION.replace("at all", "whatsoever"))
+
+
+def test_different_texts_are_kept():
+    deduplicator = MinHashDeduplicator()
+    texts = [
+        DESCRIPTION,
+        "Write a function that reverses a string without using slicing or the reversed builtin",
+        "Given a binary tree, return the values of its nodes level by level from left to right",
+        "Return the number of vowels in a sentence, counting upper and lower case letters alike",
+    ]
+    assert [deduplicator.is_duplicate(text) for text in texts] == [False] * len(texts)
+
+
+def test_short_texts():
+    deduplicator = MinHashDeduplicator()
+    assert not deduplicator.is_duplicate("add")
+    assert not deduplicator.is_duplicate("add two")
+    assert deduplicator.is_duplicate("Add two!")
+
+
+def test_signatures_are_stable_across_instances():
+    words = normalize_text(DESCRIPTION).split()
+    first, second = MinHashDeduplicator(), MinHashDeduplicator()
+    assert first.signature(first.shingles(words)) == second.signature(second.shingles(words))
+
+
+def test_signature_similarity_estimates_jaccard_similarity():
+    deduplicator = MinHashDeduplicator(num_perm=256, bands=64)
+    first = {f"shingle {index}" for index in range(100)}
+    second = {f"shingle {index}" for index in range(50, 150)}  # Jaccard similarity 1/3
+    matches = sum(a == b for a, b in zip(deduplicator.signature(first), deduplicator.signature(second)))
+    assert abs(matches / 256 - 1 / 3) < 0.1
@@ -0,0 +1,73 @@
+"""Tests for the SQLite exercise store."""
+import json
+
+import pytest
+
+from src.exercise_store import ExerciseStore
+from src.utils import exercise_hash
+
+
+def exercise(index, topic="loops", difficulty="easy"):
+    return {"name": f"ex{index}", "description": f"exercise {index}", "input": [[index, "é"]],
+            "output": [{"value": index}], "topic": topic, "difficulty": difficulty}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ExerciseStore(str(tmp_path / "db" / "exercises.db"))
+    yield store
+    store.close()
+
+
+def test_insert_and_load(store):
+    exercises = [exercise(index) for index in range(5)]
+    assert store.add_exercises(exercises, batch="b1") == 5
+    assert store.count() == 5
+    assert list(store.iter_exercises()) == exercises
+
+
+def test_duplicates_are_skipped_by_content_hash(store):
+    assert store.add_exercises([exercise(0), exercise(1)]) == 2
+    assert store.add_exercises([exercise(1), exercise(2), exercise(2)]) == 1
+    renamed_topic = exercise(0, topic="recursion")  # the topic is not part of the content hash
+    assert store.add_exercises([renamed_topic]) == 0
+    assert [item["name"] for item in store.iter_exercises()] == ["ex0", "ex1", "ex2"]
+    assert list(store.iter_hashes()) == [exercise_hash(exercise(index)) for index in range(3)]
+
+
+def test_optional_columns(store):
+    plain = {"name": "plain", "description": "no topic", "input": [1], "output": [2]}
+    store.add_exercises([plain])
+    assert list(store.iter_exercises()) == [plain]
+
+
+def test_filters_and_limit(store):
+    store.add_exercises([exercise(0), exercise(1, topic="recursion")], batch="b1")
+    store.add_exercises([exercise(2, difficulty="hard"), exercise(3, topic="recursion")], batch="b2")
+    assert [item["name"] for item in store.iter_exercises({"topic": "recursion"})] == ["ex1", "ex3"]
+    assert [item["name"] for item in store.iter_exercises({"batch": "b2", "difficulty": "hard"})] == ["ex2"]
+    assert store.count({"batch": "b1"}) == 2
+    assert store.count(limit=3) == 3
+    assert [item["name"] for item in store.iter_exercises(limit=2, chunk_size=1)] == ["ex0", "ex1"]
+    assert list(store.iter_hashes({"name": "ex3"})) == [exercise_hash(exercise(3, topic="recursion"))]
+
+
+def test_unknown_filter(store):
+    with pytest.raises(ValueError, match="color"):
+        store.count({"color": "red"})
+
+
+def test_import_json(tmp_path, store):
+    path = tmp_path / "generated_exercises.json"
+    path.write_text(json.dumps([exercise(0), exercise(1), exercise(0)]), encoding="utf-8")
+    assert store.import_json(str(path)) == 2
+    assert store.import_json(str(path)) == 0
+    assert store.count({"batch": "generated_exercises.json"}) == 2
+
+
+def test_exercises_persist(tmp_path, store):
+    store.add_exercises([exercise(0)])
+    store.close()
+    reopened = ExerciseStore(store.path)
+    assert list(reopened.iter_exercises()) == [exercise(0)]
+    reopened.close()
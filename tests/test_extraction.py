@@ -0,0 +1,116 @@
+"""Extraction of solutions from LLM responses: the benchmark corpus plus targeted scanner and batch cases."""
+import json
+import os
+
+import pytest
+
+from src.utils import decode_json_string, extract_batch_solutions, extract_solution_code, scan_response
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks",
+                      "extraction_corpus.jsonl")
+
+
+def load_corpus():
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("case", load_corpus(), ids=lambda case: case["id"])
+def test_corpus(case):
+    found = extract_solution_code(case["response"], case["language"])
+    assert (found["solution"] if found else None) == case["expected"]
+
+
+def test_decode_json_string():
+    assert decode_json_string(r"a\nb\t\"c\"") == 'a\nb\t"c"'
+    assert decode_json_string(r"café è") == "café è"
+    assert decode_json_string(r"re.match(r'\d+', s)\n") == "re.match(r'\\d+', s)\n"
+
+
+def test_scan_response_skips_think_block():
+    found = scan_response('<think>maybe "solution": "wrong"</think>\n{"solution": "right"}')
+    assert found["json"] == "right"
+
+
+def test_scan_response_collects_first_fence_of_each_language():
+    text = "```python\nfirst\n```\n```java\nclass A {}\n```\n```python\nsecond\n```"
+    assert scan_response(text)["fences"] == {"python": "first", "java": "class A {}"}
+
+
+def test_scan_response_definition_ends_at_unindented_line():
+    found = scan_response("Answer:\ndef solution(n):\n    return n\nThat is all.")
+    assert found["definition"] == "def solution(n):\n    return n"
+
+
+def test_scan_response_stop_at_key():
+    text = '{"solution": "x"}\n```json\n{"a": 1}\n```'
+    assert scan_response(text)["fences"] == {}
+    assert scan_response(text, stop_at_key=False)["fences"] == {"json": '{"a": 1}'}
+
+
+def test_scan_response_unclosed_string_runs_to_end():
+    assert scan_response('{"solution": "def solution(n):\\n    return n')["json"] == "def solution(n):\n    return n"
+
+
+NAMES = ["Double", "Reverse", "Sum"]
+
+
+@pytest.mark.parametrize("response", [
+    json.dumps([{"exercise": "Double", "solution": "d"}, {"exercise": "Reverse", "solution": "r"},
+                {"exercise": "Sum", "solution": "s"}]),
+    json.dumps({"Double": "d", "Reverse": "r", "Sum": "s"}),
+    json.dumps({"solutions": [{"exercise": name, "solution": code} for name, code in zip(NAMES, "drs")]}),
+    "```json\n" + json.dumps([{"exercise": name, "solution": code} for name, code in zip(NAMES, "drs")]) + "\n```",
+    "Here you go:\n" + json.dumps([{"exercise": name, "solution": code} for name, code in zip(NAMES, "drs")]) + "\nDone.",
+], ids=["array", "object", "solutions-key", "fenced", "surrounded-by-text"])
+def test_batch_well_formed(response):
+    assert extract_batch_solutions(response, NAMES) == {"Double": "d", "Reverse": "r", "Sum": "s"}
+
+
+def test_batch_keeps_only_requested_names():
+    response = json.dumps([{"exercise": "Double", "solution": "d"}, {"exercise": "Other", "solution": "o"}])
+    assert extract_batch_solutions(response, NAMES) == {"Double": "d"}
+
+
+def test_batch_drops_empty_and_missing_solutions():
+    response = json.dumps([{"exercise": "Double", "solution": "  "}, {"exercise": "Reverse", "solution": "r"},
+                           {"exercise": "Sum"}])
+    assert extract_batch_solutions(response, NAMES) == {"Reverse": "r"}
+
+
+def test_batch_malformed_entry_loses_only_itself():
+    response = ('[{"exercise": "Double", "solution": "print("a")"},\n'
+                '{"exercise": "Reverse", "solution": "r"},\n'
+                '{"exercise": "Sum", "solution": "s"}] trailing')
+    assert extract_batch_solutions(response, NAMES) == {"Double": 'print("a")', "Reverse": "r", "Sum": "s"}
+
+
+def test_batch_truncated_answer():
+    response = '[{"exercise": "Double", "solution": "d"}, {"exercise": "Reverse", "solu'
+    assert extract_batch_solutions(response, NAMES) == {"Double": "d"}
+
+
+def test_batch_empty_answer():
+    assert extract_batch_solutions("", NAMES) == {}
+    assert extract_batch_solutions("I cannot help with that.", NAMES) == {}
+
+
+@pytest.mark.parametrize("response", [
+    '[{"exercise": "Double", "solution": "print("d")",},\n{"exercise": "Reverse", "solution": "r",},]',
+    '[{"solution": "print("d")", "exercise": "Double",},\n{"solution": "r", "exercise": "Reverse",},]',
+    '[{"exercise": "Double",\n "solution": "print("d")",\n},\n{"solution": "r",\n "exercise": "Reverse",\n}]',
+], ids=["exercise-first", "solution-first", "mixed-multiline"])
+def test_batch_trailing_commas_in_either_key_order(response):
+    assert extract_batch_solutions(response, NAMES) == {"Double": 'print("d")', "Reverse": "r"}
+
+
+def test_batch_entry_without_solution_does_not_take_the_next_one():
+    response = '[{"exercise": "Double",},\n{"solution": "r", "exercise": "Reverse",}]'
+    assert extract_batch_solutions(response, NAMES) == {"Reverse": "r"}
+
+
+def test_batch_braces_inside_solutions():
+    response = ('[{"exercise": "Double", "solution": "function f(x) {\\n  return {a: x};\\n}",},\n'
+                '{"solution": "r", "exercise": "Reverse"}] trailing')
+    assert extract_batch_solutions(response, NAMES) == {"Double": "function f(x) {\n  return {a: x};\n}",
+                                                         "Reverse": "r"}
@@ -0,0 +1,90 @@
+"""Java execution with --java-batch (CertamenHarness, one JVM per run) and --workers (CertamenWorker, warm JVMs)."""
+import shutil
+
+import pytest
+
+from src.code_evaluator import JavaExecutor
+from src.worker_pool import JavaWorker, WorkerPool
+
+pytestmark = pytest.mark.skipif(shutil.which("javac") is None or shutil.which("java") is None,
+                                reason="needs a JDK (javac and java on PATH)")
+
+# Doubles its argument, except for a few values that exercise the failure paths.
+SOLUTION = """
+public class Solution {
+    public static void main(String[] args) throws Exception {
+        int n = Integer.parseInt(args[0]);
+        if (n == 3) {
+            throw new IllegalStateException("three");
+        }
+        if (n == 4) {
+            while (true) { }
+        }
+        if (n == 5) {
+            System.exit(7);
+        }
+        if (n == 6) {
+            Thread thread = new Thread(() -> System.out.println(n * 2));
+            thread.start();
+            thread.join();
+            System.err.println("from a thread");
+            return;
+        }
+        System.out.println(n == 2 ? 5 : n * 2);
+    }
+}
+"""
+
+
+@pytest.fixture(params=["batch", "workers"])
+def run(request):
+    pool = WorkerPool(JavaWorker, 1) if request.param == "workers" else None
+
+    def run(inputs, expected, code=SOLUTION):
+        options = {"timeout": 2, "batch": request.param == "batch"}
+        if pool:
+            options["pool"] = pool
+        return JavaExecutor(code, inputs, expected, **options).execute()
+
+    yield run
+    if pool:
+        pool.close()
+
+
+def test_passing_and_failing(run):
+    results = run([1, 2, 10], [2, 4, 20])
+    assert [result["success"] for result in results] == [True, False, True]
+    assert results[1]["output"] == "5"
+
+
+def test_exception(run):
+    results = run([3, 1], [6, 2])
+    assert [result["success"] for result in results] == [False, True]
+    assert results[0]["status"] == "error"
+
+
+def test_timeout_does_not_lose_later_cases(run):
+    results = run([1, 4, 7], [2, 8, 14])
+    assert [result["success"] for result in results] == [True, False, True]
+    assert results[1]["status"] == "timeout"
+
+
+def test_system_exit_does_not_lose_later_cases(run):
+    results = run([5, 1], [10, 2])
+    assert [result["success"] for result in results] == [False, True]
+
+
+def test_output_of_threads_started_by_a_case(run):
+    results = run([6, 1], [12, 2])
+    assert [result["success"] for result in results] == [True, True]
+
+
+def test_worker_runs_each_job_with_its_own_classes(run):
+    other = SOLUTION.replace("n * 2);\n    }\n}", "n * 3);\n    }\n}")
+    assert [result["success"] for result in run([1], [2])] == [True]
+    assert [result["success"] for result in run([1], [3], other)] == [True]
+
+
+def test_compilation_error(run):
+    results = run([1], [2], "public class Solution { broken }")
+    assert results[0]["success"] is False
@@ -0,0 +1,20 @@
+"""The standard input format C and C++ solutions read their arguments from."""
+import pytest
+
+from src.native_executor import NativeExecutor
+
+
+@pytest.mark.parametrize("test_input, stdin", [
+    (42, "42\n"),
+    ([3, True], "3\ntrue\n"),
+    ("two words", "9 two words\n"),
+    (["two words"], "9 two words\n"),
+    ([["two", "words"]], "2 3 two 5 words\n"),
+    ([[]], "0\n"),
+    ([[[1, 2], [], [3]]], "3 2 1 2 0 1 3\n"),
+    ("héllo", "6 héllo\n"),
+    ({"a": [1]}, "1 1 a 1 1\n"),
+], ids=["int", "two-arguments", "string", "string-argument", "list-of-strings", "empty-list", "nested-list",
+        "non-ascii", "object"])
+def test_encode_stdin(test_input, stdin):
+    assert NativeExecutor.encode_stdin(test_input) == stdin
@@ -0,0 +1,135 @@
+"""Tests for the results sink of OutputManager: resume, timed-out records, fsync and shard merging."""
+import json
+import os
+
+import pytest
+
+from src import output_manager as output_module
+from src.output_manager import OutputManager
+
+
+def exercise(index):
+    return {"name": f"ex{index}", "description": f"exercise {index}", "input": [[index]], "output": [index],
+            "position": index}
+
+
+def passing(index):
+    return [{"input": [index], "expected": index, "output": index, "success": True}]
+
+
+def failing(index):
+    return [{"input": [index], "expected": index, "output": -1, "success": False}]
+
+
+@pytest.fixture
+def save_file(tmp_path):
+    return str(tmp_path / "results.json")
+
+
+def manager(save_file, **options):
+    return OutputManager(save_file, model="m", language="python", **options)
+
+
+def test_resume_skips_completed_exercises(save_file):
+    first = manager(save_file)
+    first.add_result(exercise(0), "code", passing(0), 0.1)
+    first.add_result(exercise(1), "code", failing(1), 0.1)
+    first.close()
+
+    resumed = manager(save_file, resume=True)
+    remaining = list(resumed.skip_completed([exercise(0), exercise(1), exercise(2)]))
+    assert [item["name"] for item in remaining] == ["ex2"]
+    assert (resumed.resumed_correct, resumed.resumed_total) == (1, 2)
+
+
+def test_index_records_skips_timed_out_records(save_file):
+    first = manager(save_file)
+    first.add_result(exercise(0), "code", passing(0), 0.1)
+    first.report_timeout(exercise(1), "LLM request timed out", 5.0)
+    first.close()
+
+    resumed = manager(save_file, resume=True)
+    assert resumed.completed == {resumed.result_key(exercise(0)): True}
+    assert [item["name"] for item in resumed.skip_completed([exercise(0), exercise(1)])] == ["ex1"]
+
+
+def test_own_records_drops_superseded_timed_out_record(save_file):
+    first = manager(save_file)
+    first.report_timeout(exercise(0), "LLM request timed out", 5.0)
+    first.report_timeout(exercise(1), "LLM request timed out", 5.0)
+    first.close()
+
+    resumed = manager(save_file, resume=True)
+    resumed.add_result(exercise(0), "code", passing(0), 0.1)
+    records = list(resumed.own_records())
+    assert [(record["exercise"], record.get("timed_out", False)) for record in records] == [
+        ("ex1", True), ("ex0", False)]
+
+
+def test_own_records_keeps_only_this_model_and_language(save_file):
+    first = manager(save_file)
+    first.add_result(exercise(0), "code", passing(0), 0.1)
+    first.close()
+    other = OutputManager(save_file, model="other", language="python", resume=True)
+    other.add_result(exercise(0), "code", failing(0), 0.1)
+    other.close()
+    assert [record["model"] for record in manager(save_file, resume=True).own_records()] == ["m"]
+
+
+def test_fsync_is_batched(save_file, monkeypatch):
+    calls = []
+    monkeypatch.setattr(output_module.os, "fsync", calls.append)
+    sink = manager(save_file, fsync_every=3, fsync_interval=3600)
+    for index in range(7):
+        sink.add_result(exercise(index), "code", passing(index), 0.1)
+    assert len(calls) == 2
+    sink.close()
+    assert len(calls) == 3
+    with open(sink.records_file, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 7
+
+
+def write_shard(save_file, index, count, positions, elapsed=1.0):
+    shard = manager(save_file, shard=(index, count))
+    for position in positions:
+        shard.add_result(exercise(position), "code", passing(position) if position % 2 else failing(position), 0.1)
+    correct = sum(position % 2 for position in positions)
+    shard.save_summary(correct, len(positions), elapsed)
+    shard.close()
+    return shard.save_file
+
+
+def test_merge_shards_restores_the_unsharded_order(tmp_path, save_file):
+    paths = [write_shard(save_file, 1, 2, [1, 3, 5], elapsed=2.0), write_shard(save_file, 0, 2, [0, 2, 4])]
+    merged = OutputManager(str(tmp_path / "merged.json"))
+    assert merged.merge_shards(paths) == (3, 6, 2.0)
+    with open(merged.save_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert [record["exercise"] for record in data["results"]] == [f"ex{index}" for index in range(6)]
+    assert all("position" not in record for record in data["results"])
+    assert data["summary"] == {"correct_exercises": 3, "total_exercises": 6, "total_time": 2.0}
+
+
+def test_merge_shards_reports_missing_shards(tmp_path, save_file, capsys):
+    paths = [write_shard(save_file, 0, 3, [0, 3])]
+    merged = OutputManager(str(tmp_path / "merged.json"))
+    assert merged.merge_shards(paths) == (1, 2, 1.0)
+    assert "Missing shards: 1, 2" in capsys.readouterr().out
+
+
+def test_merge_shards_skips_duplicate_shards(tmp_path, save_file, capsys):
+    path = write_shard(save_file, 0, 1, [0, 1])
+    merged = OutputManager(str(tmp_path / "merged.json"))
+    assert merged.merge_shards([path, path]) == (1, 2, 1.0)
+    assert "Shard 0 given twice" in capsys.readouterr().out
+
+
+def test_merge_shards_rejects_unsharded_results(tmp_path, save_file, capsys):
+    unsharded = manager(save_file)
+    unsharded.add_result(exercise(0), "code", passing(0), 0.1)
+    unsharded.save_summary(1, 1, 1.0)
+    unsharded.close()
+    merged = OutputManager(str(tmp_path / "merged.json"))
+    assert merged.merge_shards([save_file]) == (0, 0, 0.0)
+    assert "is not the output of a sharded run" in capsys.readouterr().out
+    assert os.path.exists(merged.save_file)
@@ -0,0 +1,64 @@
+"""Complexity fitting on synthetic curves and on measurements that used to be misclassified."""
+import math
+
+import pytest
+
+from src.profiler import MEMORY_NOISE, TIMING_NOISE, fit_complexity
+
+SIZES = [8 << i for i in range(14)]
+
+
+CLASSES = [
+    ("O(1)", lambda n: 1.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: n),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+    ("O(n^2)", lambda n: n ** 2),
+    ("O(n^3)", lambda n: n ** 3),
+]
+
+
+# Cubic solutions stop long before 65536 within the time budget.
+@pytest.mark.parametrize("name, growth, sizes", [(name, growth, SIZES[:7]) for name, growth in CLASSES] +
+                         [(name, growth, SIZES) for name, growth in CLASSES[:-1]])
+def test_synthetic_curves(name, growth, sizes):
+    values = [1e-6 + 1e-2 * growth(n) / growth(sizes[-1]) for n in sizes]
+    assert fit_complexity(sizes, values, noise=TIMING_NOISE) == name
+
+
+def test_exponential():
+    sizes = list(range(8, 26, 2))
+    assert fit_complexity(sizes, [1e-7 * 1.6 ** n for n in sizes], noise=TIMING_NOISE) == "O(2^n)"
+
+
+def test_too_few_sizes():
+    assert fit_complexity([8, 16], [1.0, 2.0]) is None
+
+
+# Wall seconds of len(xs): flat apart from one slow sample.
+LEN_WALL = [9.39e-08, 1.19e-07, 1.32e-07, 1.38e-07, 9.25e-08, 9.58e-08, 1.13e-07, 1.15e-07, 4.13e-07, 1.16e-07,
+            1.13e-07, 1.13e-07, 1.8e-07, 1.09e-07]
+# Wall seconds of a Python for loop summing xs, and of sum(xs): constant overhead at small sizes and
+# cache effects at large ones.
+LOOP_WALL = [2.54e-07, 4.96e-07, 1.26e-06, 2.5e-06, 4.97e-06, 1.01e-05, 1.95e-05, 2.88e-05, 5.39e-05, 0.000112,
+             0.000321, 0.000411, 0.000878, 0.00281]
+SUM_WALL = [2.71e-07, 2.41e-07, 3.64e-07, 5.83e-07, 9.35e-07, 1.7e-06, 4.7e-06, 7.19e-06, 1.39e-05, 2.48e-05,
+            7.01e-05, 0.000128, 0.000307, 0.000637]
+# Wall seconds and peak bytes of sorted(xs); timsort only allocates merge space past 64 elements.
+SORTED_WALL = [6.67e-07, 9.46e-07, 1.58e-06, 3.11e-06, 7.1e-06, 1.58e-05, 4.09e-05, 9.37e-05, 0.000272, 0.0007,
+               0.0016, 0.00302, 0.00719, 0.018]
+SORTED_MEMORY = [136, 200, 328, 584, 1096, 2120, 4168, 12344, 24632, 49208, 98320, 196664, 393280, 786440]
+# Peak bytes of the summing loop: a few int objects.
+LOOP_MEMORY = [48, 48, 112, 112, 112, 112, 112, 112, 112, 112, 112, 112, 112, 120]
+
+
+@pytest.mark.parametrize("values, noise, expected", [
+    (LEN_WALL, TIMING_NOISE, "O(1)"),
+    (LOOP_WALL, TIMING_NOISE, "O(n)"),
+    (SUM_WALL, TIMING_NOISE, "O(n)"),
+    (SORTED_WALL, TIMING_NOISE, "O(n log n)"),
+    (SORTED_MEMORY, MEMORY_NOISE, "O(n)"),
+    (LOOP_MEMORY, MEMORY_NOISE, "O(1)"),
+], ids=["len", "loop", "sum", "sorted", "sorted-memory", "loop-memory"])
+def test_measured(values, noise, expected):
+    assert fit_complexity(SIZES, [float(value) for value in values], noise=noise) == expected
@@ -0,0 +1,139 @@
+"""Tests for the streamed solution scanner and the token usage of streamed answers."""
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.mock_openai_server import MockOpenAIServer
+from src.llm_executor import LLMExecutor
+from src.solver import SolveBudget
+from src.stream_parser import SolutionStreamParser
+
+
+def feed_all(parser, chunks):
+    for chunk in chunks:
+        if parser.feed(chunk):
+            break
+    return parser
+
+
+def split(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000], ids=["1", "3", "7", "whole"])
+def test_solution_found_at_any_chunk_size(size):
+    answer = json.dumps({"exercise": "Add", "solution": "def add(a, b):\n    return a + b"})
+    parser = feed_all(SolutionStreamParser(), split(answer, size))
+    assert parser.state == "done"
+    assert parser.solution == "def add(a, b):\n    return a + b"
+
+
+def test_key_split_across_chunks():
+    parser = SolutionStreamParser()
+    assert not parser.feed('{"exercise": "x", "sol')
+    assert not parser.feed('ution": "pass')
+    assert parser.feed('"}')
+    assert parser.solution == "pass"
+
+
+def test_escaped_quotes_do_not_close_the_string():
+    answer = json.dumps({"solution": 'print("a \\"quoted\\" word")'})
+    for size in (1, 2, len(answer)):
+        parser = feed_all(SolutionStreamParser(), split(answer, size))
+        assert parser.state == "done"
+        assert parser.solution == 'print("a \\"quoted\\" word")'
+
+
+def test_escape_split_across_chunks():
+    parser = SolutionStreamParser()
+    assert not parser.feed('{"solution": "say \\')
+    assert not parser.feed('"hi\\"')
+    assert parser.feed('"}')
+    assert parser.solution == 'say "hi"'
+
+
+def test_mention_of_the_key_is_not_the_key():
+    parser = feed_all(SolutionStreamParser(), ['Here is the "solution" you asked for: {"solution": "x = 1"}'])
+    assert parser.solution == "x = 1"
+
+
+def test_key_not_followed_by_a_string_is_invalid():
+    parser = SolutionStreamParser()
+    assert parser.feed('{"solution": 42}')
+    assert parser.state == "invalid"
+
+
+def test_think_block_longer_than_the_limit():
+    thinking = "<think>" + "let me think. " * 100 + "</think>"
+    answer = thinking + json.dumps({"solution": "pass"})
+    parser = feed_all(SolutionStreamParser(max_chars=100), split(answer, 16))
+    assert len(thinking) > 100
+    assert parser.state == "done"
+    assert parser.solution == "pass"
+
+
+def test_solution_in_the_think_block_is_ignored():
+    answer = '<think>maybe {"solution": "wrong"}</think>{"solution": "right"}'
+    parser = feed_all(SolutionStreamParser(), split(answer, 5))
+    assert parser.solution == "right"
+
+
+def test_long_preamble_before_the_key_exceeds_the_limit():
+    parser = feed_all(SolutionStreamParser(max_chars=100), split("blah " * 100 + '{"solution": "pass"}', 10))
+    assert parser.state == "invalid"
+
+
+def test_long_solution_counts_from_the_key():
+    preamble = "x" * 80
+    solution = "y" * 80
+    parser = feed_all(SolutionStreamParser(max_chars=100), split(preamble + json.dumps({"solution": solution}), 10))
+    assert parser.solution == solution
+
+
+def test_truncated_stream():
+    parser = feed_all(SolutionStreamParser(), ['{"exercise": "x", "solution": "def f():\\n    ret'])
+    assert not parser.finished
+    assert parser.state == "string"
+    assert parser.solution is None
+    assert parser.result() == parser.text
+
+
+def test_result_is_minimal_json():
+    parser = feed_all(SolutionStreamParser(), ['{"solution": "a\\nb", "notes": "ignored"}'])
+    assert json.loads(parser.result()) == {"solution": "a\nb"}
+
+
+@pytest.fixture
+def server():
+    answers = {"done": '{"solution": "pass"} and more text after it', "none": "no solution in this answer at all"}
+    server = MockOpenAIServer(responder=lambda body: answers[body["messages"][0]["content"]], chunk_chars=8).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def executor(server):
+    executor = LLMExecutor(server.url, "key", "mock")
+    executor.budget = SolveBudget()
+    return executor
+
+
+def test_stream_records_usage_chunk(server, executor):
+    parser = executor.stream_completion("none")
+    body = {"messages": [{"content": "none"}]}
+    assert parser.usage is not None
+    assert executor.budget.tokens == server.usage(body, ["no solution in this answer at all"])["total_tokens"]
+
+
+def test_async_stream_records_usage_chunk(server, executor):
+    parser = asyncio.run(executor.stream_completion_async("none"))
+    assert parser.usage is not None
+    assert executor.budget.tokens == parser.usage.total_tokens > 0
+
+
+def test_stream_closed_early_records_an_estimate(executor):
+    parser = executor.stream_completion("done")
+    assert parser.solution == "pass"
+    assert parser.usage is None
+    assert executor.budget.tokens == len("done") // 4 + -(-len(parser.text) // 4)
@@ -0,0 +1,112 @@
+"""Tests for the results warehouse: archiving runs, querying them and the warehouse command line."""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from main import Main
+from src.warehouse import ResultsWarehouse, format_table
+
+
+def record(name, model, results, elapsed=1.0):
+    return {
+        "exercise": name,
+        "exercise_hash": f"hash-{name}",
+        "model": model,
+        "language": "python",
+        "test_results": [{"output": 1, "success": success} for success in results],
+        "elapsed_time": elapsed,
+        "passed": all(results)
+    }
+
+
+FIRST_RUN = [record("add", "a", [True, True]), record("sub", "a", [True, False]), record("add", "b", [True, True])]
+SECOND_RUN = [record("add", "a", [False, True], 3.0), record("sub", "a", [True, True], 2.0)]
+
+
+def archive(directory, records):
+    Main.archive(SimpleNamespace(no_warehouse=False, shard=None, warehouse=directory), records)
+
+
+def query(directory, capsys, *argv):
+    capsys.readouterr()
+    Main.query_warehouse(Main.parse_warehouse_arguments(["--dir", directory, *argv]))
+    return capsys.readouterr().out
+
+
+@pytest.fixture
+def directory(tmp_path, capsys):
+    directory = str(tmp_path / "warehouse")
+    archive(directory, FIRST_RUN)
+    archive(directory, SECOND_RUN)
+    return directory
+
+
+def test_archive_then_runs(directory, capsys):
+    runs = ResultsWarehouse(directory).runs()
+    assert [(run["tests"], run["exercises"]) for run in runs] == [(6, 3), (4, 2)]
+    assert runs[0]["run"] != runs[1]["run"]
+    output = query(directory, capsys, "runs")
+    assert all(run["run"] in output for run in runs)
+
+
+def test_pass_rate_by_model(directory, capsys):
+    rows = json.loads(query(directory, capsys, "pass-rate", "--by", "model", "--where", "run=last~1", "--json"))
+    assert rows == [{"model": "a", "total": 4, "passed": 3, "pass_rate": 0.75},
+                    {"model": "b", "total": 2, "passed": 2, "pass_rate": 1.0}]
+
+
+def test_pass_rate_per_exercise_of_the_last_run(directory, capsys):
+    rows = json.loads(query(directory, capsys, "pass-rate", "--level", "exercise", "--where", "run=last", "--json"))
+    assert rows == [{"total": 2, "passed": 1, "pass_rate": 0.5}]
+
+
+def test_pass_rate_of_one_test(directory, capsys):
+    rows = json.loads(query(directory, capsys, "pass-rate", "--by", "run", "--where", "test=1", "--json"))
+    assert [row["passed"] for row in rows] == [2, 2]
+
+
+def test_latency(directory, capsys):
+    rows = json.loads(query(directory, capsys, "latency", "--where", "run=last", "--percentiles", "0", "100", "--json"))
+    assert rows == [{"count": 2, "mean": 2.5, "p0": 2.0, "p100": 3.0}]
+
+
+def test_regressions(directory, capsys):
+    rows = json.loads(query(directory, capsys, "regressions", "--json"))
+    assert rows == [{"compared": 2, "regressions": 1, "fixes": 1, "regressed": ["add"]}]
+
+
+def test_unknown_run_matches_nothing(directory):
+    warehouse = ResultsWarehouse(directory)
+    assert warehouse.pass_rate(filters={"run": "last~5"}) == [{"total": 0, "passed": 0, "pass_rate": 0.0}]
+
+
+def test_format_table():
+    assert format_table([]) == "(no rows)"
+    lines = format_table([{"model": "a", "pass_rate": 0.5}]).splitlines()
+    assert lines[0].split() == ["model", "pass_rate"]
+    assert lines[2].split() == ["a", "0.5000"]
+
+
+@pytest.mark.parametrize("argv", [
+    ["pass-rate", "--where", "run=last~x"],
+    ["pass-rate", "--where", "run=last~"],
+    ["pass-rate", "--where", "test=abc"],
+    ["pass-rate", "--where", "color=red"],
+    ["pass-rate", "--where", "model"],
+    ["regressions", "--baseline", "last~x"],
+    ["latency", "--percentiles", "101"],
+    ["latency", "--percentiles", "50", "-1"],
+], ids=["run-not-a-number", "run-without-number", "test-not-a-number", "unknown-key", "no-value",
+        "baseline-not-a-number", "percentile-above-100", "percentile-below-0"])
+def test_invalid_warehouse_arguments(argv, capsys):
+    with pytest.raises(SystemExit):
+        Main.parse_warehouse_arguments(argv)
+    assert "error" in capsys.readouterr().err
+
+
+def test_valid_warehouse_arguments():
+    args = Main.parse_warehouse_arguments(["latency", "--where", "run=last~2", "--where", "test=0",
+                                           "--percentiles", "0", "100"])
+    assert args.where == {"run": "last~2", "test": "0"}
+    assert args.percentiles == [0, 100]